@@ -0,0 +1,211 @@
+import os
+import gzip
+import time
+import hashlib
+import threading
+
+from config_storage import (dump_json_array, iter_json_stream, load_json_array, write_json_atomic)
+
+
+# 默认最多保留的备份数量
+DEFAULT_MAX_BACKUPS = 30
+
+# 默认备份保留天数（最新的备份始终保留）
+DEFAULT_MAX_BACKUP_AGE_DAYS = 90
+
+# 旧版本在配置文件旁生成的完整备份文件名前缀：window_configs.json.backup.<时间戳>
+LEGACY_BACKUP_MARKER = ".backup."
+
+
+class _HashingWriter:
+    """写入时同时计算未压缩内容的SHA-256和字节数"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.hash.update(data)
+        self.size += len(data)
+        self.stream.write(data)
+
+
+class BackupStore:
+    """按内容寻址的配置备份仓库
+
+    每个备份的内容以未压缩JSON的SHA-256命名，gzip压缩后保存在 blobs 目录，
+    内容相同的备份共用同一个文件；与最新备份内容相同时不生成新版本。
+    版本列表保存在 index.json 中，按数量和天数清理旧版本，不再被引用的
+    内容文件随之删除。
+    """
+
+    def __init__(self, directory, max_count=DEFAULT_MAX_BACKUPS, max_age_days=DEFAULT_MAX_BACKUP_AGE_DAYS):
+        self.directory = directory
+        self.blobs_folder = os.path.join(directory, "blobs")
+        self.index_file = os.path.join(directory, "index.json")
+        self.max_count = max_count
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+
+    def _blob_path(self, content_hash):
+        return os.path.join(self.blobs_folder, f"{content_hash}.json.gz")
+
+    def _load_index(self):
+        """读取版本列表（按时间从旧到新）"""
+        if not os.path.exists(self.index_file):
+            return []
+        try:
+            return load_json_array(self.index_file)
+        except Exception:
+            return []
+
+    def list_backups(self):
+        """获取所有备份版本（最新的在前）
+
+        Returns:
+            [{"id", "hash", "created_at", "count", "size", "compressed_size"}, ...]
+        """
+        with self._lock:
+            return list(reversed(self._load_index()))
+
+    def add(self, configs, created_at=None, progress=None, prune=True):
+        """备份一份配置
+
+        Args:
+            configs: 配置列表
+            created_at: 备份时间（默认当前时间，迁移旧备份时使用原时间）
+            progress: 可选回调 progress(已写入配置数, 配置总数)
+            prune: 是否按保留策略清理旧版本（批量迁移时由调用方最后统一清理）
+
+        Returns:
+            (版本信息, 是否新建)：与最新备份内容相同，或已有同一时间、相同内容的版本
+            （重新导入同一个旧备份）时返回已有版本和False
+        """
+        if created_at is None:
+            created_at = time.time()
+        os.makedirs(self.blobs_folder, exist_ok=True)
+
+        # 边压缩边计算哈希，写完后再按哈希命名
+        temp_path = os.path.join(self.blobs_folder, f"tmp-{os.getpid()}-{threading.get_ident()}.json.gz")
+        try:
+            with open(temp_path, "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) as gz:
+                    writer = _HashingWriter(gz)
+                    dump_json_array(writer, configs, 2, progress)
+                raw.flush()
+                os.fsync(raw.fileno())
+            content_hash = writer.hash.hexdigest()
+
+            with self._lock:
+                entries = self._load_index()
+                if entries and entries[-1]["hash"] == content_hash:
+                    return entries[-1], False
+                for entry in entries:
+                    if entry["hash"] == content_hash and entry["created_at"] == created_at:
+                        return entry, False
+
+                blob_path = self._blob_path(content_hash)
+                if os.path.exists(blob_path):
+                    os.remove(temp_path)  # 内容已存在（与更早的某个版本相同），共用该文件
+                else:
+                    os.replace(temp_path, blob_path)
+
+                entry = {
+                    "id": time.strftime("%Y%m%d-%H%M%S", time.localtime(created_at)) + f"-{content_hash[:8]}",
+                    "hash": content_hash,
+                    "created_at": created_at,
+                    "count": len(configs),
+                    "size": writer.size,
+                    "compressed_size": os.path.getsize(blob_path),
+                }
+                entries.append(entry)
+                entries.sort(key=lambda item: item["created_at"])
+                if prune:
+                    self._prune(entries)
+                else:
+                    write_json_atomic(self.index_file, entries)
+                return entry, True
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _prune(self, entries):
+        """按保留策略删除旧版本并写回版本列表，删除不再被引用的内容文件（调用方已持有锁）"""
+        if self.max_count and len(entries) > self.max_count:
+            del entries[:len(entries) - self.max_count]
+        if self.max_age_days:
+            cutoff = time.time() - self.max_age_days * 86400
+            # 最新的备份无论多旧都保留
+            while len(entries) > 1 and entries[0]["created_at"] < cutoff:
+                del entries[0]
+        write_json_atomic(self.index_file, entries)
+
+        referenced = {entry["hash"] for entry in entries}
+        for filename in os.listdir(self.blobs_folder):
+            content_hash = filename.split(".", 1)[0]
+            if filename.endswith(".json.gz") and not filename.startswith("tmp-") and content_hash not in referenced:
+                try:
+                    os.remove(os.path.join(self.blobs_folder, filename))
+                except OSError:
+                    pass
+
+    def find(self, backup_id):
+        """根据版本ID查找备份，不存在时返回None"""
+        for entry in self.list_backups():
+            if entry["id"] == backup_id:
+                return entry
+        return None
+
+    def load(self, backup_id, progress=None):
+        """读取指定版本的配置列表（流式解压解析）
+
+        Args:
+            backup_id: 版本ID
+            progress: 可选回调 progress(已解压字节数, 未压缩总字节数)
+
+        Raises:
+            KeyError: 版本不存在
+        """
+        entry = self.find(backup_id)
+        if entry is None:
+            raise KeyError(backup_id)
+        with gzip.open(self._blob_path(entry["hash"]), "rb") as f:
+            return list(iter_json_stream(f, entry.get("size", 0), progress))
+
+    def migrate_legacy_backups(self, config_file):
+        """把旧版本在配置文件旁生成的完整备份导入仓库并删除原文件
+
+        导入时不清理，全部导入后再按保留策略统一清理，超出保留策略的旧备份
+        与仓库中的版本一样被删除；读取失败的原文件保留不动。
+
+        Returns:
+            导入的备份数量
+        """
+        directory = os.path.dirname(os.path.abspath(config_file))
+        prefix = os.path.basename(config_file) + LEGACY_BACKUP_MARKER
+        legacy_files = []
+        for filename in os.listdir(directory):
+            if filename.startswith(prefix) and filename[len(prefix):].isdigit():
+                legacy_files.append((int(filename[len(prefix):]), os.path.join(directory, filename)))
+
+        imported = []
+        for timestamp, path in sorted(legacy_files):
+            try:
+                self.add(load_json_array(path), created_at=timestamp, prune=False)
+                imported.append(path)
+            except Exception:
+                pass
+        if not imported:
+            return 0
+
+        # 版本列表写入后再删除原文件；删除失败时下次重新导入，已有的版本不会重复添加
+        with self._lock:
+            self._prune(self._load_index())
+        for path in imported:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return len(imported)
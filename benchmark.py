@@ -0,0 +1,477 @@
+"""
+WindowSizer 性能基准测试
+使用内存模拟后端（SimulatedBackend）生成合成窗口和配置，测量窗口枚举、
+配置匹配、批量应用、配置列表加载和配置保存在不同规模下的耗时、内存分配
+和系统调用次数，结果写入JSON文件，便于在不同版本之间比较。
+
+无需Windows桌面，可在无头Linux环境运行：
+    QT_QPA_PLATFORM=offscreen python benchmark.py
+    python benchmark.py --windows 100,1000 --configs 10,1000 --output results.json
+    python benchmark.py --compare old_results.json
+
+默认结果文件为 build/benchmark_results.json（build 目录不纳入版本控制）。
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import statistics
+import subprocess
+
+# 无头环境下使用offscreen平台插件（必须在创建QApplication之前设置）
+if sys.platform != "win32":
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QSettings, QEvent
+
+from window_backend import SimulatedBackend
+from window_manager import WindowManager
+from window_monitor import auto_apply_configs
+from config_manager import ConfigManager
+
+
+DEFAULT_WINDOW_COUNTS = [100, 1000, 10000]
+DEFAULT_CONFIG_COUNTS = [10, 1000, 50000]
+
+# 合成配置中能匹配到现有窗口的比例，以及处于启用状态的比例
+MATCH_RATIO = 0.5
+ENABLED_RATIO = 0.9
+
+# 需要创建主窗口的阶段默认只测到该配置数量，可通过 --max-ui-configs 调整
+DEFAULT_MAX_UI_CONFIGS = 50000
+
+# 搜索阶段逐字输入的关键字，以及每次搜索取的结果数（与主窗口一致）
+SEARCH_KEYWORD = "missing window 1"
+SEARCH_PAGE_SIZE = 500
+
+# 比较结果时，耗时增长超过该比例视为性能回退
+REGRESSION_THRESHOLD = 0.2
+
+# 默认结果文件
+DEFAULT_OUTPUT = os.path.join("build", "benchmark_results.json")
+
+
+def make_backend(window_count, latency=0.0, hung_ratio=0.0, seed=0):
+    """创建包含指定数量窗口的模拟后端"""
+    backend = SimulatedBackend(latency=latency, seed=seed)
+    backend.populate(window_count, hung_ratio=hung_ratio)
+    return backend
+
+
+def make_configs(backend, config_count, seed=0):
+    """生成合成配置：约一半匹配现有窗口（目标位置与当前不同），其余不匹配任何窗口
+
+    每个窗口最多对应一个配置，所有配置的 (标题, 进程名) 互不相同（与程序中的
+    配置一致）；窗口用完后其余配置都不匹配窗口。
+    """
+    import random
+    rng = random.Random(seed)
+    windows = list(backend.windows.values())
+    rng.shuffle(windows)
+    configs = []
+    for i in range(config_count):
+        if windows and rng.random() < MATCH_RATIO:
+            window = windows.pop()
+            title = window.title
+            process = backend.processes[window.pid]["name"]
+        else:
+            title = f"Missing Window {i:05d}"
+            process = f"missing{i % 97:02d}.exe"
+        configs.append({
+            "title": title,
+            "process": process,
+            "x": rng.randrange(0, 1600),
+            "y": rng.randrange(0, 900),
+            "width": rng.randrange(300, 1200),
+            "height": rng.randrange(200, 900),
+            "enabled": rng.random() < ENABLED_RATIO,
+        })
+    return configs
+
+
+def measure(run, setup, repeat=1, track_allocations=True, teardown=None):
+    """测量一个阶段
+
+    每次运行前调用 setup() 重建状态（返回字典，传给 run），运行后调用
+    teardown(state) 释放状态（不计入耗时）；状态中包含 "backend" 时统计该后端
+    的调用次数。耗时取多次运行的中位数；内存分配在单独的一次运行中用
+    tracemalloc 统计，避免追踪开销影响耗时。
+
+    Returns:
+        结果字典
+    """
+    wall_times = []
+    calls = {}
+    for _ in range(repeat):
+        state = setup()
+        backend = state.get("backend")
+        if backend is not None:
+            backend.reset_call_counts()
+        start = time.perf_counter()
+        run(state)
+        wall_times.append(time.perf_counter() - start)
+        if backend is not None:
+            calls = dict(backend.call_counts)
+        if teardown is not None:
+            teardown(state)
+
+    result = {
+        "wall_time": statistics.median(wall_times),
+        "wall_time_min": min(wall_times),
+        "wall_times": wall_times,
+        "calls": dict(sorted(calls.items())),
+        "total_calls": sum(calls.values()),
+    }
+
+    if track_allocations:
+        state = setup()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            base_current, _ = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+            run(state)
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+            if teardown is not None:
+                teardown(state)
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+        result.update({
+            "alloc_peak_bytes": max(0, peak - base_current),
+            "alloc_net_bytes": current - base_current,
+            "alloc_blocks": blocks,
+        })
+    return result
+
+
+def bench_enumeration(window_count, args):
+    """窗口枚举：首次完整枚举、无变化的重复枚举、事件驱动的增量枚举"""
+    def setup_cold():
+        backend = make_backend(window_count, args.latency, args.hung_ratio, args.seed)
+        return {"backend": backend, "manager": WindowManager(backend=backend)}
+
+    def setup_warm():
+        state = setup_cold()
+        state["manager"].get_window_list()
+        return state
+
+    def setup_incremental():
+        # 1%的窗口移动后只探测这些窗口
+        state = setup_warm()
+        backend = state["backend"]
+        hwnds = list(backend.windows)[::100]
+        for hwnd in hwnds:
+            left, top, right, bottom = backend.windows[hwnd].rect
+            backend.move_window(hwnd, (left + 10, top + 10, right + 10, bottom + 10))
+        state["hwnds"] = set(hwnds)
+        return state
+
+    phases = [
+        # 首次枚举：所有窗口都需要查询类名和进程
+        ("get_window_list.cold", setup_cold, lambda state: state["manager"].get_window_list()),
+        # 重复枚举：窗口没有变化，复用上一次的记录
+        ("get_window_list.warm", setup_warm, lambda state: state["manager"].get_window_list()),
+        ("get_window_snapshot.incremental", setup_incremental,
+         lambda state: state["manager"].get_window_snapshot(hwnds=state["hwnds"])),
+    ]
+    return [dict(phase=phase, windows=window_count, configs=0,
+                 **measure(run, setup, args.repeat, not args.no_alloc))
+            for phase, setup, run in phases]
+
+
+def bench_apply(window_count, config_count, app_factory, args):
+    """配置匹配与应用：自动应用（全量快照）、一键应用、加载配置列表"""
+    def setup_manager():
+        backend = make_backend(window_count, args.latency, args.hung_ratio, args.seed)
+        return {
+            "backend": backend,
+            "manager": WindowManager(backend=backend),
+            "configs": make_configs(backend, config_count, args.seed),
+        }
+
+    def setup_auto_apply():
+        state = setup_manager()
+        state["snapshot"] = state["manager"].get_window_snapshot(since=0)
+        return state
+
+    def setup_window():
+        state = setup_manager()
+        state["window"] = app_factory(state["manager"], state["configs"])
+        state["backend"].reset_call_counts()
+        return state
+
+    phases = [
+        ("auto_apply_configs", setup_auto_apply,
+         lambda state: auto_apply_configs(state["manager"], state["snapshot"], state["configs"])),
+    ]
+    if app_factory is not None and config_count <= args.max_ui_configs:
+        phases += [
+            ("_apply_all_configs", setup_window,
+             lambda state: state["window"]._apply_all_configs(state["configs"])),
+            ("load_config_list", setup_window, lambda state: state["window"].load_config_list()),
+        ]
+    return [dict(phase=phase, windows=window_count, configs=config_count,
+                 **measure(run, setup, args.repeat, not args.no_alloc))
+            for phase, setup, run in phases]
+
+
+def close_manager(state):
+    """关闭阶段中创建的ConfigManager（结束后台保存线程、关闭数据库连接）"""
+    state["manager"].close()
+
+
+def bench_save(config_count, work_dir, args):
+    """配置保存：ConfigManager.save_configs 以及单个配置变更的持久化"""
+    backend = make_backend(100, seed=args.seed)
+
+    def setup():
+        manager = ConfigManager(config_path=work_dir)
+        manager.configs = make_configs(backend, config_count, args.seed)
+        return {"manager": manager}
+
+    result = measure(lambda state: state["manager"].save_configs(), setup,
+                     args.repeat, not args.no_alloc, close_manager)
+    result["file_bytes"] = os.path.getsize(os.path.join(work_dir, "window_configs.json"))
+    results = [dict(phase="save_configs", windows=0, configs=config_count, **result)]
+
+    # 单个配置变更（如切换启用状态）在各存储模式下的持久化开销
+    for mode in ("json", "journal", "sqlite"):
+        def setup_update(mode=mode):
+            manager = ConfigManager(config_path=work_dir, storage_mode=mode)
+            manager.configs = make_configs(backend, config_count, args.seed)
+            manager._rebuild_index()
+            manager.save_configs()
+            return {"manager": manager}
+
+        def run_update(state):
+            manager = state["manager"]
+            config = dict(manager.configs[len(manager.configs) // 2])
+            config["enabled"] = not config["enabled"]
+            manager.update_config(config["id"], config)
+            manager.close()
+
+        result = measure(run_update, setup_update, args.repeat, not args.no_alloc, close_manager)
+        results.append(dict(phase=f"update_config.{mode}", windows=0, configs=config_count, **result))
+
+    # 导入同等数量的配置，约一半与现有配置重复
+    import_file = os.path.join(work_dir, "import.json")
+    with open(import_file, "w", encoding="utf-8") as f:
+        json.dump(make_configs(backend, config_count, args.seed + 1), f, ensure_ascii=False)
+
+    def setup_import():
+        manager = ConfigManager(config_path=work_dir, storage_mode="journal")
+        manager.configs = make_configs(backend, config_count, args.seed)
+        manager.save_configs()
+        manager.load_configs()
+        return {"manager": manager}
+
+    result = measure(lambda state: state["manager"].import_configs(import_file), setup_import,
+                     args.repeat, not args.no_alloc, close_manager)
+    results.append(dict(phase="import_configs", windows=0, configs=config_count, **result))
+
+    # 配置文件被外部修改约1%（改、删、增各占三分之一）后的增量重新加载
+    def setup_reload():
+        manager = ConfigManager(config_path=work_dir, storage_mode="journal")
+        manager.configs = make_configs(backend, config_count, args.seed)
+        manager.save_configs()
+        manager.load_configs()
+        modified = [dict(config) for config in manager.configs]
+        step = max(1, config_count // 100)
+        for i in range(0, len(modified), step * 3):
+            modified[i]["x"] += 1
+        del modified[step::step * 3]
+        added = make_configs(backend, max(1, config_count // 300), args.seed + 2)
+        for config in added:
+            config["title"] += " (new)"
+        modified += added
+        with open(manager.config_file, "w", encoding="utf-8") as f:
+            json.dump(modified, f, ensure_ascii=False)
+        return {"manager": manager}
+
+    result = measure(lambda state: state["manager"].reload_configs(), setup_reload,
+                     args.repeat, not args.no_alloc, close_manager)
+    results.append(dict(phase="reload_configs", windows=0, configs=config_count, **result))
+
+    # 配置搜索：建立索引，以及逐字输入关键字时每次按键的搜索
+    def setup_search():
+        manager = ConfigManager(config_path=work_dir)
+        manager.configs = make_configs(backend, config_count, args.seed)
+        manager._rebuild_index()
+        return {"manager": manager}
+
+    def run_build_index(state):
+        state["manager"].prepare_search_index()
+        state["manager"]._get_search_index()
+
+    def setup_typing():
+        state = setup_search()
+        run_build_index(state)
+        return state
+
+    def run_typing(state):
+        for length in range(1, len(SEARCH_KEYWORD) + 1):
+            state["manager"].search_configs_page(SEARCH_KEYWORD[:length], 1, SEARCH_PAGE_SIZE)
+
+    result = measure(run_build_index, setup_search, args.repeat, not args.no_alloc, close_manager)
+    results.append(dict(phase="build_search_index", windows=0, configs=config_count, **result))
+    result = measure(run_typing, setup_typing, args.repeat, not args.no_alloc, close_manager)
+    results.append(dict(phase="search_typing", windows=0, configs=config_count, **result))
+    return results
+
+
+def make_app_factory(work_dir):
+    """返回创建主窗口的工厂函数；主窗口的后台监测线程会立即停止，不干扰测量"""
+    from main import WindowSizer
+
+    windows = []
+
+    def factory(window_manager, configs):
+        # 释放上一个主窗口，避免大量控件累积影响后续测量
+        while windows:
+            old = windows.pop()
+            old.shutdown_workers()
+            old.config_manager.close()
+            old.deleteLater()
+        # 只处理延迟删除事件，不触发主窗口的定时器（如管理员权限提示框）
+        QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+        config_manager = ConfigManager(config_path=work_dir)
+        config_manager.configs = configs
+        config_manager._rebuild_index()
+        # 主题文件写入临时目录，不在源码目录中生成 themes 文件夹
+        window = WindowSizer(window_manager=window_manager, config_manager=config_manager,
+                             themes_folder=os.path.join(work_dir, "themes"))
+        window.window_monitor.stop()
+        windows.append(window)
+        return window
+
+    return factory
+
+
+def get_git_revision():
+    """获取当前代码版本，失败返回None"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare_results(old_results, new_results, threshold=REGRESSION_THRESHOLD):
+    """比较两次测量结果，打印耗时变化并返回回退的阶段列表"""
+    def key(result):
+        return (result["phase"], result["windows"], result["configs"])
+
+    old_by_key = {key(result): result for result in old_results["results"]}
+    regressions = []
+    print(f"\n{'阶段':<34}{'窗口':>8}{'配置':>8}{'旧耗时(ms)':>14}{'新耗时(ms)':>14}{'变化':>10}")
+    for result in new_results["results"]:
+        old = old_by_key.get(key(result))
+        if old is None or not old["wall_time"]:
+            continue
+        ratio = result["wall_time"] / old["wall_time"] - 1
+        flag = " ↑" if ratio > threshold else ""
+        print(f"{result['phase']:<34}{result['windows']:>8}{result['configs']:>8}"
+              f"{old['wall_time'] * 1000:>14.2f}{result['wall_time'] * 1000:>14.2f}{ratio:>+9.0%}{flag}")
+        if ratio > threshold:
+            regressions.append(key(result))
+    return regressions
+
+
+def parse_counts(text):
+    """解析逗号分隔的数量列表"""
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="WindowSizer 性能基准测试")
+    parser.add_argument("--windows", type=parse_counts, default=DEFAULT_WINDOW_COUNTS,
+                        help="窗口数量列表，逗号分隔（默认 100,1000,10000）")
+    parser.add_argument("--configs", type=parse_counts, default=DEFAULT_CONFIG_COUNTS,
+                        help="配置数量列表，逗号分隔（默认 10,1000,50000）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段的重复次数（取中位数）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每次模拟系统调用的延迟（秒）")
+    parser.add_argument("--hung-ratio", type=float, default=0.0, help="无响应窗口的比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--no-alloc", action="store_true", help="不统计内存分配（更快）")
+    parser.add_argument("--no-ui", action="store_true",
+                        help="跳过需要创建主窗口的阶段（_apply_all_configs、load_config_list）")
+    parser.add_argument("--max-ui-configs", type=int, default=DEFAULT_MAX_UI_CONFIGS,
+                        help=f"需要创建主窗口的阶段的最大配置数量（默认 {DEFAULT_MAX_UI_CONFIGS}）")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"结果输出文件（默认 {DEFAULT_OUTPUT}）")
+    parser.add_argument("--compare", help="与之前的结果文件比较")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory(prefix="windowsizer_bench_") as work_dir:
+        # 设置写入临时目录，不影响用户的实际设置
+        QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, work_dir)
+        QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, work_dir)
+
+        app_factory = None if args.no_ui else make_app_factory(work_dir)
+
+        results = []
+        for window_count in args.windows:
+            print(f"窗口枚举: {window_count} 个窗口")
+            results.extend(bench_enumeration(window_count, args))
+            for config_count in args.configs:
+                print(f"匹配与应用: {window_count} 个窗口, {config_count} 个配置")
+                results.extend(bench_apply(window_count, config_count, app_factory, args))
+        for config_count in args.configs:
+            print(f"配置保存: {config_count} 个配置")
+            results.extend(bench_save(config_count, work_dir, args))
+
+    output = {
+        "meta": {
+            "revision": get_git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "hung_ratio": args.hung_ratio,
+            "seed": args.seed,
+            "max_ui_configs": None if args.no_ui else args.max_ui_configs,
+        },
+        "results": results,
+    }
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'阶段':<34}{'窗口':>8}{'配置':>8}{'耗时(ms)':>12}{'调用次数':>10}{'峰值内存(KB)':>14}")
+    for result in results:
+        peak = result.get("alloc_peak_bytes")
+        peak_text = f"{peak / 1024:.0f}" if peak is not None else "-"
+        print(f"{result['phase']:<34}{result['windows']:>8}{result['configs']:>8}"
+              f"{result['wall_time'] * 1000:>12.2f}{result['total_calls']:>10}{peak_text:>14}")
+    print(f"\n结果已保存到 {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old_results = json.load(f)
+        regressions = compare_results(old_results, output)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 个阶段性能回退（耗时增长超过 {REGRESSION_THRESHOLD:.0%}）")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import threading
+
+from config_storage import config_key
+
+
+# 每个配置最多保留的历史版本数
+DEFAULT_HISTORY_DEPTH = 20
+
+# 历史文件中的记录行数超过保留记录数的这么多倍（且不少于下面的行数）时重写文件
+HISTORY_COMPACT_RATIO = 2
+HISTORY_COMPACT_MIN_LINES = 1000
+
+# 只有这些字段变化时不记录历史
+HISTORY_IGNORED_FIELDS = ("updated_at",)
+
+
+def make_delta(old_config, new_config):
+    """计算从新配置还原到旧配置所需的字段级差异
+
+    Returns:
+        (undo, unset)：undo 为需要恢复的旧字段值，unset 为旧配置中不存在、需要移除的字段；
+        除忽略字段外没有差异时返回None
+    """
+    undo = {key: value for key, value in old_config.items()
+            if key not in new_config or new_config[key] != value}
+    unset = [key for key in new_config if key not in old_config]
+    if not any(key not in HISTORY_IGNORED_FIELDS for key in list(undo) + unset):
+        return None
+    return undo, unset
+
+
+class ConfigHistory:
+    """配置历史：按 (标题, 进程名) 保存每个配置的字段级反向差异
+
+    当前版本就是配置本身，每条历史记录只保存一次修改中变化字段的旧值，
+    从当前版本依次应用反向差异即可还原任意更早的版本。每个配置最多保留
+    depth 条记录。记录追加到配置文件旁的 window_configs.history（每行一条
+    JSON），首次访问时才加载，记录过多时重写文件只保留有效记录。
+    """
+
+    def __init__(self, config_file, depth=DEFAULT_HISTORY_DEPTH):
+        self.history_file = os.path.splitext(config_file)[0] + ".history"
+        self.depth = depth
+        self._entries = None  # (标题, 进程名) -> [{"time", "undo", "unset"}, ...]（从旧到新）
+        self._file = None  # 追加模式的历史文件对象
+        self._line_count = 0
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        """首次访问时读取历史文件（调用方已持有锁）"""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        self._line_count = 0
+        if not os.path.exists(self.history_file):
+            return
+        with open(self.history_file, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except (ValueError, UnicodeDecodeError):
+                    break  # 末尾不完整的一行（写入时崩溃）
+                self._line_count += 1
+                self._apply(record)
+
+    def _apply(self, record):
+        """把一条记录应用到内存中的历史"""
+        key = tuple(record["key"])
+        if "rename_from" in record:
+            entries = self._entries.pop(tuple(record["rename_from"]), None)
+            if entries:
+                self._entries[key] = entries
+        elif record.get("forget"):
+            self._entries.pop(key, None)
+        else:
+            entries = self._entries.setdefault(key, [])
+            entries.append({"time": record["time"], "undo": record["undo"], "unset": record["unset"]})
+            if len(entries) > self.depth:
+                del entries[:len(entries) - self.depth]
+
+    def _write(self, records):
+        """应用并追加记录，必要时重写历史文件（调用方已持有锁）"""
+        for record in records:
+            self._apply(record)
+        if self._file is None:
+            self._file = open(self.history_file, "ab")
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n"
+                                 for record in records).encode("utf-8"))
+        self._file.flush()
+        self._line_count += len(records)
+
+        retained = sum(len(entries) for entries in self._entries.values())
+        if self._line_count > max(HISTORY_COMPACT_MIN_LINES, retained * HISTORY_COMPACT_RATIO):
+            self._compact()
+
+    def _compact(self):
+        """只保留有效记录重写历史文件（调用方已持有锁）"""
+        self._close_file()
+        temp_path = f"{self.history_file}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for key, entries in self._entries.items():
+                for entry in entries:
+                    f.write(json.dumps(dict(entry, key=list(key)), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.history_file)
+        self._line_count = sum(len(entries) for entries in self._entries.values())
+
+    def record(self, old_config, new_config, timestamp=None):
+        """记录一次修改（old_config 和 new_config 必须是不同的字典对象）
+
+        键发生变化（如修改了标题）时历史随配置一起转移到新键下。
+
+        Returns:
+            是否记录了新的历史版本
+        """
+        if old_config is new_config:
+            return False
+        delta = make_delta(old_config, new_config)
+        old_key = config_key(old_config)
+        new_key = config_key(new_config)
+        records = []
+        if old_key != new_key:
+            records.append({"key": new_key, "rename_from": old_key})
+        if delta is not None:
+            undo, unset = delta
+            records.append({"key": new_key, "time": time.time() if timestamp is None else timestamp,
+                            "undo": undo, "unset": unset})
+        if not records:
+            return False
+        with self._lock:
+            self._ensure_loaded()
+            self._write(records)
+        return delta is not None
+
+    def forget(self, config):
+        """删除配置的全部历史（配置被删除时调用）"""
+        with self._lock:
+            self._ensure_loaded()
+            if tuple(config_key(config)) in self._entries:
+                self._write([{"key": config_key(config), "forget": True}])
+
+    def count(self, config):
+        """配置的历史版本数量"""
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries.get(tuple(config_key(config)), ()))
+
+    def versions(self, config, limit=None):
+        """还原配置的历史版本（最新的在前）
+
+        Args:
+            config: 当前配置
+            limit: 最多还原的版本数（可选）
+
+        Returns:
+            [{"version": 1, "time": 被替换的时间, "config": 当时的配置}, ...]，
+            version 为 n 表示当前版本之前的第 n 个版本
+        """
+        with self._lock:
+            self._ensure_loaded()
+            entries = list(self._entries.get(tuple(config_key(config)), ()))
+        if limit is not None:
+            entries = entries[len(entries) - min(limit, len(entries)):]
+
+        versions = []
+        current = config
+        for entry in reversed(entries):
+            current = dict(current)
+            for key in entry["unset"]:
+                current.pop(key, None)
+            current.update(entry["undo"])
+            versions.append({"version": len(versions) + 1, "time": entry["time"], "config": current})
+        return versions
+
+    def version(self, config, version):
+        """还原当前版本之前的第 version 个版本，不存在时返回None"""
+        versions = self.versions(config, limit=version)
+        return versions[version - 1]["config"] if 0 < version <= len(versions) else None
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """关闭历史文件"""
+        with self._lock:
+            self._close_file()
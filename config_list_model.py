@@ -0,0 +1,229 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyleOptionViewItem, QStyle, QPushButton
+
+
+# 行高与重命名按钮尺寸（与原来每行控件的布局一致）
+CONFIG_ROW_HEIGHT = 28
+RENAME_BUTTON_SIZE = QSize(55, 24)
+RENAME_BUTTON_MARGIN = 2
+
+
+class ConfigListModel(QAbstractListModel):
+    """配置列表模型
+
+    只保存配置对象的引用，视图绘制可见行时才读取名称、激活状态和图标，
+    不再为每一行创建控件。图标由 icon_provider(config) 在首次绘制时获取并缓存。
+    """
+
+    enabled_toggled = pyqtSignal(str, int)  # 配置ID, Qt.CheckState
+
+    def __init__(self, icon_provider=None, parent=None):
+        super().__init__(parent)
+        self.icon_provider = icon_provider
+        self._configs = []
+        self._rows = {}  # 配置ID -> 行号，与配置列表同步更新
+        self._icons = {}  # id(配置) -> (配置, QIcon)，保存配置引用避免id被复用
+
+    def set_configs(self, configs):
+        """整体替换配置列表"""
+        self.beginResetModel()
+        self._configs = list(configs)
+        self._rows = {}
+        self._update_rows_from(0)
+        self._icons.clear()
+        self.endResetModel()
+
+    def _update_rows_from(self, start):
+        """插入或删除行后更新 start 及之后各行的行号"""
+        rows = self._rows
+        for row in range(start, len(self._configs)):
+            rows[self._configs[row].get("id")] = row
+
+    def config(self, row):
+        """获取指定行的配置，行号无效时返回None"""
+        if 0 <= row < len(self._configs):
+            return self._configs[row]
+        return None
+
+    def row_of(self, config_id):
+        """配置ID所在的行号，不在列表中时返回-1"""
+        return self._rows.get(config_id, -1)
+
+    def update_rows(self, configs_by_row):
+        """替换若干行的配置并刷新这些行
+
+        Args:
+            configs_by_row: {行号: 新配置}
+        """
+        for row, config in configs_by_row.items():
+            if 0 <= row < len(self._configs):
+                old_config = self._configs[row]
+                self._icons.pop(id(old_config), None)
+                if self._rows.get(old_config.get("id")) == row:
+                    del self._rows[old_config.get("id")]
+                self._configs[row] = config
+                self._rows[config.get("id")] = row
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def apply_changes(self, changes):
+        """按顺序应用 ConfigManager 的变化通知，只插入、删除或刷新受影响的行
+
+        相邻位置的连续插入或删除合并为一次，视图的选中项和滚动位置保持不变。
+
+        Args:
+            changes: [(类型, 行号, 配置, 旧配置), ...]，类型为 "inserted"/"updated"/"removed"
+        """
+        i = 0
+        while i < len(changes):
+            kind, row, config, _ = changes[i]
+            # 找出同类型且行号连续的一段
+            j = i + 1
+            while j < len(changes) and changes[j][0] == kind and kind != "updated":
+                expected = row + (j - i) if kind == "inserted" else row - (j - i)
+                if changes[j][1] != expected:
+                    break
+                j += 1
+
+            if kind == "inserted":
+                self.beginInsertRows(QModelIndex(), row, row + j - i - 1)
+                self._configs[row:row] = [change[2] for change in changes[i:j]]
+                self._update_rows_from(row)
+                self.endInsertRows()
+            elif kind == "removed":
+                first = row - (j - i - 1)
+                self.beginRemoveRows(QModelIndex(), first, row)
+                for removed in self._configs[first:row + 1]:
+                    self._icons.pop(id(removed), None)
+                    self._rows.pop(removed.get("id"), None)
+                del self._configs[first:row + 1]
+                self._update_rows_from(first)
+                self.endRemoveRows()
+            elif kind == "updated":
+                self.update_rows({row: config})
+            i = j
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._configs)
+
+    def data(self, index, role=Qt.DisplayRole):
+        config = self.config(index.row()) if index.isValid() else None
+        if config is None:
+            return None
+        if role == Qt.DisplayRole:
+            # 优先使用自定义名称
+            return config.get("custom_name", f"{config['title']} - {config['process']}")
+        if role == Qt.ToolTipRole:
+            return f"{config['title']} - {config['process']}"
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if config.get("enabled", True) else Qt.Unchecked
+        if role == Qt.DecorationRole:
+            return self._icon(config)
+        if role == Qt.UserRole:
+            return config.get("id")
+        return None
+
+    def _icon(self, config):
+        """获取并缓存配置的图标"""
+        cached = self._icons.get(id(config))
+        if cached is not None and cached[0] is config:
+            return cached[1]
+        icon = self.icon_provider(config) if self.icon_provider else None
+        self._icons[id(config)] = (config, icon)
+        return icon
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """勾选框被点击：只发出信号，由主窗口保存配置后再刷新该行"""
+        if role == Qt.CheckStateRole and index.isValid():
+            self.enabled_toggled.emit(self._configs[index.row()].get("id"), int(value))
+            return True
+        return False
+
+
+class ConfigItemDelegate(QStyledItemDelegate):
+    """配置列表项绘制：勾选框、图标和名称由基类绘制，右侧绘制重命名按钮
+
+    按钮使用一个隐藏的 QPushButton 作为样式来源，与主题样式表保持一致。
+    """
+
+    rename_requested = pyqtSignal(str)  # 配置ID
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self._button = QPushButton("重命名", view)
+        self._button.setStyleSheet("QPushButton { font-size: 9pt; padding: 2px 4px; }")
+        self._button.hide()
+        self._hover_row = -1
+        self._pressed_row = -1
+
+    def button_rect(self, option_rect):
+        """行内重命名按钮的位置"""
+        return QRect(option_rect.right() - RENAME_BUTTON_MARGIN - RENAME_BUTTON_SIZE.width() + 1,
+                     option_rect.top() + (option_rect.height() - RENAME_BUTTON_SIZE.height()) // 2,
+                     RENAME_BUTTON_SIZE.width(), RENAME_BUTTON_SIZE.height())
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        return QSize(size.width() + RENAME_BUTTON_SIZE.width() + RENAME_BUTTON_MARGIN * 2,
+                     max(size.height(), CONFIG_ROW_HEIGHT))
+
+    def paint(self, painter, option, index):
+        style = self.view.style()
+
+        # 整行背景（选中、悬停），按钮下方也要覆盖
+        background = QStyleOptionViewItem(option)
+        self.initStyleOption(background, index)
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, background, painter, self.view)
+
+        # 勾选框、图标和名称，给按钮留出位置
+        content = QStyleOptionViewItem(option)
+        content.rect = option.rect.adjusted(0, 0, -(RENAME_BUTTON_SIZE.width() + RENAME_BUTTON_MARGIN * 2), 0)
+        super().paint(painter, content, index)
+
+        # 重命名按钮
+        button = QStyleOptionButton()
+        button.initFrom(self._button)
+        button.rect = self.button_rect(option.rect)
+        button.text = self._button.text()
+        button.state = QStyle.State_Enabled
+        if index.row() == self._hover_row:
+            button.state |= QStyle.State_MouseOver
+        if index.row() == self._pressed_row:
+            button.state |= QStyle.State_Sunken
+        painter.save()
+        painter.setFont(self._button.font())
+        self._button.style().drawControl(QStyle.CE_PushButton, button, painter, self._button)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """处理按钮的悬停和点击，其余事件（如勾选框）交给基类"""
+        event_type = event.type()
+        if event_type in (QEvent.MouseMove, QEvent.MouseButtonPress, QEvent.MouseButtonRelease,
+                          QEvent.MouseButtonDblClick):
+            on_button = self.button_rect(option.rect).contains(event.pos())
+            hover_row = index.row() if on_button else -1
+            if hover_row != self._hover_row:
+                self._hover_row = hover_row
+                self.view.viewport().update()
+
+            if on_button and event.button() == Qt.LeftButton:
+                if event_type == QEvent.MouseButtonPress:
+                    self._pressed_row = index.row()
+                    self.view.viewport().update(option.rect)
+                elif event_type == QEvent.MouseButtonRelease:
+                    pressed = self._pressed_row == index.row()
+                    self._pressed_row = -1
+                    self.view.viewport().update(option.rect)
+                    if pressed:
+                        self.rename_requested.emit(index.data(Qt.UserRole))
+                return True
+            if event_type == QEvent.MouseButtonRelease and self._pressed_row != -1:
+                self._pressed_row = -1
+                self.view.viewport().update()
+        return super().editorEvent(event, model, option, index)
@@ -5,6 +5,14 @@ import re
 from PyQt5.QtWidgets import QFileDialog
 from PyQt5.QtCore import QSettings
 
+from config_storage import (create_storage, new_config_id, put_record, delete_record, apply_records,
+                            write_json_atomic, iter_json_array, load_json_array, NotJsonArrayError,
+                            DebouncedSaver)
+from config_history import ConfigHistory, DEFAULT_HISTORY_DEPTH
+from config_search import ConfigSearchIndex, SearchIndexBuilder
+from icon_store import IconStore
+from backup_store import BackupStore, DEFAULT_MAX_BACKUPS, DEFAULT_MAX_BACKUP_AGE_DAYS
+
 
 class ConfigManager:
     """配置管理类，负责所有配置相关的操作"""
@@ -31,11 +39,31 @@ class ConfigManager:
         # 如果结果为空，返回默认名称
         return sanitized if sanitized else 'unnamed'
     
-    def __init__(self):
+    def __init__(self, config_path=None, storage_mode=None):
+        """
+        Args:
+            config_path: 配置目录（可选，默认使用设置中的配置路径）
+            storage_mode: 存储模式，"json"（每次重写完整文件，默认）、"journal"（变更追加到日志）
+                          或 "sqlite"（按行更新的数据库，带索引查询），未指定时使用设置项 config_storage
+        """
         self.configs = []
-        # 从设置中加载配置文件路径
+        self._key_index = {}  # (title, process) -> 配置
+        self._id_index = {}  # 配置ID -> 配置
+        self._positions = None  # 配置ID -> 在列表中的位置，删除配置后失效，需要时重建
+        self._search_index = None  # 搜索索引（或后台建立中的 SearchIndexBuilder），之后增量维护
+        self.last_import_stats = None  # 最近一次导入的统计
+        # 从设置中加载配置文件路径和存储模式（显式传入时优先）
         settings = QSettings("WindowSizer", "Settings")
-        self.config_path = settings.value("config_path", ".")
+        if config_path is None:
+            config_path = settings.value("config_path", ".")
+        if storage_mode is None:
+            storage_mode = settings.value("config_storage", "json")
+        self.config_path = config_path
+        self.storage_mode = storage_mode
+        self.storage = None
+        self.saver = None
+        self.history = None
+        self._change_listeners = []
         # 确保配置目录存在
         if not os.path.exists(self.config_path):
             os.makedirs(self.config_path)
@@ -44,8 +72,26 @@ class ConfigManager:
         self.icons_folder = os.path.join(self.config_path, "config_icons")
         if not os.path.exists(self.icons_folder):
             os.makedirs(self.icons_folder)
+        self._init_stores()
         self.load_configs()
     
+    def _init_stores(self):
+        """创建配置目录下的图标仓库和备份仓库（备份保留数量和天数可在设置中调整）
+        
+        旧版本在配置文件旁生成的完整备份在这里一次性导入备份仓库，导入后原文件被删除。
+        """
+        self.icon_store = IconStore(self.icons_folder)
+        settings = QSettings("WindowSizer", "Settings")
+        self.backup_store = BackupStore(
+            os.path.join(self.config_path, "backups"),
+            max_count=settings.value("backup_max_count", DEFAULT_MAX_BACKUPS, type=int),
+            max_age_days=settings.value("backup_max_age_days", DEFAULT_MAX_BACKUP_AGE_DAYS, type=int)
+        )
+        try:
+            self.backup_store.migrate_legacy_backups(self.config_file)
+        except Exception:
+            pass
+    
     def set_config_path(self, path):
         """设置配置文件路径"""
         if not path or not os.path.exists(path):
@@ -59,6 +105,7 @@ class ConfigManager:
         # 保存路径到设置
         settings = QSettings("WindowSizer", "Settings")
         settings.setValue("config_path", path)
+        self._init_stores()
         # 重新加载配置
         self.load_configs()
         return True
@@ -68,84 +115,354 @@ class ConfigManager:
         return self.config_path
     
     def load_configs(self):
-        """加载配置"""
+        """加载配置（日志模式下加载快照并重放日志）"""
+        self.close()  # 先写入旧路径下尚未保存的修改
+        self.storage = create_storage(self.storage_mode, self.config_file)
+        self.saver = DebouncedSaver(self.storage, lambda: self.configs)
+        settings = QSettings("WindowSizer", "Settings")
+        self.history = ConfigHistory(
+            self.config_file, depth=settings.value("config_history_depth", DEFAULT_HISTORY_DEPTH, type=int))
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    self.configs = json.load(f)
-            else:
-                self.configs = []
+            self.configs = self.storage.load()
         except Exception:
             self.configs = []
+        if self._rebuild_index():
+            self.save_configs()  # 保存新分配的配置ID
+        self._notify([("reset", None, None, None)])
+    
+    def _rebuild_index(self):
+        """重建 (标题, 进程名) 索引（同键的配置只索引第一个）和ID索引
+        
+        Returns:
+            新分配ID的配置数（旧版本的配置没有ID，或ID重复）
+        """
+        self._key_index = {}
+        self._id_index = {}
+        self._positions = None
+        self._search_index = None
+        assigned = 0
+        for config in self.configs:
+            self._key_index.setdefault((config.get("title"), config.get("process")), config)
+            if self._assign_id(config):
+                assigned += 1
+            self._id_index[config["id"]] = config
+        return assigned
+    
+    def _assign_id(self, config):
+        """配置没有ID或ID已被其他配置使用时分配新ID，返回是否分配了新ID"""
+        config_id = config.get("id")
+        if config_id and self._id_index.get(config_id, config) is config:
+            return False
+        config["id"] = new_config_id()
+        return True
+    
+    def _index_add(self, config, position=None):
+        """把配置加入ID索引和搜索索引（position 为配置在列表中的位置，追加到末尾时可省略）"""
+        self._id_index[config["id"]] = config
+        if self._positions is not None:
+            if position is None:
+                position = len(self.configs) - 1
+            self._positions[config["id"]] = position
+        if self._search_index is not None:
+            self._search_index.add(config)
+    
+    def _index_remove(self, config):
+        """从索引中移除配置（仅当索引指向的正是该配置）"""
+        key = (config.get("title"), config.get("process"))
+        if self._key_index.get(key) is config:
+            del self._key_index[key]
+        if self._id_index.get(config.get("id")) is config:
+            del self._id_index[config["id"]]
+    
+    def _search_remove(self, config):
+        """从搜索索引中移除被删除的配置（替换配置时搜索索引按ID原位更新，不需要移除）"""
+        if self._search_index is not None:
+            self._search_index.remove(config)
+    
+    def get_config(self, config_id):
+        """根据配置ID获取配置，不存在时返回None"""
+        return self._id_index.get(config_id)
+    
+    def index_of(self, config_id):
+        """配置ID对应的当前位置，不存在时返回-1"""
+        if config_id not in self._id_index:
+            return -1
+        if self._positions is None:
+            self._positions = {config["id"]: i for i, config in enumerate(self.configs)}
+        return self._positions[config_id]
+    
+    def add_change_listener(self, listener):
+        """注册配置变化监听器
+        
+        每次修改配置后调用 listener(changes)，changes 为按顺序应用的变化列表，
+        每项为 (类型, 索引, 配置, 旧配置)：
+            ("inserted", 索引, 新配置, None)：在该位置插入配置
+            ("updated", 索引, 新配置, 旧配置)：替换该位置的配置（键可能改变）
+            ("removed", 索引, 被删除的配置, None)：删除该位置的配置
+            ("reset", None, None, None)：配置整体重新加载，需要全部重建
+        索引为应用该项变化时的位置。
+        """
+        self._change_listeners.append(listener)
+    
+    def remove_change_listener(self, listener):
+        """注销配置变化监听器"""
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def _notify(self, changes):
+        """通知所有监听器"""
+        if not changes:
+            return
+        for listener in list(self._change_listeners):
+            listener(changes)
     
     def save_configs(self):
-        """保存配置"""
+        """立即完整保存配置（原子替换；日志模式下同时清空日志）"""
+        return self.saver.save_now()
+    
+    def _persist_change(self, records):
+        """持久化一组变更记录
+        
+        日志模式下直接追加记录；整体JSON模式下合并短时间内的多次修改，
+        静默一段时间后在后台完整写入一次。
+        """
+        if self.storage_mode == "json":
+            self.saver.schedule(records)
+            return True
         try:
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(self.configs, f, ensure_ascii=False, indent=2)
+            self.storage.append(records, self.configs)
             return True
         except Exception:
             return False
     
-    def add_config(self, config, icon=None, class_name=None):
+    def get_watch_path(self):
+        """需要监视外部修改的配置文件
+        
+        SQLite模式下配置保存在数据库中，JSON文件只在首次迁移时读取，
+        监视它会把过期或无关的内容当作修改，因此返回None（不监视）。
+        """
+        if self.storage_mode == "sqlite":
+            return None
+        return self.config_file
+    
+    def flush(self):
+        """立即写入所有尚未保存的修改（退出程序、导出配置前调用）"""
+        if self.saver is None:
+            return True
+        return self.saver.flush()
+    
+    def close(self):
+        """写入剩余修改并关闭存储（等待后台写入和合并完成）"""
+        if self.saver is not None:
+            self.saver.close()
+            self.saver = None
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+    
+    def reload_configs(self):
+        """重新读取被其他程序修改的配置文件，按 (标题, 进程名) 比较后只把差异应用到内存
+        
+        同键的配置按出现顺序一一对应：内容不同的原位替换，多出的追加到末尾，
+        文件中已没有的移除。日志模式下重放日志，本地尚未合并的修改优先；整体JSON
+        模式下把尚未写入的本地修改重放到文件内容上，本地修改同样优先，之后的保存
+        写入合并结果；SQLite模式下从数据库重新读取（JSON文件不是数据来源，
+        见 get_watch_path）。
+        
+        Returns:
+            差异字典，没有变化时各列表为空，读取失败返回None：
+            {"removed": 被移除配置的原索引（升序）, "removed_configs": 被移除的配置,
+             "changed": 被替换配置的新索引, "added": 新增配置的新索引}
+        """
+        try:
+            if hasattr(self.storage, "wait_for_compaction"):
+                self.storage.wait_for_compaction()
+            disk_configs = self.storage.load()
+            if self.storage_mode == "json":
+                apply_records(disk_configs, self.saver.unsaved_records())
+        except Exception:
+            return None
+        
+        # 同键的配置按出现顺序配对
+        old_positions = {}
+        for i, config in enumerate(self.configs):
+            old_positions.setdefault((config.get("title"), config.get("process")), []).append(i)
+        duplicated_keys = {key for key, positions in old_positions.items() if len(positions) > 1}
+        
+        changed = {}  # 原索引 -> 新配置
+        added_configs = []
+        for config in disk_configs:
+            if not isinstance(config, dict):
+                continue
+            positions = old_positions.get((config.get("title"), config.get("process")))
+            if positions:
+                i = positions.pop(0)
+                # 外部程序写入的配置可能没有ID，沿用原配置的ID
+                config.setdefault("id", self.configs[i].get("id"))
+                if self.configs[i] != config:
+                    changed[i] = config
+            else:
+                added_configs.append(config)
+        removed = sorted(i for positions in old_positions.values() for i in positions)
+        
+        delta = {"removed": removed, "removed_configs": [self.configs[i] for i in removed],
+                 "changed": [], "added": []}
+        if not (removed or changed or added_configs):
+            return delta
+        
+        for i in removed:
+            self._index_remove(self.configs[i])
+            self._search_remove(self.configs[i])
+        old_configs = {}  # 替换后配置的索引 -> 旧配置
+        for i, config in changed.items():
+            old_configs[i] = self.configs[i]
+            self._index_remove(self.configs[i])
+            self.history.record(self.configs[i], config)
+            self.configs[i] = config
+        # 先移除再加入，ID沿用时不会被判为重复
+        self._positions = None
+        for i, config in changed.items():
+            self._assign_id(config)
+            if config["id"] != old_configs[i].get("id"):
+                self._search_remove(old_configs[i])
+            self._index_add(config)
+        for config in added_configs:
+            self._assign_id(config)
+            self._index_add(config)
+        
+        if removed:
+            removed_set = set(removed)
+            new_positions = {}
+            kept = []
+            for i, config in enumerate(self.configs):
+                if i not in removed_set:
+                    new_positions[i] = len(kept)
+                    kept.append(config)
+            self.configs = kept
+            delta["changed"] = sorted(new_positions[i] for i in changed)
+            old_configs = {new_positions[i]: config for i, config in old_configs.items()}
+        else:
+            delta["changed"] = sorted(changed)
+        
+        delta["added"] = list(range(len(self.configs), len(self.configs) + len(added_configs)))
+        self.configs.extend(added_configs)
+        
+        for i in delta["changed"] + delta["added"]:
+            config = self.configs[i]
+            self._key_index.setdefault((config.get("title"), config.get("process")), config)
+        if any((config.get("title"), config.get("process")) in duplicated_keys
+               for config in delta["removed_configs"]):
+            # 移除的配置可能有同键的重复项仍然保留，此时整体重建索引
+            self._rebuild_index()
+        
+        # 从后往前删除时前面的索引不变；替换和追加使用删除后的索引
+        changes = [("removed", i, config, None)
+                   for i, config in reversed(list(zip(removed, delta["removed_configs"])))]
+        changes += [("updated", i, self.configs[i], old_configs[i]) for i in delta["changed"]]
+        changes += [("inserted", i, self.configs[i], None) for i in delta["added"]]
+        self._notify(changes)
+        return delta
+    
+    def add_config(self, config, icon=None):
         """添加配置
         
         Args:
             config: 配置字典，必须包含 title, process, x, y, width, height
             icon: QIcon对象（可选）
-            class_name: 窗口类名（可选，用于区分同一进程的不同窗口）
             
         Returns:
             (success, message) 元组
         """
         # 检查是否已存在相同的配置
-        for existing_config in self.configs:
-            if (existing_config.get("title") == config.get("title") and 
-                existing_config.get("process") == config.get("process")):
-                return False, "已存在相同窗口的配置"
+        if (config.get("title"), config.get("process")) in self._key_index:
+            return False, "已存在相同窗口的配置"
         
         # 添加时间戳
         config["created_at"] = time.time()
         config["updated_at"] = time.time()
         
-        # 保存图标（使用配置名称命名）
+        # 保存图标（按内容命名，相同图标共用一个文件）
         if icon and not icon.isNull():
-            # 获取配置名称（优先使用自定义名称，否则使用默认名称）
-            config_name = config.get("custom_name", f"{config['title']} - {config['process']}")
-            icon_filename = self.save_icon(
-                config_name, 
-                icon, 
-                class_name=class_name,
-                window_title=config.get("title")
-            )
+            icon_filename = self.save_icon(icon)
             if icon_filename:
                 config["icon_file"] = icon_filename
         
         # 默认激活状态
         config["enabled"] = True
         
+        self._assign_id(config)
         self.configs.append(config)
-        if self.save_configs():
+        self._key_index[(config.get("title"), config.get("process"))] = config
+        self._index_add(config)
+        if self._persist_change([put_record(config)]):
+            self._notify([("inserted", len(self.configs) - 1, config, None)])
             return True, "配置添加成功"
         else:
             self.configs.pop()  # 回滚
+            self._index_remove(config)
+            self._search_remove(config)
             return False, "保存配置失败"
     
-    def update_config(self, index, config):
-        """更新配置"""
-        if 0 <= index < len(self.configs):
+    def update_config(self, config_id, config):
+        """更新配置
+        
+        config 应为新的字典（如 dict(旧配置) 修改后传入），原地修改旧配置后
+        再传入时无法得到修改前的字段，不会记录历史版本。新配置沿用原配置的ID。
+        """
+        old_config = self._id_index.get(config_id)
+        if old_config is not None:
+            index = self.index_of(config_id)
             # 更新时间戳
             config["updated_at"] = time.time()
+            config["id"] = config_id
             
-            self.configs[index] = config
-            return self.save_configs()
+            self.history.record(old_config, config)
+            return self._replace_config(index, old_config, config)
         return False
     
-    def delete_config(self, index):
+    def _replace_config(self, index, old_config, config):
+        """用新配置替换指定位置的配置，更新索引、持久化并通知监听器"""
+        self.configs[index] = config
+        self._index_remove(old_config)
+        self._key_index.setdefault((config.get("title"), config.get("process")), config)
+        self._index_add(config, index)
+        success = self._persist_change([put_record(config, old_config)])
+        self._notify([("updated", index, config, old_config)])
+        return success
+    
+    def set_config_icon(self, config_id, icon):
+        """为没有图标文件的配置保存图标（如从正在运行的窗口获取的图标）
+        
+        只记录图标文件名，不更新修改时间，也不记入历史版本。
+        
+        Returns:
+            是否保存成功
+        """
+        old_config = self._id_index.get(config_id)
+        if old_config is None or icon is None or icon.isNull():
+            return False
+        icon_filename = self.save_icon(icon)
+        if not icon_filename:
+            return False
+        config = dict(old_config)
+        config["icon_file"] = icon_filename
+        return self._replace_config(self.index_of(config_id), old_config, config)
+    
+    def delete_config(self, config_id):
         """删除配置"""
-        if 0 <= index < len(self.configs):
-            self.configs.pop(index)
-            return self.save_configs()
+        if config_id in self._id_index:
+            index = self.index_of(config_id)
+            config = self.configs.pop(index)
+            self._index_remove(config)
+            self._search_remove(config)
+            self._positions = None  # 后面的配置位置都变了
+            self.history.forget(config)
+            success = self._persist_change([delete_record(config)])
+            self._notify([("removed", index, config, None)])
+            return success
         return False
     
     def get_config_by_index(self, index):
@@ -155,61 +472,144 @@ class ConfigManager:
         return None
     
     def get_config_by_window_info(self, title, process):
-        """根据窗口信息获取配置"""
-        for config in self.configs:
-            if config.get("title") == title and config.get("process") == process:
-                return config
-        return None
+        """根据窗口信息获取配置（哈希索引查找）"""
+        return self._key_index.get((title, process))
+    
+    def _configs_for_keys(self, keys):
+        """把存储查询得到的配置键映射为内存中的配置对象"""
+        return [self._key_index[key] for key in map(tuple, keys) if key in self._key_index]
+    
+    def get_configs_by_process(self, process):
+        """获取指定进程的所有配置（SQLite模式下使用进程名索引）"""
+        if hasattr(self.storage, "find_keys"):
+            return self._configs_for_keys(self.storage.find_keys(process=process))
+        return [config for config in self.configs if config.get("process") == process]
+    
+    def get_configs_by_class(self, class_name):
+        """获取指定窗口类名的所有配置（SQLite模式下使用类名索引）"""
+        if hasattr(self.storage, "find_keys"):
+            return self._configs_for_keys(self.storage.find_keys(class_name=class_name))
+        return [config for config in self.configs if config.get("class_name") == class_name]
     
     def get_all_configs(self):
         """获取所有配置"""
         return self.configs.copy()
     
-    def import_configs(self, file_path=None):
-        """导入配置"""
+    # 比较导入配置与现有配置时忽略的字段（时间戳和本地图标文件因机器而异）
+    IMPORT_IGNORED_FIELDS = ("id", "created_at", "updated_at", "icon_file")
+    
+    @classmethod
+    def _config_signature(cls, config):
+        """配置内容的签名，用于判断同键的两个配置是否相同"""
+        return tuple(sorted((key, repr(value)) for key, value in config.items()
+                            if key not in cls.IMPORT_IGNORED_FIELDS))
+    
+    def merge_configs(self, imported_configs):
+        """以 (标题, 进程名) 为键一次遍历合并配置
+        
+        键不存在的配置被添加；键已存在且内容相同的跳过；键已存在但内容不同的
+        计为冲突，保留现有配置。导入内容内部重复的键按同样规则处理。
+        新增的配置立即追加到配置列表并加入索引，合并途中两者始终一致。
+        
+        Args:
+            imported_configs: 待导入的配置列表
+            
+        Returns:
+            (新增配置列表, 统计字典 {"added", "skipped", "conflicting", "invalid"})
+        """
+        stats = {"added": 0, "skipped": 0, "conflicting": 0, "invalid": 0}
+        added = []
+        signatures = {}  # 键 -> 签名，现有配置的签名按需计算
+        now = time.time()
+        
+        for imported_config in imported_configs:
+            if not isinstance(imported_config, dict) or not self.validate_config(imported_config)[0]:
+                stats["invalid"] += 1
+                continue
+            
+            key = (imported_config.get("title"), imported_config.get("process"))
+            existing_config = self._key_index.get(key)
+            if existing_config is None:
+                # 重置时间戳
+                imported_config["created_at"] = now
+                imported_config["updated_at"] = now
+                self._assign_id(imported_config)
+                self.configs.append(imported_config)
+                self._index_add(imported_config)
+                self._key_index[key] = imported_config
+                signatures[key] = self._config_signature(imported_config)
+                added.append(imported_config)
+                stats["added"] += 1
+                continue
+            
+            if key not in signatures:
+                signatures[key] = self._config_signature(existing_config)
+            if signatures[key] == self._config_signature(imported_config):
+                stats["skipped"] += 1
+            else:
+                stats["conflicting"] += 1
+        
+        return added, stats
+    
+    @staticmethod
+    def format_import_stats(stats):
+        """把导入统计转换为提示文字"""
+        message = f"新增 {stats['added']} 个配置，跳过 {stats['skipped']} 个重复配置"
+        if stats["conflicting"]:
+            message += f"，{stats['conflicting']} 个与现有配置冲突（已保留现有配置）"
+        if stats["invalid"]:
+            message += f"，{stats['invalid']} 个无效配置被忽略"
+        return message
+    
+    def import_configs(self, file_path=None, progress=None):
+        """导入配置
+        
+        文件按元素流式解析，逐个校验并合并，不会把整个文件读入内存。
+        
+        Args:
+            file_path: 导入文件路径，为空时弹出文件选择对话框
+            progress: 可选回调 progress(已读取字节数, 文件总字节数)
+        """
         if not file_path:
             file_path, _ = QFileDialog.getOpenFileName(
                 None, "导入配置", "", "JSON文件 (*.json)")
             if not file_path:
                 return False, "未选择文件"
         
+        # 备份当前配置
+        backup_configs = self.configs.copy()
+        
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                imported_configs = json.load(f)
-            
-            if not isinstance(imported_configs, list):
-                return False, "配置文件格式不正确"
-            
-            # 备份当前配置
-            backup_configs = self.configs.copy()
-            
             # 合并配置，避免重复
-            for imported_config in imported_configs:
-                # 检查是否已存在相同的配置
-                exists = False
-                for existing_config in self.configs:
-                    if (existing_config.get("title") == imported_config.get("title") and 
-                        existing_config.get("process") == imported_config.get("process")):
-                        exists = True
-                        break
-                
-                if not exists:
-                    # 重置时间戳
-                    imported_config["created_at"] = time.time()
-                    imported_config["updated_at"] = time.time()
-                    self.configs.append(imported_config)
+            added, stats = self.merge_configs(iter_json_array(file_path, progress))
+            self.last_import_stats = stats
             
-            if self.save_configs():
-                return True, f"成功导入 {len(imported_configs)} 个配置"
+            if self._persist_change([put_record(config) for config in added]):
+                # 导入的配置引用的图标文件可能是随配置文件一起复制进来的，重新扫描图标文件夹
+                self.icon_store.refresh()
+                start = len(self.configs) - len(added)
+                self._notify([("inserted", start + i, config, None) for i, config in enumerate(added)])
+                return True, self.format_import_stats(stats)
             else:
                 self.configs = backup_configs  # 回滚
+                self._rebuild_index()
                 return False, "保存配置失败"
+        except NotJsonArrayError:
+            self.configs = backup_configs  # 回滚
+            self._rebuild_index()
+            return False, "配置文件格式不正确"
         except Exception as e:
             self.configs = backup_configs  # 回滚
+            self._rebuild_index()
             return False, f"导入配置失败: {e}"
     
-    def export_configs(self, file_path=None):
-        """导出配置"""
+    def export_configs(self, file_path=None, progress=None):
+        """导出配置
+        
+        Args:
+            file_path: 导出文件路径，为空时弹出保存对话框
+            progress: 可选回调 progress(已写入配置数, 配置总数)
+        """
         if not file_path:
             file_path, _ = QFileDialog.getSaveFileName(
                 None, "导出配置", "window_configs.json", "JSON文件 (*.json)")
@@ -217,8 +617,9 @@ class ConfigManager:
                 return False, "未选择保存位置"
         
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(self.configs, f, ensure_ascii=False, indent=2)
+            # 先写入尚未保存的修改，保证导出内容与配置文件一致
+            self.flush()
+            write_json_atomic(file_path, self.configs, progress=progress)
             return True, f"配置已导出到 {file_path}"
         except Exception as e:
             return False, f"导出配置失败: {e}"
@@ -227,22 +628,44 @@ class ConfigManager:
         """获取配置数量"""
         return len(self.configs)
     
-    def filter_configs(self, keyword):
-        """过滤配置"""
-        if not keyword:
-            return self.configs
+    def prepare_search_index(self):
+        """在后台线程中预先建立搜索索引（配置很多时建立需要一些时间）"""
+        if self._search_index is None:
+            self._search_index = SearchIndexBuilder(self.configs)
+    
+    def _get_search_index(self):
+        """获取搜索索引（尚未建立时立即建立，后台建立中时等待完成）"""
+        if self._search_index is None:
+            self._search_index = ConfigSearchIndex(self.configs)
+        elif isinstance(self._search_index, SearchIndexBuilder):
+            self._search_index = self._search_index.result()
+        return self._search_index
+    
+    def filter_configs(self, keyword, limit=None):
+        """搜索配置
         
-        keyword = keyword.lower()
-        filtered = []
+        在标题、进程名、自定义名称和窗口类名中查找关键字（不区分大小写，
+        多个关键字用空格分隔），完全相同的排在最前，其次是以搜索文本开头的，同一级中保持配置顺序。
         
-        for config in self.configs:
-            title = config.get("title", "").lower()
-            process = config.get("process", "").lower()
-            
-            if keyword in title or keyword in process:
-                filtered.append(config)
+        Args:
+            keyword: 搜索文本，为空时返回全部配置
+            limit: 最多返回的配置数（可选）
+        """
+        if not keyword or not keyword.strip():
+            return self.configs if limit is None else self.configs[:limit]
+        configs, _ = self._get_search_index().search(keyword, limit=limit)
+        return configs
+    
+    def search_configs_page(self, keyword, page, page_size):
+        """搜索并只取到需要的那一页为止（边输入边搜索时使用）
         
-        return filtered
+        Returns:
+            (该页的配置列表, 匹配的配置总数)
+        """
+        if not keyword or not keyword.strip():
+            return self.get_configs_page(self.configs, page, page_size), len(self.configs)
+        configs, total = self._get_search_index().search(keyword, limit=page * page_size)
+        return self.get_configs_page(configs, page, page_size), total
     
     def get_configs_page(self, configs, page, page_size):
         """获取分页配置"""
@@ -276,55 +699,90 @@ class ConfigManager:
         
         return True, "配置有效"
     
-    def get_config_history(self, config_index):
-        """获取配置历史记录（如果有的话）"""
-        # 这里可以实现配置历史记录功能
-        # 暂时返回空列表
-        return []
+    def get_config_history(self, config_id, limit=None):
+        """获取配置的历史版本（最新的在前）
+        
+        Args:
+            config_id: 配置ID
+            limit: 最多返回的版本数（可选）
+            
+        Returns:
+            [{"version": n, "time": 被替换的时间, "config": 当时的配置}, ...]，
+            version 为 n 表示当前版本之前的第 n 个版本
+        """
+        config = self.get_config(config_id)
+        if config is None:
+            return []
+        return self.history.versions(config, limit)
     
-    def backup_configs(self):
-        """备份配置"""
-        backup_file = f"{self.config_file}.backup.{int(time.time())}"
+    def rollback_config(self, config_id, version=1):
+        """把单个配置回滚到历史版本，其他配置不受影响
+        
+        回滚本身也作为一次修改记录到历史中，可以再次回滚撤销。
+        
+        Args:
+            config_id: 配置ID
+            version: 回滚到当前版本之前的第几个版本（默认上一个版本）
+        """
+        config = self.get_config(config_id)
+        if config is None:
+            return False
+        old_config = self.history.version(config, version)
+        if old_config is None:
+            return False
+        return self.update_config(config_id, dict(old_config))
+    
+    def backup_configs(self, progress=None):
+        """备份配置（压缩保存，与最新备份内容相同时不生成新版本）
+        
+        Args:
+            progress: 可选回调 progress(已写入配置数, 配置总数)
+            
+        Returns:
+            备份版本ID，失败返回None
+        """
         try:
-            with open(backup_file, "w", encoding="utf-8") as f:
-                json.dump(self.configs, f, ensure_ascii=False, indent=2)
-            return backup_file
+            entry, _ = self.backup_store.add(self.configs, progress=progress)
+            return entry["id"]
         except Exception:
             return None
     
-    def restore_configs(self, backup_file):
-        """从备份恢复配置"""
+    def list_backups(self):
+        """获取所有备份版本（最新的在前），每项包含 id、created_at、count 等信息"""
+        return self.backup_store.list_backups()
+    
+    def restore_configs(self, backup, progress=None):
+        """从备份恢复配置
+        
+        Args:
+            backup: 备份版本ID，或备份JSON文件的路径
+            progress: 可选回调 progress(已读取字节数, 总字节数)
+        """
         try:
-            with open(backup_file, "r", encoding="utf-8") as f:
-                self.configs = json.load(f)
+            if os.path.isfile(backup):
+                self.configs = load_json_array(backup, progress)
+            else:
+                self.configs = self.backup_store.load(backup, progress)
+            self.icon_store.refresh()  # 恢复的配置可能引用索引建立后才放入的图标文件
+            self._rebuild_index()
+            self._notify([("reset", None, None, None)])
             return self.save_configs()
         except Exception:
             return False
     
-    def save_icon(self, config_name, icon, class_name=None, window_title=None):
+    def save_icon(self, icon):
         """保存程序图标到本地文件夹
         
+        图标文件按内容命名，多个配置使用相同图标时共用一个文件。
+        
         Args:
-            config_name: 配置名称（必选，用于命名图标文件）
-            icon: QIcon对象（必选）
-            class_name: 窗口类名（可选）
-            window_title: 窗口标题（可选）
+            icon: QIcon对象
             
         Returns:
             图标文件名，保存失败返回None
         """
         try:
-            # 使用配置名称作为图标文件名
-            safe_name = self.sanitize_filename(config_name)
-            icon_filename = f"{safe_name}.png"
-            
-            icon_path = os.path.join(self.icons_folder, icon_filename)
-            
-            # 将QIcon转换为QPixmap并保存
-            pixmap = icon.pixmap(32, 32)  # 使用32x32的图标
-            if not pixmap.isNull():
-                pixmap.save(icon_path, "PNG")
-                return icon_filename
+            return self.icon_store.save(icon)
         except Exception:
             pass
         return None
@@ -348,8 +806,6 @@ class ConfigManager:
             4. 进程名.png（通用图标）
         """
         try:
-            from PyQt5.QtGui import QIcon
-            
             # 尝试加载图标的文件名列表（按优先级排序）
             filenames_to_try = []
             
@@ -375,13 +831,10 @@ class ConfigManager:
                 # 优先级4：进程名通用图标
                 filenames_to_try.append(f"{base_name}.png")
             
-            # 依次尝试加载每个文件
-            for filename in filenames_to_try:
-                icon_path = os.path.join(self.icons_folder, filename)
-                if os.path.exists(icon_path):
-                    icon = QIcon(icon_path)
-                    if not icon.isNull():
-                        return icon
+            # 在图标仓库的索引中按优先级查找，解码后的图标会被缓存
+            filename = self.icon_store.resolve(filenames_to_try)
+            if filename:
+                return self.icon_store.get_icon(filename)
         except Exception:
             pass
         return None
\ No newline at end of file
@@ -0,0 +1,220 @@
+import threading
+
+
+# 参与搜索的字段，排名时按此顺序比较：自定义名称、标题、进程名、窗口类名
+SEARCH_FIELDS = ("custom_name", "title", "process", "class_name")
+
+# 索引的 n-gram 长度，短于该长度的关键字改为顺序扫描
+NGRAM_SIZE = 3
+
+# 已删除的位置超过该数量且多于有效配置时压缩索引
+COMPACT_MIN_DEAD = 1024
+
+
+def _ngrams(text):
+    """文本中所有长度为 NGRAM_SIZE 的片段"""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def _field_keys(field_no, field):
+    """字段在倒排表中的键：三元组、("=", 字段序号, 完整值) 和 (字段序号, 1~3个字符的前缀)"""
+    keys = _ngrams(field)
+    keys.add(("=", field_no, field))
+    for length in range(1, NGRAM_SIZE + 1):
+        keys.add((field_no, field[:length]))
+    return frozenset(keys)
+
+
+def _entry_keys(fields, cache=None):
+    """配置在倒排表中的所有键（cache 缓存相同字段值的键，建立索引时许多配置的进程名、类名相同）"""
+    keys = set()
+    for field_no, field in enumerate(fields):
+        if not field:
+            continue
+        if cache is None:
+            keys |= _field_keys(field_no, field)
+            continue
+        field_keys = cache.get((field_no, field))
+        if field_keys is None:
+            field_keys = cache[(field_no, field)] = _field_keys(field_no, field)
+        keys |= field_keys
+    return keys
+
+
+class ConfigSearchIndex:
+    """配置搜索索引：对自定义名称、标题、进程名和窗口类名建立 n-gram 倒排索引
+
+    每个配置占一个位置，位置顺序与配置列表一致（修改在原位置替换，新增追加到
+    末尾，删除只标记为空），倒排表中保存位置并保持升序，因此按倒排表遍历即
+    按配置顺序遍历，取一页结果时可以提前结束。字段只在加入索引时转为小写一次，
+    替换配置时只追加新出现的键，失效的键在搜索时通过核对原文排除。
+
+    排名：某个字段与搜索文本完全相同 > 某个字段以搜索文本开头 > 其他包含
+    所有关键字的配置；同一级中先按字段顺序，再按配置顺序。
+    """
+
+    def __init__(self, configs=()):
+        self._entries = []  # 位置 -> (配置, 小写字段元组)，已删除为None
+        self._texts = []  # 位置 -> 各字段拼接的小写文本，已删除为空字符串（用于快速核对包含关系）
+        self._slots = {}  # 配置ID -> 位置
+        self._postings = {}  # 键 -> [位置, ...]
+        self._unsorted = set()  # 因原位替换而需要重新排序去重的倒排表键
+        self._dead = 0
+        cache = {}
+        for config in configs:
+            self.add(config, cache)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def add(self, config, cache=None):
+        """加入配置；相同ID的配置已在索引中时原位替换，否则追加到末尾"""
+        fields = tuple(str(config.get(name) or "").casefold() for name in SEARCH_FIELDS)
+        text = "\n".join(fields)
+        slot = self._slots.get(config["id"])
+        if slot is None:
+            slot = len(self._entries)
+            self._entries.append((config, fields))
+            self._texts.append(text)
+            self._slots[config["id"]] = slot
+            for key in _entry_keys(fields, cache):
+                postings = self._postings.get(key)
+                if postings is None:
+                    self._postings[key] = [slot]
+                else:
+                    postings.append(slot)
+            return
+
+        old_keys = _entry_keys(self._entries[slot][1])
+        self._entries[slot] = (config, fields)
+        self._texts[slot] = text
+        for key in _entry_keys(fields) - old_keys:
+            postings = self._postings.setdefault(key, [])
+            if postings and postings[-1] >= slot:
+                self._unsorted.add(key)
+            postings.append(slot)
+
+    def remove(self, config):
+        """移除配置（仅当索引中的正是该配置）"""
+        slot = self._slots.get(config.get("id"))
+        if slot is None or self._entries[slot][0] is not config:
+            return
+        del self._slots[config["id"]]
+        self._entries[slot] = None
+        self._texts[slot] = ""
+        self._dead += 1
+        if self._dead > COMPACT_MIN_DEAD and self._dead > len(self._slots):
+            self._compact()
+
+    def _compact(self):
+        """去掉已删除的位置，重新建立索引"""
+        configs = [entry[0] for entry in self._entries if entry is not None]
+        self.__init__(configs)
+
+    def _get_postings(self, key):
+        """获取升序、无重复的倒排表"""
+        postings = self._postings.get(key, [])
+        if key in self._unsorted:
+            postings[:] = sorted(set(postings))
+            self._unsorted.discard(key)
+        return postings
+
+    def search(self, query, limit=None):
+        """搜索配置
+
+        关键字按空白分隔，每个关键字都要出现在某个字段中（不区分大小写）。
+
+        Args:
+            query: 搜索文本
+            limit: 最多返回的配置数（可选，只取排名最前的部分）
+
+        Returns:
+            (按排名排列的配置列表, 匹配的配置总数)
+        """
+        terms = query.casefold().split()
+        if not terms:
+            return [], 0
+        phrase = " ".join(terms)
+        entries = self._entries
+
+        # 候选位置取关键字中最短的三元组倒排表，关键字都太短时扫描全部
+        source = None
+        for term in terms:
+            for gram in _ngrams(term):
+                postings = self._postings.get(gram)
+                if not postings:
+                    return [], 0
+                if source is None or len(postings) < len(self._postings[source]):
+                    source = gram
+        # 逐个关键字核对原文（长的关键字通常更能缩小范围，先核对）
+        texts = self._texts
+        terms.sort(key=len, reverse=True)
+        if source is None:
+            matched = [slot for slot, text in enumerate(texts) if terms[0] in text]
+        else:
+            matched = [slot for slot in self._get_postings(source) if terms[0] in texts[slot]]
+        for term in terms[1:]:
+            matched = [slot for slot in matched if term in texts[slot]]
+
+        # 按排名分级取结果，够数后提前结束
+        results = []
+        taken = set()
+        tiers = [(("=", field_no, phrase), field_no, True) for field_no in range(len(SEARCH_FIELDS))]
+        tiers += [((field_no, phrase[:NGRAM_SIZE]), field_no, False) for field_no in range(len(SEARCH_FIELDS))]
+        for key, field_no, exact in tiers:
+            if key not in self._postings:
+                continue
+            tier_slots = self._get_postings(key)
+            if len(matched) < len(tier_slots):
+                tier_slots = matched
+            for slot in tier_slots:
+                entry = entries[slot]
+                if entry is None or slot in taken:
+                    continue
+                field = entry[1][field_no]
+                if field == phrase if exact else field.startswith(phrase):
+                    taken.add(slot)
+                    results.append(entry[0])
+                    if limit is not None and len(results) >= limit:
+                        return results, len(matched)
+        for slot in matched:
+            if slot not in taken:
+                results.append(entries[slot][0])
+                if limit is not None and len(results) >= limit:
+                    break
+        return results, len(matched)
+
+
+class SearchIndexBuilder:
+    """在后台线程中建立搜索索引
+
+    建立期间发生的增删改先记录下来，第一次使用索引时等待建立完成并依次补上。
+    """
+
+    def __init__(self, configs):
+        self._configs = list(configs)
+        self._pending = []  # [(是否移除, 配置), ...]
+        self._index = None
+        self._thread = threading.Thread(target=self._build, daemon=True)
+        self._thread.start()
+
+    def _build(self):
+        self._index = ConfigSearchIndex(self._configs)
+        self._configs = None
+
+    def add(self, config):
+        self._pending.append((False, config))
+
+    def remove(self, config):
+        self._pending.append((True, config))
+
+    def result(self):
+        """等待建立完成，补上建立期间的修改后返回索引"""
+        self._thread.join()
+        for removed, config in self._pending:
+            if removed:
+                self._index.remove(config)
+            else:
+                self._index.add(config)
+        self._pending = []
+        return self._index
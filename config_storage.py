@@ -0,0 +1,660 @@
+import os
+import json
+import uuid
+import codecs
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QTimer, QCoreApplication
+
+
+# 日志超过该大小（字节）时在后台合并为快照
+DEFAULT_COMPACT_THRESHOLD = 256 * 1024
+
+# 合并保存的静默等待时间（毫秒）：最后一次修改后这么久没有新修改才写入
+DEFAULT_SAVE_DELAY = 500
+
+# 流式读取JSON时每次读入的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 流式写入JSON时每写入这么多个元素报告一次进度
+STREAM_PROGRESS_INTERVAL = 256
+
+
+def config_key(config):
+    """配置的唯一键：(窗口标题, 进程名)"""
+    return [config.get("title"), config.get("process")]
+
+
+def new_config_id():
+    """生成新的配置ID（保存在配置的 "id" 字段中，配置的生命周期内保持不变）"""
+    return uuid.uuid4().hex
+
+
+def put_record(config, old_config=None):
+    """新增或替换一个配置的变更记录；键发生变化时记录旧键，以便原位替换"""
+    record = {"op": "put", "key": config_key(config), "config": config}
+    if old_config is not None and config_key(old_config) != record["key"]:
+        record["old_key"] = config_key(old_config)
+    return record
+
+
+def delete_record(config):
+    """删除一个配置的变更记录"""
+    return {"op": "delete", "key": config_key(config)}
+
+
+def apply_records(configs, records):
+    """把变更记录依次应用到配置列表上（原地修改）
+
+    记录以 (标题, 进程名) 为键而不是列表位置，重复应用同一段记录得到的结果不变，
+    因此合并过程中途中断、快照已包含部分记录时重放也是安全的。
+    """
+    positions = {tuple(config_key(config)): i for i, config in enumerate(configs)}
+    for record in records:
+        op = record.get("op")
+        if op == "put":
+            key = tuple(record["key"])
+            index = positions.get(key)
+            if index is None and "old_key" in record:
+                # 键发生了变化（如修改了标题），在旧配置的位置上替换
+                index = positions.pop(tuple(record["old_key"]), None)
+                if index is not None:
+                    positions[key] = index
+            if index is None:
+                positions[key] = len(configs)
+                configs.append(record["config"])
+            else:
+                configs[index] = record["config"]
+        elif op == "delete":
+            index = positions.pop(tuple(record["key"]), None)
+            if index is not None:
+                configs.pop(index)
+                positions = {tuple(config_key(config)): i for i, config in enumerate(configs)}
+    return configs
+
+
+class NotJsonArrayError(ValueError):
+    """文件顶层不是JSON数组"""
+
+
+def iter_json_array(path, progress=None, chunk_size=STREAM_CHUNK_SIZE):
+    """逐个解析并产出JSON数组文件中的元素，不把整个文件读入内存
+
+    Args:
+        path: JSON文件路径，顶层必须是数组
+        progress: 可选回调 progress(已读取字节数, 文件总字节数)，每读入一块调用一次
+        chunk_size: 每次读取的字节数
+
+    Raises:
+        NotJsonArrayError: 顶层不是数组
+        ValueError: JSON格式错误或文件被截断
+    """
+    with open(path, "rb") as f:
+        yield from iter_json_stream(f, os.path.getsize(path), progress, chunk_size)
+
+
+def iter_json_stream(f, total=0, progress=None, chunk_size=STREAM_CHUNK_SIZE):
+    """逐个解析并产出二进制流（文件或解压流）中JSON数组的元素
+
+    Args:
+        f: 以二进制方式读取的文件对象
+        total: 内容总字节数，只用于进度报告
+        progress: 可选回调 progress(已读取字节数, total)
+        chunk_size: 每次读取的字节数
+
+    Raises:
+        NotJsonArrayError: 顶层不是数组
+        ValueError: JSON格式错误或文件被截断
+    """
+    decoder = json.JSONDecoder()
+    utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+    done = 0
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, pos, done, eof
+        chunk = f.read(chunk_size)
+        done += len(chunk)
+        eof = not chunk
+        buffer = buffer[pos:] + utf8_decoder.decode(chunk, final=eof)
+        pos = 0
+        if progress:
+            progress(done, total)
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            read_more()
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise NotJsonArrayError("配置文件格式不正确")
+    pos += 1
+
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == "]":
+        return
+
+    while True:
+        skip_whitespace()
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                raise
+            read_more()
+            continue
+        if not eof and (end == len(buffer) or buffer[end] not in ",] \t\r\n"):
+            # 数字等值可能在块末尾被截断（如 "1." 会被解析为 1），读入更多内容后重新解析
+            read_more()
+            continue
+        pos = end
+        yield value
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise ValueError("JSON数组未结束")
+        if buffer[pos] == "]":
+            return
+        if buffer[pos] != ",":
+            raise ValueError("JSON数组中应为 ',' 或 ']'")
+        pos += 1
+
+
+def load_json_array(path, progress=None):
+    """流式读取JSON数组文件并返回列表"""
+    return list(iter_json_array(path, progress))
+
+
+def dump_json_array(f, items, indent=2, progress=None):
+    """逐个写入数组元素，输出与 json.dump(items, indent=indent) 相同"""
+    total = len(items)
+    if not total:
+        f.write("[]")
+    else:
+        prefix = " " * indent
+        f.write("[")
+        for i, item in enumerate(items):
+            text = json.dumps(item, ensure_ascii=False, indent=indent)
+            # JSON字符串中的换行已被转义，按行缩进不会改变内容
+            f.write(("\n" if i == 0 else ",\n") + prefix + text.replace("\n", "\n" + prefix))
+            if progress and (i + 1) % STREAM_PROGRESS_INTERVAL == 0:
+                progress(i + 1, total)
+        f.write("\n]")
+    if progress:
+        progress(total, total)
+
+
+def write_json_atomic(path, data, indent=2, progress=None):
+    """写入临时文件并同步到磁盘后再替换目标文件，写入中途崩溃不会损坏原文件
+
+    列表按元素逐个写入，不在内存中生成完整的JSON字符串；
+    progress(已写入元素数, 元素总数) 每写入一批元素调用一次。
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        if isinstance(data, list):
+            dump_json_array(f, data, indent, progress)
+        else:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    _replace_own_file(temp_path, path)
+
+
+# 本进程最近一次写入各文件后的文件签名，用于让文件监视忽略自己的写入
+_own_writes = {}
+_own_writes_lock = threading.Lock()
+
+
+def file_signature(path):
+    """文件的 (修改时间纳秒, 大小)，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _replace_own_file(temp_path, path):
+    """用临时文件替换目标文件并记录替换后的签名
+
+    替换和记录在同一把锁内完成，文件监视在两者之间检查时不会把本进程的写入
+    误判为外部修改。
+    """
+    with _own_writes_lock:
+        os.replace(temp_path, path)
+        _own_writes[os.path.normcase(os.path.abspath(path))] = file_signature(path)
+
+
+def is_own_write(path, signature):
+    """文件当前签名是否正是本进程最近一次写入的结果"""
+    with _own_writes_lock:
+        return _own_writes.get(os.path.normcase(os.path.abspath(path))) == signature
+
+
+class JsonConfigStorage:
+    """整体JSON存储：每次变更都重写 window_configs.json"""
+
+    def __init__(self, config_file):
+        self.config_file = config_file
+
+    def load(self):
+        """加载配置列表"""
+        if not os.path.exists(self.config_file):
+            return []
+        with open(self.config_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_all(self, configs):
+        """完整保存配置列表（原子替换）"""
+        write_json_atomic(self.config_file, configs)
+
+    def append(self, records, configs):
+        """记录一组变更（整体存储直接重写完整列表）"""
+        self.save_all(configs)
+
+    def close(self):
+        """关闭存储"""
+        pass
+
+
+class JournalConfigStorage(JsonConfigStorage):
+    """日志式存储：window_configs.json 作为快照，变更追加到旁边的日志文件
+
+    每次变更只在 window_configs.journal 末尾追加一行JSON记录，启动时加载快照
+    后重放日志。日志超过阈值时在后台线程把当前配置写成新快照并截断日志，
+    合并期间新追加的记录会保留到新日志中。
+    """
+
+    def __init__(self, config_file, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        super().__init__(config_file)
+        self.journal_file = os.path.splitext(config_file)[0] + ".journal"
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._journal = None  # 追加模式的日志文件对象
+        self._journal_size = 0
+        self._compact_thread = None
+
+    def load(self):
+        """加载快照并重放日志"""
+        configs = super().load()
+        records = self._read_records()
+        if records:
+            apply_records(configs, records)
+        with self._lock:
+            self._journal_size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        return configs
+
+    def _read_records(self, offset=0):
+        """读取日志中从 offset 开始的记录，末尾不完整的一行（写入时崩溃）会被忽略"""
+        if not os.path.exists(self.journal_file):
+            return []
+        records = []
+        with open(self.journal_file, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    records.append(json.loads(line.decode("utf-8")))
+                except (ValueError, UnicodeDecodeError):
+                    break
+        return records
+
+    def save_all(self, configs):
+        """完整保存：同步写入新快照并清空日志"""
+        self.wait_for_compaction()
+        with self._lock:
+            write_json_atomic(self.config_file, configs)
+            self._close_journal()
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self._journal_size = 0
+
+    def append(self, records, configs):
+        """把变更记录追加到日志，超过阈值时启动后台合并"""
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_file, "ab")
+            self._journal.write(data)
+            self._journal.flush()
+            self._journal_size += len(data)
+            if self._journal_size < self.compact_threshold or self._compact_thread is not None:
+                return
+            # 配置字典只包含基本类型，浅复制即可得到合并用的一致副本
+            snapshot = [dict(config) for config in configs]
+            offset = self._journal_size
+            self._compact_thread = threading.Thread(
+                target=self._compact, args=(snapshot, offset), name="ConfigCompaction")
+            self._compact_thread.start()
+
+    def _compact(self, snapshot, offset):
+        """后台合并：写入快照后，只保留合并开始之后追加的日志记录"""
+        try:
+            write_json_atomic(self.config_file, snapshot)
+            with self._lock:
+                self._close_journal()
+                with open(self.journal_file, "rb") as f:
+                    f.seek(offset)
+                    remaining = f.read()
+                temp_path = f"{self.journal_file}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(remaining)
+                os.replace(temp_path, self.journal_file)
+                self._journal_size = len(remaining)
+        except Exception:
+            pass  # 合并失败时日志保持完整，下次超过阈值时重试
+        finally:
+            with self._lock:
+                self._compact_thread = None
+
+    def wait_for_compaction(self, timeout=None):
+        """等待正在进行的后台合并完成"""
+        thread = self._compact_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _close_journal(self):
+        """关闭日志文件（Windows下替换或删除文件前必须先关闭）"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        """等待合并完成并关闭日志文件"""
+        self.wait_for_compaction()
+        with self._lock:
+            self._close_journal()
+
+
+class SqliteConfigStorage:
+    """SQLite存储：每个配置一行，按行更新，不再重写整个文件
+
+    配置完整内容以JSON保存在 data 列，title/process/class_name 单独成列并建立索引，
+    (title, process) 唯一。数据库为空且存在旧的 window_configs.json（及日志）时，
+    首次加载会一次性迁移过来，原JSON文件保持不变。
+    """
+
+    def __init__(self, config_file):
+        self.config_file = config_file
+        self.db_file = os.path.splitext(config_file)[0] + ".db"
+        self._lock = threading.Lock()
+        # 合并保存可能在后台线程执行，连接由锁保护
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS configs (
+                    id INTEGER PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    title TEXT,
+                    process TEXT,
+                    class_name TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_configs_key ON configs (title, process);
+                CREATE INDEX IF NOT EXISTS idx_configs_process ON configs (process);
+                CREATE INDEX IF NOT EXISTS idx_configs_class ON configs (class_name);
+                CREATE INDEX IF NOT EXISTS idx_configs_position ON configs (position);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+
+    def load(self):
+        """按顺序加载所有配置；首次使用时从JSON迁移"""
+        self._migrate_from_json()
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM configs ORDER BY position").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def _migrate_from_json(self):
+        """一次性导入旧的JSON配置（包括尚未合并的日志）"""
+        with self._lock:
+            migrated = self._conn.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone()
+            has_rows = self._conn.execute("SELECT 1 FROM configs LIMIT 1").fetchone()
+        if migrated or has_rows:
+            return
+        journal = JournalConfigStorage(self.config_file)
+        if not os.path.exists(self.config_file) and not os.path.exists(journal.journal_file):
+            return
+        try:
+            configs = journal.load()
+        except Exception:
+            return
+        self.save_all(configs)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)",
+                               (self.config_file,))
+
+    @staticmethod
+    def _row(config):
+        """配置字典对应的列值"""
+        return (config.get("title"), config.get("process"), config.get("class_name"),
+                json.dumps(config, ensure_ascii=False))
+
+    def save_all(self, configs):
+        """在一个事务中整体替换所有配置"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM configs")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO configs (position, title, process, class_name, data) VALUES (?, ?, ?, ?, ?)",
+                [(position, *self._row(config)) for position, config in enumerate(configs)]
+            )
+
+    def append(self, records, configs):
+        """按行应用变更记录（一个事务）"""
+        with self._lock, self._conn:
+            for record in records:
+                op = record.get("op")
+                if op == "put":
+                    self._put(record)
+                elif op == "delete":
+                    self._conn.execute("DELETE FROM configs WHERE title = ? AND process = ?",
+                                       tuple(record["key"]))
+
+    def _put(self, record):
+        """新增或替换一行；键发生变化时原位更新旧行"""
+        title, process, class_name, data = self._row(record["config"])
+        key = tuple(record["key"])
+        cursor = self._conn.execute(
+            "UPDATE configs SET class_name = ?, data = ? WHERE title = ? AND process = ?",
+            (class_name, data, *key))
+        if cursor.rowcount:
+            return
+        if "old_key" in record:
+            cursor = self._conn.execute(
+                "UPDATE configs SET title = ?, process = ?, class_name = ?, data = ? "
+                "WHERE title = ? AND process = ?",
+                (title, process, class_name, data, *record["old_key"]))
+            if cursor.rowcount:
+                return
+        self._conn.execute(
+            "INSERT INTO configs (position, title, process, class_name, data) "
+            "VALUES ((SELECT COALESCE(MAX(position), -1) + 1 FROM configs), ?, ?, ?, ?)",
+            (title, process, class_name, data))
+
+    def find_keys(self, process=None, class_name=None):
+        """通过索引查询配置键 [(title, process), ...]（按配置顺序）
+
+        Args:
+            process: 进程名（精确匹配，使用索引）
+            class_name: 窗口类名（精确匹配，使用索引）
+        """
+        conditions = []
+        params = []
+        if process is not None:
+            conditions.append("process = ?")
+            params.append(process)
+        if class_name is not None:
+            conditions.append("class_name = ?")
+            params.append(class_name)
+        sql = "SELECT title, process FROM configs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY position", params).fetchall()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_storage(mode, config_file):
+    """按存储模式创建存储对象（"json"、"journal" 或 "sqlite"，无法识别时使用 "json"）"""
+    if mode == "journal":
+        return JournalConfigStorage(config_file)
+    if mode == "sqlite":
+        return SqliteConfigStorage(config_file)
+    return JsonConfigStorage(config_file)
+
+
+class DebouncedSaver:
+    """合并保存调度器
+
+    schedule() 只重新启动定时器，一连串修改在静默 delay 毫秒后合并为一次完整保存：
+    在GUI线程复制一份配置后交给后台线程写入，写入过程中的新修改会在之后再写一次。
+    flush() 立即同步写入尚未保存的修改，用于退出程序和导出配置前。
+    没有Qt事件循环（如命令行脚本）时 schedule() 直接同步写入。
+
+    schedule() 可同时传入这次修改的变更记录，写入完成前可通过 unsaved_records()
+    取回，重新读取被外部修改的文件时重放到文件内容上，本地修改不会丢失。
+    suspend() 期间不启动定时保存（如导入过程中进度对话框处理界面事件时），
+    resume() 后再合并保存。
+    """
+
+    def __init__(self, storage, get_configs, delay=DEFAULT_SAVE_DELAY):
+        """
+        Args:
+            storage: 配置存储对象
+            get_configs: 返回当前配置列表的函数（在GUI线程调用）
+            delay: 静默等待时间（毫秒）
+        """
+        self.storage = storage
+        self.get_configs = get_configs
+        self.delay = delay
+        self.last_error = None  # 最近一次写入失败的异常
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # 保证同一时间只有一次写入
+        self._pending = None  # 等待写入的 (配置副本, 副本包含的变更记录序号上限)
+        self._dirty = False
+        self._records = []  # 尚未写入文件的变更记录
+        self._records_base = 0  # _records[0] 的序号
+        self._suspended = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ConfigSaver")
+        self._timer = None
+        if QCoreApplication.instance() is not None:
+            self._timer = QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self._on_timeout)
+
+    def schedule(self, records=None):
+        """标记配置已修改，静默一段时间后保存
+
+        Args:
+            records: 这次修改的变更记录（可选）
+        """
+        if records:
+            with self._lock:
+                self._records.extend(records)
+        self._dirty = True
+        if self._suspended:
+            return
+        if self._timer is None:
+            self.flush()
+        else:
+            self._timer.start(self.delay)
+
+    def suspend(self):
+        """暂停定时保存，修改仍会被记录"""
+        self._suspended = True
+        if self._timer is not None:
+            self._timer.stop()
+
+    def resume(self):
+        """恢复定时保存，暂停期间有修改时重新开始计时"""
+        self._suspended = False
+        if self._dirty:
+            self.schedule()
+
+    def _take_snapshot(self):
+        """复制当前配置作为待写入的版本（配置字典只包含基本类型，浅复制即可）"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        snapshot = [dict(config) for config in self.get_configs()]
+        with self._lock:
+            self._pending = (snapshot, self._records_base + len(self._records))
+
+    def _on_timeout(self):
+        """静默期结束：复制配置并交给后台线程写入"""
+        self._take_snapshot()
+        try:
+            self._executor.submit(self._write_pending)
+        except RuntimeError:
+            self._write_pending()  # 调度器已关闭，直接写入
+
+    def _write_pending(self):
+        """写入最新的待保存版本；多个排队的写入只会写最新的一份"""
+        with self._write_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = None
+            if pending is None:
+                return True
+            snapshot, records_end = pending
+            try:
+                self.storage.save_all(snapshot)
+                self.last_error = None
+                # 副本已包含的变更记录不再需要
+                with self._lock:
+                    written = records_end - self._records_base
+                    if written > 0:
+                        del self._records[:written]
+                        self._records_base = records_end
+                return True
+            except Exception as e:
+                self.last_error = e
+                # 写入失败时保留这份副本（除非已有更新的版本），下次保存时重试
+                with self._lock:
+                    if self._pending is None:
+                        self._pending = pending
+                return False
+
+    def unsaved_records(self):
+        """尚未写入文件的变更记录（等待正在进行的后台写入完成后返回）"""
+        with self._write_lock:
+            with self._lock:
+                return list(self._records)
+
+    def has_pending(self):
+        """是否还有尚未写入的修改"""
+        with self._lock:
+            return self._dirty or self._pending is not None
+
+    def flush(self):
+        """立即同步写入所有尚未保存的修改（等待正在进行的后台写入）
+
+        Returns:
+            写入是否成功（没有待写入的修改时返回True）
+        """
+        if self._timer is not None:
+            self._timer.stop()
+        self._take_snapshot()
+        return self._write_pending()
+
+    def save_now(self):
+        """立即同步保存当前配置"""
+        self._dirty = True
+        return self.flush()
+
+    def close(self):
+        """写入剩余修改并停止后台线程"""
+        result = self.flush()
+        self._executor.shutdown(wait=True)
+        return result
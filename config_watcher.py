@@ -0,0 +1,101 @@
+import os
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+from config_storage import file_signature, is_own_write
+
+
+# 轮询兜底间隔（毫秒）：文件系统通知不可用（如部分网络共享目录）时按此间隔比较修改时间和大小
+DEFAULT_POLL_INTERVAL = 2000
+
+# 检测到变化后的静默等待时间（毫秒），外部工具分多次写入时只重新加载一次
+DEFAULT_SETTLE_DELAY = 300
+
+
+class ConfigFileWatcher(QObject):
+    """配置文件监视器：配置文件被其他程序修改时发出 file_changed 信号
+
+    同时监视文件本身和所在目录（原子替换会使对文件的监视失效），并按固定间隔
+    比较 (修改时间, 大小) 作为兜底。本进程自己写入产生的变化会被忽略。
+    suspend() 期间不检查变化，resume() 时补做一次检查。
+    """
+
+    file_changed = pyqtSignal(str)  # 配置文件路径
+
+    def __init__(self, path=None, poll_interval=DEFAULT_POLL_INTERVAL,
+                 settle_delay=DEFAULT_SETTLE_DELAY, parent=None):
+        super().__init__(parent)
+        self.path = None
+        self._signature = None
+        self._suspended = False
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_notified)
+        self._watcher.directoryChanged.connect(self._on_notified)
+
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(settle_delay)
+        self._settle_timer.timeout.connect(self._check)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_interval)
+        self._poll_timer.timeout.connect(self._check)
+
+        if path:
+            self.set_path(path)
+
+    def set_path(self, path):
+        """切换监视的配置文件（路径不变时不做任何事，为None时停止监视）"""
+        if path == self.path:
+            return
+        self.stop()
+        self.path = path
+        if path is None:
+            return
+        self._signature = file_signature(path)
+        self._update_watched_paths()
+        self._poll_timer.start()
+
+    def stop(self):
+        """停止监视"""
+        self._poll_timer.stop()
+        self._settle_timer.stop()
+        watched = self._watcher.files() + self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+
+    def suspend(self):
+        """暂停检查（如导入配置的过程中），文件系统通知和轮询都被忽略"""
+        self._suspended = True
+        self._settle_timer.stop()
+
+    def resume(self):
+        """恢复检查，并立即比较一次暂停期间的变化"""
+        self._suspended = False
+        self._check()
+
+    def _update_watched_paths(self):
+        """文件被替换或重新创建后重新加入监视"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if os.path.isdir(directory) and directory not in self._watcher.directories():
+            self._watcher.addPath(directory)
+        if os.path.exists(self.path) and self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+
+    def _on_notified(self, path):
+        """收到文件系统通知，等待写入静默后再检查"""
+        if not self._suspended:
+            self._settle_timer.start()
+
+    def _check(self):
+        """比较文件签名，排除本进程的写入后发出变化信号"""
+        if self.path is None or self._suspended:
+            return
+        self._update_watched_paths()
+        signature = file_signature(self.path)
+        if signature == self._signature:
+            return
+        self._signature = signature
+        if signature is None or is_own_write(self.path, signature):
+            return
+        self.file_changed.emit(self.path)
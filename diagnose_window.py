@@ -4,11 +4,14 @@ WindowSizer 窗口诊断工具
 """
 
 import win32gui
-import win32process
 import win32con
 import psutil
 import ctypes
 
+from window_backend import Win32Backend
+
+backend = Win32Backend()
+
 def diagnose_window_by_pid(target_pid):
     """诊断指定PID的窗口"""
     print(f"\n{'='*60}")
@@ -26,14 +29,7 @@ def diagnose_window_by_pid(target_pid):
         return
     
     # 查找该进程的所有窗口
-    def enum_callback(hwnd, windows):
-        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-        if pid == target_pid:
-            windows.append(hwnd)
-        return True
-    
-    windows = []
-    win32gui.EnumWindows(enum_callback, windows)
+    windows = [hwnd for hwnd in backend.enum_windows() if backend.get_window_pid(hwnd) == target_pid]
     
     print(f"\n找到 {len(windows)} 个窗口句柄")
     
@@ -43,28 +39,28 @@ def diagnose_window_by_pid(target_pid):
         
         # 窗口标题
         try:
-            title = win32gui.GetWindowText(hwnd)
+            title = backend.get_window_text(hwnd)
             print(f"  标题: {title if title else '(无标题)'}")
         except Exception as e:
             print(f"  标题: 获取失败 - {e}")
         
         # 窗口类名
         try:
-            class_name = win32gui.GetClassName(hwnd)
+            class_name = backend.get_class_name(hwnd)
             print(f"  类名: {class_name}")
         except Exception as e:
             print(f"  类名: 获取失败 - {e}")
         
         # 窗口可见性
         try:
-            is_visible = win32gui.IsWindowVisible(hwnd)
+            is_visible = backend.is_window_visible(hwnd)
             print(f"  可见: {is_visible}")
         except Exception as e:
             print(f"  可见: 获取失败 - {e}")
         
         # 窗口位置和大小
         try:
-            rect = win32gui.GetWindowRect(hwnd)
+            rect = backend.get_window_rect(hwnd)
             width = rect[2] - rect[0]
             height = rect[3] - rect[1]
             print(f"  位置: x={rect[0]}, y={rect[1]}")
@@ -110,7 +106,7 @@ def diagnose_window_by_pid(target_pid):
         print(f"\n  测试调整窗口位置...")
         try:
             # 获取当前位置
-            current_rect = win32gui.GetWindowRect(hwnd)
+            current_rect = backend.get_window_rect(hwnd)
             test_x = current_rect[0]
             test_y = current_rect[1]
             test_width = current_rect[2] - current_rect[0]
@@ -125,7 +121,7 @@ def diagnose_window_by_pid(target_pid):
             )
             
             # 验证设置是否成功
-            new_rect = win32gui.GetWindowRect(hwnd)
+            new_rect = backend.get_window_rect(hwnd)
             if new_rect == current_rect:
                 print(f"    ✓ SetWindowPos 调用成功")
             else:
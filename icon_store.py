@@ -0,0 +1,107 @@
+import os
+import hashlib
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QIcon, QImage, QPixmap
+
+
+# 图标实际使用的尺寸：配置列表 24px，保存 32px
+ICON_SIZES = (24, 32)
+SAVE_ICON_SIZE = 32
+
+
+class IconStore:
+    """配置图标仓库：对 config_icons 文件夹只建立一次索引，并缓存解码后的图标
+
+    新保存的图标按像素内容的哈希命名，内容相同的图标（如同一程序的多个配置）
+    共用一个文件。查找回退文件名时只查内存中的索引，不再逐个检查文件是否存在；
+    图标第一次使用时解码一次，按实际使用的尺寸生成像素图并缓存。
+    """
+
+    def __init__(self, icons_folder):
+        self.icons_folder = icons_folder
+        self._files = None  # 规范化文件名 -> 实际文件名，首次使用时扫描文件夹
+        self._icons = {}  # 实际文件名 -> QIcon
+        self._resolved = {}  # 候选文件名元组 -> 实际文件名（或None）
+
+    def _ensure_indexed(self):
+        """扫描图标文件夹建立文件名索引（只扫描一次）"""
+        if self._files is not None:
+            return
+        self._files = {}
+        try:
+            with os.scandir(self.icons_folder) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(".png"):
+                        self._files[os.path.normcase(entry.name)] = entry.name
+        except OSError:
+            pass
+
+    def refresh(self):
+        """重新扫描文件夹（文件夹被其他程序修改后调用）"""
+        self._files = None
+        self._icons.clear()
+        self._resolved.clear()
+
+    def resolve(self, filenames):
+        """按优先级返回第一个存在的图标文件名，都不存在时返回None"""
+        filenames = tuple(filenames)
+        if filenames in self._resolved:
+            return self._resolved[filenames]
+        self._ensure_indexed()
+        found = None
+        for filename in filenames:
+            found = self._files.get(os.path.normcase(filename))
+            if found:
+                break
+        self._resolved[filenames] = found
+        return found
+
+    def get_icon(self, filename):
+        """获取已缓存的图标（首次使用时解码），文件不存在或无法解码时返回None"""
+        if filename in self._icons:
+            return self._icons[filename]
+        icon = None
+        image = QImage(os.path.join(self.icons_folder, filename))
+        if not image.isNull():
+            icon = QIcon()
+            for size in ICON_SIZES:
+                if image.width() == size and image.height() == size:
+                    icon.addPixmap(QPixmap.fromImage(image))
+                else:
+                    icon.addPixmap(QPixmap.fromImage(image.scaled(
+                        size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)))
+        self._icons[filename] = icon
+        return icon
+
+    def save(self, icon):
+        """保存图标，内容相同的图标只保存一份
+
+        Args:
+            icon: QIcon对象
+
+        Returns:
+            图标文件名，保存失败返回None
+        """
+        pixmap = icon.pixmap(SAVE_ICON_SIZE, SAVE_ICON_SIZE)
+        if pixmap.isNull():
+            return None
+        image = pixmap.toImage().convertToFormat(QImage.Format_ARGB32)
+
+        # 按尺寸和像素内容计算哈希，相同的图标得到相同的文件名
+        digest = hashlib.sha1(f"{image.width()}x{image.height()}".encode("ascii"))
+        for y in range(image.height()):
+            digest.update(image.constScanLine(y).asstring(image.width() * 4))
+        filename = f"{digest.hexdigest()[:20]}.png"
+
+        self._ensure_indexed()
+        if os.path.normcase(filename) in self._files:
+            return filename
+
+        icon_path = os.path.join(self.icons_folder, filename)
+        temp_path = os.path.join(self.icons_folder, f"{filename}.tmp")
+        if not image.save(temp_path, "PNG"):
+            return None
+        os.replace(temp_path, icon_path)
+        self._files[os.path.normcase(filename)] = filename
+        self._resolved.clear()  # 新文件可能改变回退查找的结果
+        return filename
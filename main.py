@@ -1,9 +1,5 @@
 import sys
 import os
-import win32gui
-import win32con
-import win32api
-import win32process
 import psutil
 import time
 import subprocess
@@ -13,16 +9,23 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                             QLabel, QLineEdit, QPushButton, QCheckBox, QSpinBox, 
                             QGroupBox, QGridLayout, QMenu, QAction, QSystemTrayIcon, 
                             QTabWidget, QFileDialog, QFrame, QStyle, 
-                            QRadioButton, QButtonGroup, QListWidgetItem, QShortcut)
+                            QRadioButton, QButtonGroup, QListWidgetItem, QShortcut,
+                            QProgressDialog)
 from PyQt5.QtGui import QIcon, QFont, QPalette, QColor, QCursor, QKeySequence
 from PyQt5.QtCore import Qt, QTimer, QSettings, QPoint, QSize, QRect
 
 # 导入自定义模块
 from ui import UIManager
-from window_manager import WindowManager
+from window_manager import (WindowManager, IconResolver, icon_from_image,
+                            DEFAULT_MESSAGE_TIMEOUT_MS, DEFAULT_HUNG_COOLDOWN)
+from window_monitor import WindowMonitor
 from config_manager import ConfigManager
+from config_watcher import ConfigFileWatcher
 
 
+# 搜索配置时列表中最多显示的结果数（按匹配程度排在最前的部分）
+CONFIG_SEARCH_LIMIT = 500
+
 def is_admin():
     """检查当前进程是否以管理员权限运行"""
     import ctypes
@@ -43,7 +46,13 @@ def get_base_dir():
 
 
 class WindowSizer(QMainWindow):
-    def __init__(self):
+    def __init__(self, window_manager=None, config_manager=None, themes_folder=None):
+        """
+        Args:
+            window_manager: 窗口管理器（可选，默认使用pywin32后端创建）
+            config_manager: 配置管理器（可选，默认从设置中的配置路径加载）
+            themes_folder: 主题文件夹（可选，默认为程序目录下的 themes）
+        """
         super().__init__()
         
         # 初始化变量
@@ -52,10 +61,43 @@ class WindowSizer(QMainWindow):
         self.auto_apply_config = False  # 自动应用配置开关状态
         self.close_behavior = "minimize"  # 默认关闭到最小化
         
-        # 初始化管理器
-        self.window_manager = WindowManager()
-        self.config_manager = ConfigManager()
-        self.ui_manager = UIManager(self)
+        # 窗口快照代数（各调用方分别记录自己看到的增量位置）
+        self._window_list_generation = 0
+        self._window_list_items = {}  # hwnd -> 窗口列表项
+        self._config_search = ""  # 配置列表搜索框中的文本
+        self._pending_config_icons = set()  # 等待从运行中的窗口获取图标的配置ID
+        self._config_icon_windows = {}  # hwnd -> [配置ID, ...]，等待后台解析图标的窗口
+        self._unresolved_config_icons = set()  # 当前窗口中找不到图标的配置ID，窗口变化后再重试
+        self._window_snapshot = None  # 最近一次的窗口快照，获取配置图标时不再重新枚举
+        
+        # 初始化管理器（跨进程消息超时和无响应冷却时间可在设置中调整）
+        settings = QSettings("WindowSizer", "Settings")
+        if window_manager is None:
+            window_manager = WindowManager(
+                message_timeout_ms=settings.value("message_timeout_ms", DEFAULT_MESSAGE_TIMEOUT_MS, type=int),
+                hung_cooldown=settings.value("hung_window_cooldown", DEFAULT_HUNG_COOLDOWN, type=int)
+            )
+        self.window_manager = window_manager
+        self.config_manager = config_manager or ConfigManager()
+        self.ui_manager = UIManager(self, themes_folder=themes_folder)
+        
+        # 后台图标解析，窗口枚举不再同步提取图标
+        self.icon_resolver = IconResolver(self.window_manager, parent=self)
+        self.icon_resolver.icon_ready.connect(self.on_window_icon_ready)
+        
+        # 后台窗口监测线程，通过排队信号把快照和自动应用结果送回GUI线程；
+        # 支持WinEvent钩子时由窗口事件驱动，轮询只作为低频兜底
+        event_source = self.window_manager.backend.create_event_source()
+        self.window_monitor = WindowMonitor(self.window_manager, event_source=event_source, parent=self)
+        self.window_monitor.snapshot_ready.connect(self.on_monitor_snapshot)
+        self.window_monitor.apply_finished.connect(self.on_auto_apply_finished)
+        
+        # 监视配置文件，部署工具等外部程序更新后只增量应用差异
+        self.config_watcher = ConfigFileWatcher(self.config_manager.get_watch_path(), parent=self)
+        self.config_watcher.file_changed.connect(self.on_config_file_changed)
+        
+        # 配置的增删改由配置管理器通知，列表和监测线程只更新变化的配置
+        self.config_manager.add_change_listener(self.on_configs_changed)
         
         # 加载设置
         self.load_settings()
@@ -124,25 +166,60 @@ class WindowSizer(QMainWindow):
             )
     
     def refresh_window_list(self):
-        """刷新窗口列表"""
-        # 清空当前列表
-        self.ui_manager.window_list.clear()
+        """刷新窗口列表（只处理自上次刷新以来的增量）"""
+        window_list = self.ui_manager.window_list
+        snapshot = self.window_manager.get_window_snapshot(since=self._window_list_generation)
+        self._window_list_generation = snapshot.generation
+        self.update_window_snapshot(snapshot)
         
-        # 获取所有窗口
-        windows = self.window_manager.get_window_list()
+        # 基准失效时整体重建
+        if snapshot.full:
+            window_list.clear()
+            self._window_list_items = {}
         
-        # 添加到列表
-        for window in windows:
-            item = QListWidgetItem(window["title"])
-            item.setData(Qt.UserRole, window)
-            
-            # 设置图标
-            if window["icon"] and not window["icon"].isNull():
-                item.setIcon(window["icon"])
-            
-            self.ui_manager.window_list.addItem(item)
+        # 移除已消失的窗口
+        for window in snapshot.removed:
+            item = self._window_list_items.pop(window["hwnd"], None)
+            if item is not None:
+                window_list.takeItem(window_list.row(item))
         
-
+        # 更新发生变化的窗口
+        for window in snapshot.changed:
+            item = self._window_list_items.get(window["hwnd"])
+            if item is not None:
+                self._update_window_item(item, window)
+        
+        # 添加新出现的窗口
+        for window in snapshot.added:
+            item = QListWidgetItem()
+            self._update_window_item(item, window)
+            window_list.addItem(item)
+            self._window_list_items[window["hwnd"]] = item
+        
+        # 尚未解析的图标交给后台解析，完成后通过 on_window_icon_ready 更新
+        self.icon_resolver.request(snapshot.added + snapshot.changed)
+    
+    def _update_window_item(self, item, window):
+        """用窗口信息填充窗口列表项"""
+        item.setText(window["title"])
+        item.setData(Qt.UserRole, window)
+        
+        # 设置图标（None表示仍在后台解析，窗口记录中保存的是QImage）
+        if window["icon"] is not None and not window["icon"].isNull():
+            item.setIcon(icon_from_image(window["icon"]))
+    
+    def on_window_icon_ready(self, hwnd, icon):
+        """后台图标解析完成，更新窗口列表中对应的项"""
+        item = self._window_list_items.get(hwnd)
+        if item is not None and not icon.isNull():
+            item.setIcon(icon)
+        
+        # 配置列表中等待该窗口图标的配置
+        config_ids = self._config_icon_windows.pop(hwnd, None)
+        window = self.window_manager.get_known_window(hwnd)
+        if config_ids and window is not None:
+            for config_id in config_ids:
+                self.save_config_icon(config_id, window, icon)
     
     def toggle_window_list(self):
         """切换窗口列表面板的显示/隐藏"""
@@ -194,7 +271,9 @@ class WindowSizer(QMainWindow):
             "x": self.ui_manager.x_spin.value(),
             "y": self.ui_manager.y_spin.value(),
             "width": self.ui_manager.width_spin.value(),
-            "height": self.ui_manager.height_spin.value()
+            "height": self.ui_manager.height_spin.value(),
+            # 窗口类名用于按类名查找和搜索配置
+            "class_name": self.current_window.get("class_name", "")
         }
         
         # 验证配置
@@ -206,7 +285,6 @@ class WindowSizer(QMainWindow):
         existing_config = self.config_manager.get_config_by_window_info(config["title"], config["process"])
         if existing_config:
             # 更新现有配置：保留custom_name、enabled、icon_file等字段
-            index = self.config_manager.configs.index(existing_config)
             # 保留原有的自定义名称、激活状态和图标文件
             if "custom_name" in existing_config:
                 config["custom_name"] = existing_config["custom_name"]
@@ -217,15 +295,11 @@ class WindowSizer(QMainWindow):
             if "created_at" in existing_config:
                 config["created_at"] = existing_config["created_at"]
             
-            if self.config_manager.update_config(index, config):
-                self.load_config_list()
+            self.config_manager.update_config(existing_config["id"], config)
         else:
-            # 添加新配置，传递窗口图标和类名
-            icon = self.current_window.get("icon", None)
-            class_name = self.current_window.get("class_name", None)
-            success, message = self.config_manager.add_config(config, icon, class_name)
-            if success:
-                self.load_config_list()
+            # 添加新配置，传递窗口图标（图标可能尚未在后台解析完成）
+            icon = self.window_manager.resolve_icon(self.current_window)
+            self.config_manager.add_config(config, icon)
     def apply_config(self):
         """应用当前配置到窗口"""
         if not self.current_window:
@@ -259,19 +333,12 @@ class WindowSizer(QMainWindow):
             )
     def delete_config(self):
         """删除当前选中的配置"""
-        current_item = self.ui_manager.config_list.currentItem()
-        if not current_item:
-            return
-        
-        # 获取配置索引
-        config_index = current_item.data(Qt.UserRole)
-        if config_index is None or config_index < 0 or config_index >= len(self.config_manager.configs):
+        current_index = self.ui_manager.config_list.currentIndex()
+        if not current_index.isValid():
             return
         
         # 直接删除配置
-        if self.config_manager.delete_config(config_index):
-            self.load_config_list()
-            
+        if self.config_manager.delete_config(current_index.data(Qt.UserRole)):
             # 清空配置详情
             self.ui_manager.title_label.setText("-")
             self.ui_manager.process_label.setText("-")
@@ -293,180 +360,206 @@ class WindowSizer(QMainWindow):
         threading.Thread(target=self._apply_all_configs, args=(configs,), daemon=True).start()
 
     
-    def auto_apply_configs(self):
-        """自动应用配置到匹配的窗口"""
-        configs = self.config_manager.get_all_configs()
-        if not configs:
-            return
-        
-        # 获取当前所有窗口
-        windows = self.window_manager.get_window_list()
-        
-        for config in configs:
-            # 跳过未激活的配置
-            if not config.get("enabled", True):
-                continue
-                
-            try:
-                # 查找匹配的窗口
-                for window in windows:
-                    if (window["title"] == config["title"] and 
-                        window["process_name"] == config["process"]):
-                        # 检查窗口是否已经应用了正确的配置
-                        current_rect = self.window_manager.get_window_rect(window["hwnd"])
-                        if current_rect:
-                            current_width = current_rect[2] - current_rect[0]
-                            current_height = current_rect[3] - current_rect[1]
-                            
-                            # 如果配置与当前窗口状态不同，则应用配置
-                            if (current_rect[0] != config["x"] or 
-                                current_rect[1] != config["y"] or 
-                                current_width != config["width"] or 
-                                current_height != config["height"]):
-                                # 应用配置（忽略错误，自动应用时不显示弹窗）
-                                self.window_manager.resize_window(
-                                    window["hwnd"], 
-                                    config["x"], config["y"], 
-                                    config["width"], config["height"]
-                                )
-                
-                # 添加延迟以避免同时操作多个窗口导致问题
-                time.sleep(0.05)
-            except Exception:
-                pass
-    
     def _apply_all_configs(self, configs):
         """在后台线程中应用所有配置"""
+        # 应用期间暂停自动应用，避免两个线程同时调整同一批窗口
+        self.window_monitor.pause()
+        try:
+            self._apply_configs_once(configs)
+        finally:
+            self.window_monitor.resume()
+    
+    def _apply_configs_once(self, configs):
+        """枚举一次窗口并批量应用所有启用的配置，返回 (成功数, 失败数)"""
         success_count = 0
         fail_count = 0
         
-        for config in configs:
-            # 跳过未激活的配置
-            if not config.get("enabled", True):
-                continue
-                
-            try:
-                # 查找匹配的窗口
-                windows = self.window_manager.get_window_list()
-                matched_window = None
-                
-                for window in windows:
-                    if (window["title"] == config["title"] and 
-                        window["process_name"] == config["process"]):
-                        matched_window = window
-                        break
-                
-                if matched_window:
-                    # 应用配置
-                    success, error_msg = self.window_manager.resize_window(
-                        matched_window["hwnd"], 
-                        config["x"], config["y"], 
-                        config["width"], config["height"]
-                    )
-                    if success:
-                        success_count += 1
-                    else:
-                        fail_count += 1
-                else:
-                    fail_count += 1
-                
-                # 添加延迟以避免同时操作多个窗口导致问题
-                time.sleep(0.1)
-            except Exception:
+        # 只枚举一次窗口，通过索引完成所有配置的匹配
+        index = self.window_manager.get_window_snapshot().match_index
+        
+        # 跳过未激活的配置，收集所有目标位置后一次性提交
+        enabled_configs = [config for config in configs if config.get("enabled", True)]
+        placements = {}
+        for config, matched_windows in index.match_configs(enabled_configs):
+            if matched_windows:
+                matched_window = matched_windows[0]
+                placements[matched_window["hwnd"]] = (
+                    matched_window["hwnd"], 
+                    config["x"], config["y"], 
+                    config["width"], config["height"]
+                )
+            else:
                 fail_count += 1
         
-        # 在主线程中显示结果
-
+        # 应用配置
+        for hwnd, success, error_msg in self.window_manager.resize_windows(list(placements.values())):
+            if success:
+                success_count += 1
+            else:
+                fail_count += 1
+        
+        return success_count, fail_count
     
     def load_config_list(self):
-        """加载配置列表"""
-        # 获取所有配置
-        configs = self.config_manager.get_all_configs()
+        """重新加载整个配置列表（配置整体替换后调用，保持选中的配置和滚动位置）"""
+        # 配置发生变化，同步给监测线程（下次监测时重新检查所有窗口）
+        self.window_monitor.set_configs(self.config_manager.get_all_configs())
+        # 配置路径可能已改变，监视新的配置文件
+        self.config_watcher.set_path(self.config_manager.get_watch_path())
         
-        # 清空列表
-        self.ui_manager.config_list.clear()
+        self.show_config_list()
+        # 空闲时在后台建立搜索索引，第一次搜索时无需等待
+        QTimer.singleShot(0, self.config_manager.prepare_search_index)
+    
+    def show_config_list(self):
+        """按搜索框的内容显示配置（没有搜索文本时显示全部），保持选中的配置和滚动位置"""
+        config_list = self.ui_manager.config_list
+        config_model = self.ui_manager.config_model
+        selected = config_model.config(config_list.currentIndex().row())
+        scroll_value = config_list.verticalScrollBar().value()
         
-        # 添加到列表
-        for i, config in enumerate(configs):
-            # 创建列表项
-            item = QListWidgetItem()
-            item.setData(Qt.UserRole, i)
-            
-            # 创建自定义widget
-            item_widget = QWidget()
-            item_layout = QHBoxLayout(item_widget)
-            item_layout.setContentsMargins(2, 2, 2, 2)
-            item_layout.setSpacing(5)
-            
-            # 激活复选框（最左边）
-            enabled_checkbox = QCheckBox()
-            enabled_checkbox.setChecked(config.get("enabled", True))
-            enabled_checkbox.stateChanged.connect(lambda state, idx=i: self.on_config_enabled_changed(idx, state))
-            enabled_checkbox.setFixedWidth(20)
-            item_layout.addWidget(enabled_checkbox)
-            
-            # 图标
-            icon_label = QLabel()
-            icon_label.setFixedSize(24, 24)
-            
-            # 尝试从保存的文件加载图标（支持多级回退匹配）
-            icon_loaded = False
-            if "icon_file" in config:
-                # 使用配置中保存的图标文件名，同时提供进程名、类名、标题用于回退
-                icon = self.config_manager.load_icon(
-                    icon_filename=config["icon_file"],
-                    process_name=config["process"],
-                    class_name=config.get("class_name"),
-                    window_title=config["title"]
-                )
-                if icon and not icon.isNull():
-                    icon_label.setPixmap(icon.pixmap(24, 24))
-                    icon_loaded = True
-            
-            # 如果没有保存的图标，尝试从当前运行的窗口获取
-            if not icon_loaded:
-                windows = self.window_manager.get_window_list()
-                for window in windows:
-                    if (window["title"] == config["title"] and 
-                        window["process_name"] == config["process"]):
-                        if window["icon"] and not window["icon"].isNull():
-                            icon_label.setPixmap(window["icon"].pixmap(24, 24))
-                        break
-            
-            item_layout.addWidget(icon_label)
-            
-            # 配置名称标签（优先使用自定义名称）
-            display_name = config.get("custom_name", f"{config['title']} - {config['process']}")
-            name_label = QLabel(display_name)
-            name_label.setStyleSheet("QLabel { border: none; background: transparent; }")
-            # 不设置伸缩因子，让标签自然占据空间
-            item_layout.addWidget(name_label)
-            
-            # 添加伸缩项，将重命名按钮推到最右边
-            item_layout.addStretch()
-            
-            # 重命名按钮（最右边，固定位置）
-            rename_btn = QPushButton("重命名")
-            rename_btn.setFixedSize(55, 24)  # 调整宽度和高度
-            rename_btn.setStyleSheet("QPushButton { font-size: 9pt; padding: 2px 4px; }")  # 缩小字号并调整内边距
-            rename_btn.clicked.connect(lambda checked, idx=i: self.rename_config(idx))
-            item_layout.addWidget(rename_btn)
-            
-            # 设置项目高度
-            item.setSizeHint(item_widget.sizeHint())
-            
-            self.ui_manager.config_list.addItem(item)
-            self.ui_manager.config_list.setItemWidget(item, item_widget)
+        # 列表只保存配置引用，图标在行首次绘制时才加载
+        if self._config_search:
+            configs, _ = self.config_manager.search_configs_page(self._config_search, 1, CONFIG_SEARCH_LIMIT)
+        else:
+            configs = self.config_manager.get_all_configs()
+        config_model.set_configs(configs)
+        
+        if selected is not None:
+            row = config_model.row_of(selected.get("id"))
+            if row >= 0:
+                config_list.setCurrentIndex(config_model.index(row))
+        config_list.verticalScrollBar().setValue(scroll_value)
     
-    def on_config_selected(self, item):
-        """处理配置选择事件"""
-        # 获取配置索引
-        config_index = item.data(Qt.UserRole)
-        if config_index is None or config_index < 0 or config_index >= len(self.config_manager.configs):
+    def on_config_search_changed(self, text):
+        """搜索框内容变化：显示匹配的配置（按匹配程度排序）"""
+        self._config_search = text.strip()
+        self.show_config_list()
+        self.ui_manager.config_list.scrollToTop()
+    
+    def on_configs_changed(self, changes):
+        """配置管理器的变化通知：只插入、删除或刷新变化的行，并增量同步给监测线程"""
+        if any(change[0] == "reset" for change in changes):
+            self.load_config_list()
             return
         
+        if self._config_search:
+            # 搜索结果的排名可能变化，重新搜索（索引已增量更新）
+            self.show_config_list()
+        else:
+            self.ui_manager.config_model.apply_changes(changes)
+        
+        # 按键同步：键仍有配置（含同键的重复配置）则更新，否则删除
+        keys = []
+        for _, _, config, old_config in changes:
+            for changed in (config, old_config):
+                if changed is not None:
+                    key = (changed["title"], changed["process"])
+                    if key not in keys:
+                        keys.append(key)
+        upserted = []
+        removed_keys = []
+        for key in keys:
+            config = self.config_manager.get_config_by_window_info(*key)
+            if config is None:
+                removed_keys.append(key)
+            else:
+                upserted.append(config)
+        self.window_monitor.update_configs(upserted, removed_keys)
+    
+    def get_config_icon(self, config):
+        """获取配置列表中显示的图标（列表模型在行首次绘制时调用）"""
+        # 尝试从保存的文件加载图标（支持多级回退匹配）
+        if "icon_file" in config:
+            # 使用配置中保存的图标文件名，同时提供进程名、类名、标题用于回退
+            icon = self.config_manager.load_icon(
+                icon_filename=config["icon_file"],
+                process_name=config["process"],
+                class_name=config.get("class_name"),
+                window_title=config["title"]
+            )
+            if icon and not icon.isNull():
+                return icon
+        
+        # 没有保存的图标：先不带图标绘制，绘制完成后再从正在运行的窗口获取并保存；
+        # 当前窗口中找不到图标的配置等窗口变化后再试，列表重建时不重复排队
+        config_id = config["id"]
+        if config_id not in self._unresolved_config_icons:
+            self.queue_config_icons([config_id])
+        return None
+    
+    def queue_config_icons(self, config_ids):
+        """排队从正在运行的窗口获取配置图标，下一次事件循环时统一处理"""
+        if not self._pending_config_icons:
+            QTimer.singleShot(0, self.resolve_config_icons)
+        self._pending_config_icons.update(config_ids)
+    
+    def update_window_snapshot(self, snapshot):
+        """记录最近一次的窗口快照；窗口有变化时重试之前找不到图标的配置"""
+        # 监测线程的快照排队送达，可能比窗口列表刷新得到的快照更旧
+        if self._window_snapshot is None or snapshot.generation >= self._window_snapshot.generation:
+            self._window_snapshot = snapshot
+        if snapshot.has_changes() and self._unresolved_config_icons:
+            config_ids = self._unresolved_config_icons
+            self._unresolved_config_icons = set()
+            self.queue_config_icons(config_ids)
+    
+    def resolve_config_icons(self):
+        """为等待中的配置从最近一次窗口快照中的窗口获取图标（不重新枚举窗口）"""
+        config_ids = self._pending_config_icons
+        self._pending_config_icons = set()
+        if not config_ids:
+            return
+        
+        snapshot = self._window_snapshot
+        if snapshot is None:
+            # 还没有窗口快照，收到第一个快照后再处理
+            self._unresolved_config_icons.update(config_ids)
+            return
+        
+        match_index = snapshot.match_index
+        unresolved = []
+        for config_id in config_ids:
+            config = self.config_manager.get_config(config_id)
+            if config is None or "icon_file" in config:
+                continue
+            window = match_index.find_first(config["title"], config["process"])
+            if window is not None:
+                # 快照之后窗口可能已关闭，已解析的图标也回填在最新的窗口记录中
+                window = self.window_manager.get_known_window(window["hwnd"])
+            if window is None:
+                self._unresolved_config_icons.add(config_id)
+            elif window.get("icon") is not None:
+                self.save_config_icon(config_id, window, icon_from_image(window["icon"]))
+            else:
+                # 图标交给后台解析，完成后由 on_window_icon_ready 保存
+                waiting = self._config_icon_windows.setdefault(window["hwnd"], [])
+                if config_id not in waiting:
+                    waiting.append(config_id)
+                unresolved.append(window)
+        self.icon_resolver.request(unresolved)
+    
+    def save_config_icon(self, config_id, window, icon):
+        """把从窗口获取的图标保存到图标仓库，下次启动时无需运行中的窗口"""
+        config = self.config_manager.get_config(config_id)
+        if config is None:
+            return
+        if (icon is None or icon.isNull() or
+                (config["title"], config["process"]) != (window["title"], window["process_name"])):
+            # 窗口没有图标或已不匹配，等窗口变化后再试
+            self._unresolved_config_icons.add(config_id)
+            return
+        # 保存后通过变化通知刷新这一行
+        self.config_manager.set_config_icon(config_id, icon)
+    
+    def on_config_file_changed(self, path):
+        """配置文件被其他程序修改：重新读取，差异通过变化通知应用到列表和监测线程"""
+        self.config_manager.reload_configs()
+    
+    def on_config_selected(self, index):
+        """处理配置选择事件"""
         # 获取配置
-        config = self.config_manager.get_config_by_index(config_index)
+        config = self.config_manager.get_config(index.data(Qt.UserRole))
         if not config:
             return
         
@@ -483,14 +576,8 @@ class WindowSizer(QMainWindow):
         self.ui_manager.height_spin.setValue(config["height"])
         
         # 查找匹配的窗口
-        windows = self.window_manager.get_window_list()
-        matched_window = None
-        
-        for window in windows:
-            if (window["title"] == config["title"] and 
-                window["process_name"] == config["process"]):
-                matched_window = window
-                break
+        match_index = self.window_manager.get_window_snapshot().match_index
+        matched_window = match_index.find_first(config["title"], config["process"])
         
         if matched_window:
             self.current_window = matched_window
@@ -501,20 +588,22 @@ class WindowSizer(QMainWindow):
             self.current_window = None
 
     
-    def on_config_enabled_changed(self, config_index, state):
+    def on_config_enabled_changed(self, config_id, state):
         """处理配置激活状态变化"""
-        if 0 <= config_index < len(self.config_manager.configs):
-            config = self.config_manager.configs[config_index]
+        config = self.config_manager.get_config(config_id)
+        if config is not None:
+            config = dict(config)
             config["enabled"] = (state == Qt.Checked)
-            self.config_manager.save_configs()
+            self.config_manager.update_config(config_id, config)
     
-    def rename_config(self, config_index):
+    def rename_config(self, config_id):
         """重命名配置"""
-        if config_index < 0 or config_index >= len(self.config_manager.configs):
+        config = self.config_manager.get_config(config_id)
+        if config is None:
             return
         
         from PyQt5.QtWidgets import QInputDialog
-        config = self.config_manager.configs[config_index]
+        config = dict(config)
         
         # 弹出对话框让用户输入新名称
         new_name, ok = QInputDialog.getText(
@@ -525,33 +614,47 @@ class WindowSizer(QMainWindow):
         )
         
         if ok and new_name.strip():
-            old_icon_file = config.get("icon_file")
+            # 图标文件按内容命名并可能被多个配置共用，重命名配置时不再重命名图标文件
             config["custom_name"] = new_name.strip()
             
-            # 如果有图标文件，需要重新命名图标文件
-            if old_icon_file:
-                old_icon_path = os.path.join(self.config_manager.icons_folder, old_icon_file)
-                if os.path.exists(old_icon_path):
-                    # 生成新的图标文件名
-                    safe_name = self.config_manager.sanitize_filename(new_name.strip())
-                    new_icon_filename = f"{safe_name}.png"
-                    new_icon_path = os.path.join(self.config_manager.icons_folder, new_icon_filename)
-                    
-                    # 重命名图标文件
-                    try:
-                        if old_icon_path != new_icon_path:
-                            # 如果新文件已存在，先删除
-                            if os.path.exists(new_icon_path):
-                                os.remove(new_icon_path)
-                            os.rename(old_icon_path, new_icon_path)
-                            config["icon_file"] = new_icon_filename
-                    except Exception:
-                        pass  # 如果重命名失败，保留原图标文件名
-            
-            self.config_manager.save_configs()
-            self.load_config_list()
+            self.config_manager.update_config(config_id, config)
 
     
+    def show_config_list_menu(self, pos):
+        """配置列表右键菜单"""
+        index = self.ui_manager.config_list.indexAt(pos)
+        if not index.isValid():
+            return
+        menu = QMenu(self)
+        rollback_action = menu.addAction("回滚到历史版本...")
+        rollback_action.triggered.connect(lambda: self.rollback_config(index.data(Qt.UserRole)))
+        menu.exec_(self.ui_manager.config_list.viewport().mapToGlobal(pos))
+    
+    def rollback_config(self, config_id):
+        """列出单个配置的历史版本，回滚到选中的版本"""
+        from PyQt5.QtWidgets import QMessageBox, QInputDialog
+        versions = self.config_manager.get_config_history(config_id)
+        if not versions:
+            QMessageBox.information(self, "历史版本", "该配置还没有历史版本")
+            return
+        
+        # 标签带版本号，同一秒内的多个版本也不会重名
+        version_by_label = {}
+        for version in versions:
+            config = version["config"]
+            label = (
+                f"#{version['version']}  "
+                f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(version['time']))} 之前  "
+                f"位置 ({config['x']}, {config['y']})  尺寸 {config['width']}×{config['height']}"
+            )
+            version_by_label[label] = version["version"]
+        label, ok = QInputDialog.getItem(self, "历史版本", "选择要回滚到的版本：", list(version_by_label), 0, False)
+        if not ok or label not in version_by_label:
+            return
+        
+        if not self.config_manager.rollback_config(config_id, version_by_label[label]):
+            QMessageBox.warning(self, "历史版本", "回滚配置失败")
+    
     def get_executable_path(self):
         """获取可执行文件的完整路径
         
@@ -569,6 +672,9 @@ class WindowSizer(QMainWindow):
     def is_startup_enabled(self):
         """检查是否已启用开机自启动"""
         try:
+            import win32api
+            import win32con
+            
             # 检查注册表
             key = win32api.RegOpenKey(
                 win32con.HKEY_CURRENT_USER, 
@@ -593,6 +699,9 @@ class WindowSizer(QMainWindow):
         enabled = state == Qt.Checked
         
         try:
+            import win32api
+            import win32con
+            
             # 打开注册表
             key = win32api.RegOpenKey(
                 win32con.HKEY_CURRENT_USER, 
@@ -670,16 +779,109 @@ class WindowSizer(QMainWindow):
             self.ui_manager.startup_checkbox.setChecked(self.is_startup_enabled())
 
     
+    def create_progress_dialog(self, title, label):
+        """创建导入导出进度对话框，返回 (对话框, 进度回调)
+        
+        对话框为窗口模态，setValue 时会处理界面事件，耗时不足半秒时不显示。
+        """
+        dialog = QProgressDialog(label, None, 0, 100, self)
+        dialog.setWindowTitle(title)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(500)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        
+        def progress(done, total):
+            value = done * 100 // total if total else 100
+            if value != dialog.value():
+                dialog.setValue(value)
+        
+        return dialog, progress
+    
+    def run_with_progress(self, title, label, operation):
+        """显示进度对话框执行耗时的配置操作，返回 operation(进度回调) 的结果
+        
+        对话框更新进度时会处理界面事件，操作期间暂停配置文件监视和延迟保存，
+        避免在 ConfigManager 修改到一半时重新加载或保存配置。
+        """
+        dialog, progress = self.create_progress_dialog(title, label)
+        self.config_watcher.suspend()
+        saver = self.config_manager.saver
+        saver.suspend()
+        try:
+            return operation(progress)
+        finally:
+            dialog.close()
+            saver.resume()
+            self.config_watcher.resume()
+    
     def import_configs(self):
         """导入配置"""
-        success, message = self.config_manager.import_configs()
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "导入配置", "", "JSON文件 (*.json)")
+        if not file_path:
+            return
+        
+        success, message = self.run_with_progress(
+            "导入配置", "正在导入配置...",
+            lambda progress: self.config_manager.import_configs(file_path, progress))
+        from PyQt5.QtWidgets import QMessageBox
         if success:
-            self.load_config_list()
+            QMessageBox.information(self, "导入配置", message)
+        else:
+            QMessageBox.warning(self, "导入配置", message)
+    
     def export_configs(self):
         """导出配置"""
-        success, message = self.config_manager.export_configs()
-        if success:
-            pass
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出配置", "window_configs.json", "JSON文件 (*.json)")
+        if not file_path:
+            return
+        
+        success, message = self.run_with_progress(
+            "导出配置", "正在导出配置...",
+            lambda progress: self.config_manager.export_configs(file_path, progress))
+        if not success:
+            from PyQt5.QtWidgets import QMessageBox
+            QMessageBox.warning(self, "导出配置", message)
+    
+    def backup_configs(self):
+        """备份当前配置（与最新备份内容相同时不生成新版本）"""
+        from PyQt5.QtWidgets import QMessageBox
+        backup_id = self.run_with_progress(
+            "备份配置", "正在备份配置...", self.config_manager.backup_configs)
+        if backup_id:
+            QMessageBox.information(self, "备份配置", f"配置已备份（版本 {backup_id}）")
+        else:
+            QMessageBox.warning(self, "备份配置", "备份配置失败")
+    
+    def restore_backup(self):
+        """列出所有备份版本，恢复选中的版本"""
+        from PyQt5.QtWidgets import QMessageBox, QInputDialog
+        backups = self.config_manager.list_backups()
+        if not backups:
+            QMessageBox.information(self, "恢复备份", "还没有任何备份")
+            return
+        
+        # 标签带备份ID，时间相同的备份也能区分
+        backup_id_by_label = {
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(backup['created_at']))}"
+            f"  （{backup['count']} 个配置）  版本 {backup['id']}": backup["id"]
+            for backup in backups
+        }
+        label, ok = QInputDialog.getItem(self, "恢复备份", "选择要恢复的备份版本：", list(backup_id_by_label), 0, False)
+        if not ok or label not in backup_id_by_label:
+            return
+        backup_id = backup_id_by_label[label]
+        
+        # 恢复前先备份当前配置，恢复操作可以撤销
+        self.config_manager.backup_configs()
+        success = self.run_with_progress(
+            "恢复备份", "正在恢复配置...",
+            lambda progress: self.config_manager.restore_configs(backup_id, progress))
+        if not success:
+            QMessageBox.warning(self, "恢复备份", "恢复配置失败")
+    
     def load_settings(self):
         """加载所有设置"""
         settings = QSettings("WindowSizer", "Settings")
@@ -751,34 +953,41 @@ class WindowSizer(QMainWindow):
         self.auto_apply_config = state == Qt.Checked
         self.save_settings()
         
-        # 如果开启自动应用，启动监测；否则停止
-        if self.auto_apply_config:
-            # 启动自动应用逻辑
-            pass
-        else:
-            # 停止自动应用逻辑
-            pass
+        # 如果开启自动应用，下次监测时重新检查所有窗口；否则停止
+        self.window_monitor.set_auto_apply(self.auto_apply_config)
     def quit_program(self):
         """退出程序"""
+        self.shutdown_workers()
         QApplication.quit()
     
+    def shutdown_workers(self):
+        """停止后台线程"""
+        self.window_monitor.stop()
+        self.config_watcher.stop()
+        self.icon_resolver.shutdown()
+        self.config_manager.close()
+    
     def start_window_monitor(self):
-        """启动窗口状态监测"""
-        self.window_monitor_timer = QTimer(self)
-        self.window_monitor_timer.timeout.connect(self.check_window_status)
-        self.window_monitor_timer.start(5000)  # 每5秒检查一次
+        """启动窗口状态监测（在后台线程中运行）"""
+        self.window_monitor.set_auto_apply(self.auto_apply_config)
+        self.window_monitor.start()
     
-    def check_window_status(self):
-        """检查窗口状态，实现自动应用配置功能"""
+    def on_monitor_snapshot(self, snapshot):
+        """接收监测线程的窗口快照（GUI线程）"""
+        self.update_window_snapshot(snapshot)
+        
         # 检查当前窗口是否仍然有效
-        if self.current_window and not self.window_manager.is_window_valid(self.current_window["hwnd"]):
-
+        if self.current_window and snapshot.get(self.current_window["hwnd"]) is None:
             self.current_window = None
-            return
-        
-        # 如果启用了自动应用配置，检查所有配置的窗口
-        if self.auto_apply_config:
-            self.auto_apply_configs()
+    
+    def on_auto_apply_finished(self, results):
+        """接收监测线程的自动应用结果（GUI线程），在托盘提示中显示最近一次的结果"""
+        success_count = sum(1 for _, success, _ in results if success)
+        fail_count = len(results) - success_count
+        self.ui_manager.tray_icon.setToolTip(
+            f"WindowSizer - 窗口大小调整工具\n"
+            f"上次自动应用：成功 {success_count} 个，失败 {fail_count} 个"
+        )
     
     def closeEvent(self, event):
         """处理窗口关闭事件"""
@@ -789,6 +998,7 @@ class WindowSizer(QMainWindow):
         else:
             # 直接退出，确保完全终止所有进程
             event.accept()
+            self.shutdown_workers()
             QApplication.quit()
 
 
@@ -0,0 +1,118 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# 测试在无桌面环境下运行，使用模拟窗口后端和离屏Qt平台
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QSettings, QEvent
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """整个测试会话共用的QApplication"""
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(tmp_path_factory):
+    """设置写入临时目录，不读取也不修改用户的实际设置"""
+    settings_dir = str(tmp_path_factory.mktemp("settings"))
+    QSettings.setDefaultFormat(QSettings.IniFormat)
+    QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, settings_dir)
+    QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, settings_dir)
+
+
+def write_configs(path, configs):
+    """像外部工具一样直接写入配置文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(configs, f, ensure_ascii=False, indent=2)
+
+
+def make_config(title, process="app.exe", x=0, y=0, width=800, height=600, **fields):
+    """测试用的窗口配置（其他字段如 class_name、custom_name 通过关键字参数传入）"""
+    config = {"title": title, "process": process, "x": x, "y": y, "width": width, "height": height}
+    config.update(fields)
+    return config
+
+
+@pytest.fixture
+def manager_factory(qapp, tmp_path):
+    """创建使用临时配置目录的ConfigManager，测试结束时全部关闭
+
+    mode 为None时与程序一样按设置项选择存储模式；同一测试中再次创建相当于
+    重启程序后重新加载同一目录。
+    """
+    from config_manager import ConfigManager
+
+    managers = []
+
+    def create(mode="json", config_path=None):
+        manager = ConfigManager(config_path=config_path or str(tmp_path), storage_mode=mode)
+        managers.append(manager)
+        return manager
+
+    yield create
+    for manager in managers:
+        manager.close()
+
+
+@pytest.fixture
+def monitor_factory(qapp):
+    """创建使用模拟事件源的WindowMonitor，测试结束时全部停止"""
+    from window_monitor import WindowMonitor
+
+    monitors = []
+
+    def create(backend, window_manager, **kwargs):
+        kwargs.setdefault("event_source", backend.event_source)
+        kwargs.setdefault("reconcile_interval", 60000)
+        kwargs.setdefault("event_debounce", 20)
+        monitor = WindowMonitor(window_manager, **kwargs)
+        monitors.append(monitor)
+        return monitor
+
+    yield create
+    for monitor in monitors:
+        monitor.stop()
+
+
+@pytest.fixture
+def wait_until(qapp):
+    """处理Qt事件直到条件成立，超时返回False"""
+    def wait(predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            qapp.processEvents()
+            if predicate():
+                return True
+            time.sleep(0.01)
+        qapp.processEvents()
+        return predicate()
+    return wait
+
+
+@pytest.fixture
+def main_window(qapp, tmp_path, monkeypatch):
+    """使用模拟窗口后端和临时配置目录的主窗口（监测线程已停止）"""
+    import main
+    from config_manager import ConfigManager
+    from window_backend import SimulatedBackend
+    from window_manager import WindowManager
+
+    monkeypatch.setattr(main, "is_admin", lambda: True)
+    window_manager = WindowManager(backend=SimulatedBackend())
+    config_manager = ConfigManager(config_path=str(tmp_path / "configs"), storage_mode="json")
+    window = main.WindowSizer(window_manager=window_manager, config_manager=config_manager,
+                              themes_folder=str(tmp_path / "themes"))
+    window.window_monitor.stop()
+    yield window
+    window.shutdown_workers()
+    window.config_manager.close()
+    window.deleteLater()
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
@@ -0,0 +1,131 @@
+import json
+import os
+import time
+
+import pytest
+
+from backup_store import BackupStore
+from conftest import make_config
+
+
+def blob_files(store):
+    return sorted(os.listdir(store.blobs_folder))
+
+
+def write_legacy_backup(config_file, timestamp, configs):
+    path = f"{config_file}.backup.{timestamp}"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(configs, f)
+    return path
+
+
+def test_identical_content_is_deduplicated(tmp_path):
+    store = BackupStore(str(tmp_path / "backups"))
+    now = time.time()
+    first, created = store.add([make_config("A")], created_at=now)
+    assert created
+
+    # 与最新备份相同时不生成新版本
+    same, created = store.add([make_config("A")], created_at=now + 1)
+    assert not created
+    assert same["id"] == first["id"]
+    assert len(store.list_backups()) == 1
+
+    # 与更早的版本相同时生成新版本，但共用内容文件
+    store.add([make_config("B")], created_at=now + 2)
+    again, created = store.add([make_config("A")], created_at=now + 3)
+    assert created
+    assert again["hash"] == first["hash"]
+    assert len(store.list_backups()) == 3
+    assert len(blob_files(store)) == 2
+    assert store.load(again["id"]) == [make_config("A")]
+
+
+def test_prune_by_count_removes_unreferenced_blobs(tmp_path):
+    store = BackupStore(str(tmp_path / "backups"), max_count=2, max_age_days=0)
+    now = time.time()
+    for i in range(4):
+        store.add([make_config("A", x=i)], created_at=now + i)
+
+    backups = store.list_backups()
+    assert [store.load(entry["id"])[0]["x"] for entry in backups] == [3, 2]
+    assert len(blob_files(store)) == 2
+
+
+def test_prune_by_age_keeps_newest(tmp_path):
+    store = BackupStore(str(tmp_path / "backups"), max_count=0, max_age_days=1)
+    old = time.time() - 10 * 86400
+    store.add([make_config("A")], created_at=old)
+    store.add([make_config("B")], created_at=old + 1)
+
+    backups = store.list_backups()
+    assert len(backups) == 1
+    assert backups[0]["created_at"] == old + 1
+
+    store.add([make_config("C")])
+    assert [entry["count"] for entry in store.list_backups()] == [1]
+    assert len(blob_files(store)) == 1
+
+
+def test_migration_removes_every_imported_legacy_file(tmp_path, monkeypatch):
+    config_file = str(tmp_path / "window_configs.json")
+    store = BackupStore(str(tmp_path / "backups"), max_count=2, max_age_days=0)
+    now = int(time.time())
+    paths = [write_legacy_backup(config_file, now + i, [make_config("A", x=i)]) for i in range(3)]
+    broken = f"{config_file}.backup.{now - 1}"
+    with open(broken, "w", encoding="utf-8") as f:
+        f.write("[{")
+
+    assert store.migrate_legacy_backups(config_file) == 3
+    assert [store.load(entry["id"])[0]["x"] for entry in store.list_backups()] == [2, 1]
+    # 超出保留策略的旧备份也被删除，不会在下次迁移时重复导入；读取失败的文件保留
+    assert not any(os.path.exists(path) for path in paths)
+    assert os.path.exists(broken)
+
+    # 再次迁移不会重新导入已处理的文件
+    monkeypatch.setattr(BackupStore, "add", lambda self, *args, **kwargs: pytest.fail("重复导入"))
+    assert store.migrate_legacy_backups(config_file) == 0
+
+
+def test_reimporting_same_legacy_backup_is_not_duplicated(tmp_path):
+    config_file = str(tmp_path / "window_configs.json")
+    store = BackupStore(str(tmp_path / "backups"), max_count=5, max_age_days=0)
+    now = int(time.time())
+    write_legacy_backup(config_file, now, [make_config("A")])
+    write_legacy_backup(config_file, now + 1, [make_config("B")])
+    store.migrate_legacy_backups(config_file)
+
+    # 上次删除原文件失败，再次导入
+    write_legacy_backup(config_file, now, [make_config("A")])
+    assert store.migrate_legacy_backups(config_file) == 1
+    assert [entry["created_at"] for entry in store.list_backups()] == [now + 1, now]
+
+
+def test_migration_does_not_prune_between_imports(tmp_path):
+    config_file = str(tmp_path / "window_configs.json")
+    store = BackupStore(str(tmp_path / "backups"), max_count=3, max_age_days=0)
+    now = int(time.time())
+    store.add([make_config("Current")], created_at=now + 100)
+    store.add([make_config("Current", x=1)], created_at=now + 200)
+    for i in range(2):
+        write_legacy_backup(config_file, now + i, [make_config("A", x=i)])
+
+    # 旧备份比已有版本更早，全部导入后统一清理，只有最新的一个能保留下来
+    assert store.migrate_legacy_backups(config_file) == 2
+    assert [entry["created_at"] for entry in store.list_backups()] == [now + 200, now + 100, now + 1]
+    assert len(blob_files(store)) == 3
+
+
+def test_manager_migrates_once_at_startup(manager_factory, tmp_path, monkeypatch):
+    config_file = str(tmp_path / "window_configs.json")
+    now = int(time.time())
+    path = write_legacy_backup(config_file, now, [make_config("A")])
+    manager = manager_factory()
+    assert not os.path.exists(path)
+    assert [entry["count"] for entry in manager.list_backups()] == [1]
+
+    migrations = []
+    monkeypatch.setattr(BackupStore, "migrate_legacy_backups", lambda self, config_file: migrations.append(1))
+    manager.list_backups()
+    assert manager.backup_configs() is not None
+    assert migrations == []
@@ -0,0 +1,98 @@
+import config_history
+from config_history import ConfigHistory
+from conftest import make_config
+
+
+def edit(config, **changes):
+    new_config = dict(config)
+    for key, value in changes.items():
+        if value is None:
+            new_config.pop(key, None)
+        else:
+            new_config[key] = value
+    return new_config
+
+
+def test_versions_restore_every_earlier_state(tmp_path):
+    history = ConfigHistory(str(tmp_path / "window_configs.json"))
+    states = [make_config("A")]
+    states.append(edit(states[-1], x=10, custom_name="Editor"))
+    states.append(edit(states[-1], width=1024, custom_name=None))
+    states.append(edit(states[-1], title="A2"))  # 修改标题后历史随配置转移
+    for i, (old, new) in enumerate(zip(states, states[1:])):
+        assert history.record(old, new, timestamp=i)
+
+    versions = history.versions(states[-1])
+    assert [entry["version"] for entry in versions] == [1, 2, 3]
+    assert [entry["config"] for entry in versions] == states[-2::-1]
+    assert [entry["time"] for entry in versions] == [2, 1, 0]
+    assert history.versions(states[-1], limit=2) == versions[:2]
+    assert history.version(states[-1], 3) == states[0]
+    assert history.version(states[-1], 4) is None
+    assert history.count(states[2]) == 0
+    history.close()
+
+    # 重新读取历史文件得到相同结果
+    reloaded = ConfigHistory(str(tmp_path / "window_configs.json"))
+    assert reloaded.versions(states[-1]) == versions
+    reloaded.close()
+
+
+def test_timestamp_only_changes_are_not_recorded(tmp_path):
+    history = ConfigHistory(str(tmp_path / "window_configs.json"))
+    config = dict(make_config("A"), updated_at=1)
+    assert not history.record(config, dict(config, updated_at=2))
+    assert not history.record(config, config)
+    assert history.count(config) == 0
+    history.close()
+
+
+def test_depth_and_compaction_keep_only_recent_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_history, "HISTORY_COMPACT_MIN_LINES", 10)
+    history = ConfigHistory(str(tmp_path / "window_configs.json"), depth=3)
+    config = make_config("A")
+    for x in range(1, 30):
+        new_config = edit(config, x=x)
+        history.record(config, new_config)
+        config = new_config
+    other = make_config("B")
+    history.record(other, edit(other, x=1))
+    history.forget(edit(other, x=1))
+
+    assert [entry["config"]["x"] for entry in history.versions(config)] == [28, 27, 26]
+    history.close()
+    with open(history.history_file, "rb") as f:
+        assert len(f.readlines()) <= 10
+
+    reloaded = ConfigHistory(str(tmp_path / "window_configs.json"), depth=3)
+    assert reloaded.versions(config) == history.versions(config)
+    assert reloaded.count(edit(other, x=1)) == 0
+    reloaded.close()
+
+
+def test_rollback_only_touches_one_config_and_can_be_undone(manager_factory):
+    manager = manager_factory("journal")
+    manager.add_config(make_config("A"))
+    manager.add_config(make_config("B"))
+    a_id, b_id = (config["id"] for config in manager.configs)
+    original = dict(manager.get_config(a_id))
+    manager.update_config(a_id, edit(manager.get_config(a_id), x=10))
+    manager.update_config(a_id, edit(manager.get_config(a_id), x=20, title="A2"))
+    manager.update_config(b_id, edit(manager.get_config(b_id), x=5))
+
+    assert [entry["config"]["x"] for entry in manager.get_config_history(a_id)] == [10, 0]
+    assert manager.rollback_config(a_id, version=2)
+    rolled_back = manager.get_config(a_id)
+    assert edit(rolled_back, updated_at=None) == edit(original, updated_at=None)
+    assert manager.get_config(b_id)["x"] == 5
+
+    # 回滚本身也是一个历史版本
+    assert manager.rollback_config(a_id)
+    assert (manager.get_config(a_id)["title"], manager.get_config(a_id)["x"]) == ("A2", 20)
+    assert not manager.rollback_config(a_id, version=10)
+    manager.close()
+
+    restarted = manager_factory("journal")
+    assert [entry["config"]["x"] for entry in restarted.get_config_history(a_id)] == [0, 20, 10, 0]
+    restarted.delete_config(b_id)
+    assert restarted.get_config_history(b_id) == []
@@ -0,0 +1,73 @@
+from config_list_model import ConfigListModel
+
+
+def make_configs(count, start=0):
+    return [{"id": f"c{i}", "title": f"Window {i}", "process": "app.exe"} for i in range(start, start + count)]
+
+
+def record_signals(model):
+    """记录模型发出的行插入、删除和数据变化信号"""
+    calls = []
+    model.rowsInserted.connect(lambda parent, first, last: calls.append(("inserted", first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: calls.append(("removed", first, last)))
+    model.dataChanged.connect(lambda top, bottom: calls.append(("changed", top.row(), bottom.row())))
+    return calls
+
+
+def assert_rows_match(model):
+    for row in range(model.rowCount()):
+        assert model.row_of(model.config(row)["id"]) == row
+
+
+def test_contiguous_inserts_are_merged_into_one_call(qapp):
+    model = ConfigListModel()
+    model.set_configs(make_configs(3))
+    calls = record_signals(model)
+
+    new = make_configs(3, start=10)
+    model.apply_changes([("inserted", 1 + i, config, None) for i, config in enumerate(new)])
+
+    assert calls == [("inserted", 1, 3)]
+    assert [model.config(row)["id"] for row in range(model.rowCount())] == ["c0", "c10", "c11", "c12", "c1", "c2"]
+    assert_rows_match(model)
+
+
+def test_contiguous_removes_are_merged_into_one_call(qapp):
+    model = ConfigListModel()
+    configs = make_configs(6)
+    model.set_configs(configs)
+    calls = record_signals(model)
+
+    # ConfigManager 从后往前删除，行号依次递减
+    model.apply_changes([("removed", row, None, configs[row]) for row in (4, 3, 2)])
+
+    assert calls == [("removed", 2, 4)]
+    assert [model.config(row)["id"] for row in range(model.rowCount())] == ["c0", "c1", "c5"]
+    assert model.row_of("c3") == -1
+    assert_rows_match(model)
+
+
+def test_non_contiguous_changes_are_applied_separately(qapp):
+    model = ConfigListModel()
+    configs = make_configs(6)
+    model.set_configs(configs)
+    calls = record_signals(model)
+
+    model.apply_changes([("removed", 4, None, configs[4]), ("removed", 1, None, configs[1])])
+
+    assert calls == [("removed", 4, 4), ("removed", 1, 1)]
+    assert_rows_match(model)
+
+
+def test_updated_rows_emit_data_changed(qapp):
+    model = ConfigListModel()
+    configs = make_configs(4)
+    model.set_configs(configs)
+    calls = record_signals(model)
+
+    renamed = dict(configs[2], custom_name="Renamed")
+    model.apply_changes([("updated", 2, renamed, configs[2])])
+
+    assert calls == [("changed", 2, 2)]
+    assert model.data(model.index(2)) == "Renamed"
+    assert model.row_of("c2") == 2
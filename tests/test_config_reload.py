@@ -0,0 +1,84 @@
+import pytest
+
+from conftest import make_config, write_configs
+
+
+@pytest.mark.parametrize("mode", ["json", "journal"])
+def test_reload_applies_only_the_delta(manager_factory, mode):
+    manager = manager_factory(mode)
+    for title in ("A", "B", "C", "D"):
+        manager.add_config(make_config(title))
+    assert manager.save_configs()
+    ids = {config["title"]: config["id"] for config in manager.configs}
+    unchanged = manager.configs[0]
+
+    changes = []
+    manager.add_change_listener(changes.extend)
+    external = [dict(config) for config in manager.configs]
+    external[1]["x"] = 50  # B 修改
+    del external[2]  # C 删除
+    external.append(make_config("E"))  # 外部工具写入的新配置没有ID
+    write_configs(manager.config_file, external)
+
+    delta = manager.reload_configs()
+    assert delta["removed"] == [2]
+    assert [config["title"] for config in delta["removed_configs"]] == ["C"]
+    assert delta["changed"] == [1]
+    assert delta["added"] == [3]
+    assert [config["title"] for config in manager.configs] == ["A", "B", "D", "E"]
+    assert manager.configs[0] is unchanged
+    assert manager.get_config(ids["B"])["x"] == 50
+    assert manager.get_config(ids["C"]) is None
+    assert manager.configs[3]["id"] not in ids.values()
+    assert [change[0] for change in changes] == ["removed", "updated", "inserted"]
+
+    # 没有变化时不通知
+    changes.clear()
+    delta = manager.reload_configs()
+    assert not (delta["removed"] or delta["changed"] or delta["added"])
+    assert changes == []
+
+
+def test_reload_pairs_duplicate_keys_in_order(manager_factory):
+    manager = manager_factory("json")
+    manager.configs = [make_config("A", x=1), make_config("A", x=2), make_config("B")]
+    manager._rebuild_index()
+    assert manager.save_configs()
+
+    external = [dict(config) for config in manager.configs]
+    external[1]["x"] = 20
+    del external[0]
+    write_configs(manager.config_file, external)
+
+    delta = manager.reload_configs()
+    # 按出现顺序配对：第一个A与文件中剩下的A配对并被替换，第二个A被移除
+    assert delta["removed"] == [1]
+    assert [config["x"] for config in manager.configs] == [20, 0]
+    assert manager.get_config_by_window_info("A", "app.exe")["x"] == 20
+
+
+def test_reload_of_unreadable_file_keeps_configs(manager_factory):
+    manager = manager_factory("json")
+    manager.add_config(make_config("A"))
+    manager.save_configs()
+    with open(manager.config_file, "w", encoding="utf-8") as f:
+        f.write("[{\"title\": ")
+    assert manager.reload_configs() is None
+    assert len(manager.configs) == 1
+
+
+def test_sqlite_reload_matches_restart(manager_factory, tmp_path):
+    manager = manager_factory("sqlite")
+    assert manager.get_watch_path() is None
+    for title in ("A", "B"):
+        manager.add_config(make_config(title))
+
+    # 旧的JSON文件不是数据来源，重新加载不会删除只存在于数据库中的配置
+    write_configs(manager.config_file, [make_config("Stale")])
+    delta = manager.reload_configs()
+    assert not (delta["removed"] or delta["changed"] or delta["added"])
+    assert [config["title"] for config in manager.configs] == ["A", "B"]
+
+    manager.close()
+    restarted = manager_factory("sqlite")
+    assert [config["title"] for config in restarted.configs] == ["A", "B"]
@@ -0,0 +1,145 @@
+import random
+
+import pytest
+
+import config_search
+from conftest import make_config
+from config_search import SEARCH_FIELDS, ConfigSearchIndex, SearchIndexBuilder
+
+
+ALPHABET = "abcAB ßé"
+
+
+def reference_search(configs, query, limit=None):
+    """逐个配置核对的参考实现，排名规则与 ConfigSearchIndex 的说明一致"""
+    terms = query.casefold().split()
+    if not terms:
+        return [], 0
+    phrase = " ".join(terms)
+    ranked = []
+    for order, config in enumerate(configs):
+        fields = [str(config.get(name) or "").casefold() for name in SEARCH_FIELDS]
+        text = "\n".join(fields)
+        if not all(term in text for term in terms):
+            continue
+        tier = next((field_no for field_no, field in enumerate(fields) if field == phrase), None)
+        if tier is None:
+            tier = next((len(fields) + field_no for field_no, field in enumerate(fields)
+                         if field.startswith(phrase)), 2 * len(fields))
+        ranked.append((tier, order, config))
+    ranked.sort(key=lambda item: item[:2])
+    results = [config for _, _, config in ranked]
+    return (results if limit is None else results[:limit]), len(results)
+
+
+def random_text(rng, max_length=8):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+
+def random_config(rng, config_id):
+    config = {"id": config_id, "title": random_text(rng), "process": rng.choice(["ab.exe", "Abc.exe", "b"])}
+    if rng.random() < 0.5:
+        config["custom_name"] = random_text(rng)
+    if rng.random() < 0.5:
+        config["class_name"] = rng.choice(["AB", "abc", "Cab"])
+    return config
+
+
+def random_query(rng, configs):
+    """多数查询取自现有字段的片段，保证有命中；其余为随机文本"""
+    if configs and rng.random() < 0.7:
+        config = rng.choice(configs)
+        text = str(config.get(rng.choice(SEARCH_FIELDS)) or "")
+        start = rng.randint(0, len(text))
+        text = text[start:rng.randint(start, len(text))]
+        if rng.random() < 0.3:
+            text = text.upper() + " " + random_text(rng, 2)
+        return text
+    return random_text(rng, 5)
+
+
+def assert_same_results(index, configs, query):
+    expected, expected_total = reference_search(configs, query)
+    results, total = index.search(query)
+    assert [config["id"] for config in results] == [config["id"] for config in expected], query
+    assert total == expected_total
+    for limit in (1, 3):
+        results, total = index.search(query, limit=limit)
+        assert [config["id"] for config in results] == [config["id"] for config in expected[:limit]], query
+        assert total == expected_total
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_search_matches_reference_under_random_edits(seed, monkeypatch):
+    monkeypatch.setattr(config_search, "COMPACT_MIN_DEAD", 5)
+    rng = random.Random(seed)
+    configs = [random_config(rng, i) for i in range(40)]
+    index = ConfigSearchIndex(configs)
+    next_id = len(configs)
+    for _ in range(150):
+        action = rng.random()
+        if action < 0.3:
+            configs.append(random_config(rng, next_id))
+            next_id += 1
+            index.add(configs[-1])
+        elif action < 0.6 and configs:
+            # 替换为新的字典对象，ID和位置不变
+            position = rng.randrange(len(configs))
+            configs[position] = random_config(rng, configs[position]["id"])
+            index.add(configs[position])
+        elif configs:
+            index.remove(configs.pop(rng.randrange(len(configs))))
+        assert len(index) == len(configs)
+        assert_same_results(index, configs, random_query(rng, configs))
+
+
+def test_exact_and_prefix_matches_rank_first():
+    configs = [
+        {"id": 1, "title": "my notes", "process": "editor.exe"},
+        {"id": 2, "title": "notes", "process": "a.exe"},
+        {"id": 3, "title": "Notes draft", "process": "b.exe"},
+        {"id": 4, "title": "x", "process": "notes", "custom_name": "other"},
+        {"id": 5, "title": "y", "process": "c.exe", "custom_name": "NOTES"},
+    ]
+    index = ConfigSearchIndex(configs)
+    results, total = index.search("notes")
+    # 完全相同（先自定义名称再标题、进程名）> 以搜索文本开头 > 其他
+    assert [config["id"] for config in results] == [5, 2, 4, 3, 1]
+    assert total == 5
+    assert [config["id"] for config in index.search("NOTES draft")[0]] == [3]
+    assert index.search("missing") == ([], 0)
+    assert index.search("   ") == ([], 0)
+
+
+def test_builder_applies_changes_made_while_building():
+    configs = [{"id": i, "title": f"window {i}", "process": "app.exe"} for i in range(200)]
+    builder = SearchIndexBuilder(configs)
+    removed = configs.pop(10)
+    builder.remove(removed)
+    configs[0] = dict(configs[0], title="renamed")
+    builder.add(configs[0])
+    configs.append({"id": 200, "title": "window new", "process": "app.exe"})
+    builder.add(configs[-1])
+
+    index = builder.result()
+    assert len(index) == len(configs)
+    for query in ("window", "renamed", "window 10", "app.exe", "new"):
+        assert_same_results(index, configs, query)
+
+
+def test_manager_search_follows_config_changes(manager_factory):
+    manager = manager_factory("json")
+    for i in range(30):
+        manager.add_config(make_config(f"Window {i}"))
+    manager.prepare_search_index()
+    first_id = manager.configs[0]["id"]
+    manager.update_config(first_id, dict(manager.get_config(first_id), custom_name="window 2"))
+    manager.delete_config(manager.configs[5]["id"])
+
+    for query in ("window 2", "WINDOW", "app", "window 5"):
+        expected, total = reference_search(manager.configs, query)
+        assert manager.filter_configs(query) == expected
+        page, page_total = manager.search_configs_page(query, 2, 4)
+        assert page == expected[4:8]
+        assert page_total == total
+    manager.close()
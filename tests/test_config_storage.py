@@ -0,0 +1,99 @@
+import json
+import os
+
+from config_storage import DebouncedSaver, JsonConfigStorage, file_signature, is_own_write, write_json_atomic
+from conftest import make_config, write_configs
+
+
+def read_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CountingStorage:
+    def __init__(self, fail=False):
+        self.saved = []
+        self.fail = fail
+
+    def save_all(self, configs):
+        if self.fail:
+            raise OSError("disk full")
+        self.saved.append(configs)
+
+
+def test_debounced_saver_merges_changes(qapp, wait_until):
+    configs = [make_config("A")]
+    storage = CountingStorage()
+    saver = DebouncedSaver(storage, lambda: configs, delay=50)
+    for x in range(5):
+        configs[0] = dict(configs[0], x=x)
+        saver.schedule()
+    assert storage.saved == []
+    assert wait_until(lambda: storage.saved and not saver.has_pending())
+    assert len(storage.saved) == 1
+    assert storage.saved[0][0]["x"] == 4
+    saver.close()
+
+
+def test_debounced_saver_keeps_snapshot_after_failure(qapp):
+    configs = [make_config("A")]
+    storage = CountingStorage(fail=True)
+    saver = DebouncedSaver(storage, lambda: configs, delay=10000)
+    saver.schedule([{"op": "put", "key": ["A", "app.exe"], "config": configs[0]}])
+    assert not saver.flush()
+    assert saver.has_pending()
+    assert len(saver.unsaved_records()) == 1
+
+    storage.fail = False
+    assert saver.flush()
+    assert not saver.has_pending()
+    assert saver.unsaved_records() == []
+    saver.close()
+
+
+def test_atomic_write_is_recorded_as_own_write(tmp_path):
+    path = str(tmp_path / "configs.json")
+    write_json_atomic(path, [make_config("A")])
+    assert is_own_write(path, file_signature(path))
+    assert not os.path.exists(path + ".tmp")
+
+    write_configs(path, [make_config("A"), make_config("B")])
+    assert not is_own_write(path, file_signature(path))
+
+
+def test_json_reload_keeps_unsaved_local_changes(manager_factory):
+    manager = manager_factory("json")
+    for title in ("A", "B", "C"):
+        manager.add_config(make_config(title))
+    assert manager.flush()
+
+    # 本地修改尚在等待合并保存时，外部程序修改了配置文件
+    config_a = manager.configs[0]
+    manager.update_config(config_a["id"], dict(config_a, x=111))
+    manager.delete_config(manager.configs[2]["id"])
+    assert manager.saver.has_pending()
+
+    external = read_file(manager.config_file)
+    external[1]["x"] = 222
+    external.append(make_config("D"))
+    write_configs(manager.config_file, external)
+
+    assert manager.reload_configs() is not None
+    by_title = {config["title"]: config for config in manager.configs}
+    assert sorted(by_title) == ["A", "B", "D"]
+    assert by_title["A"]["x"] == 111
+    assert by_title["B"]["x"] == 222
+
+    assert manager.flush()
+    saved = {config["title"]: config["x"] for config in read_file(manager.config_file)}
+    assert saved == {"A": 111, "B": 222, "D": 0}
+
+
+def test_json_reload_without_local_changes_takes_file(manager_factory):
+    manager = manager_factory("json")
+    manager.add_config(make_config("A"))
+    assert manager.flush()
+
+    JsonConfigStorage(manager.config_file).save_all([dict(manager.configs[0], x=5)])
+    manager.reload_configs()
+    assert manager.configs[0]["x"] == 5
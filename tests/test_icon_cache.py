@@ -0,0 +1,100 @@
+from PyQt5.QtGui import QImage
+
+from window_backend import SimulatedBackend
+from window_manager import IconCache, WindowManager
+
+
+def make_image(size=16):
+    """ARGB32 图像每像素4字节，16x16 占 1024 字节"""
+    image = QImage(size, size, QImage.Format_ARGB32)
+    image.fill(0)
+    return image
+
+
+def test_evicts_least_recently_used_by_entry_count():
+    cache = IconCache(max_entries=2)
+    cache.put("a", make_image())
+    cache.put("b", make_image())
+    assert cache.get("a") is not None  # a 变为最近使用
+    cache.put("c", make_image())
+
+    assert not cache.contains("b")
+    assert cache.contains("a") and cache.contains("c")
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_evicts_by_byte_size_and_tracks_total():
+    cache = IconCache(max_entries=100, max_bytes=2500)
+    cache.put("a", make_image())
+    cache.put("b", make_image())
+    assert cache.total_bytes == 2048
+
+    # 替换同一个键不会重复计算大小
+    cache.put("b", make_image())
+    assert cache.total_bytes == 2048
+    assert cache.stats()["evictions"] == 0
+
+    cache.put("c", make_image())
+    assert not cache.contains("a")
+    assert cache.total_bytes == 2048
+
+    # 单个条目超过上限时也不会保留
+    cache.put("big", make_image(32))
+    assert cache.stats()["entries"] == 0
+    assert cache.total_bytes == 0
+
+
+def test_hit_and_miss_counters():
+    cache = IconCache()
+    assert cache.get("a") is None
+    cache.put("a", make_image())
+    assert cache.get("a") is not None
+    assert cache.contains("a") and not cache.contains("b")  # 不计入命中和未命中
+    cache.invalidate("a")
+    cache.invalidate("a")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 1, 1)
+    cache.clear()
+    assert cache.stats()["hits"] == 1
+
+
+def test_reused_hwnd_invalidates_only_its_entry():
+    cache = IconCache()
+    hwnd_key = IconCache.hwnd_key(42)
+    exe_key = IconCache.exe_key("C:\\Apps\\Tool.exe")
+    cache.put(hwnd_key, make_image())
+    cache.put(exe_key, make_image())
+
+    assert not cache.check_owner(42, 100)
+    assert not cache.check_owner(42, 100)
+    assert cache.contains(hwnd_key)
+
+    # 句柄被另一个进程复用
+    assert cache.check_owner(42, 200)
+    assert not cache.contains(hwnd_key)
+    assert cache.contains(exe_key)
+
+    cache.put(hwnd_key, make_image())
+    cache.forget_hwnd(42)
+    assert not cache.contains(hwnd_key)
+    assert not cache.check_owner(42, 300)  # 关闭后重新出现的句柄不算复用
+
+
+def test_window_icons_are_shared_per_executable(qapp):
+    backend = SimulatedBackend()
+    exe = "C:\\Apps\\editor.exe"
+    pid = backend.add_process("editor.exe", exe=exe)
+    hwnds = [backend.add_window(f"Editor {i}", pid=pid) for i in range(3)]
+    manager = WindowManager(backend=backend)
+    windows = manager.get_window_snapshot(since=0).windows
+    backend.reset_call_counts()
+
+    icons = [manager.get_window_icon(window["hwnd"], window["class_name"], window["process_name"])
+             for window in windows]
+    assert all(not icon.isNull() for icon in icons)
+    assert backend.call_counts.get("ExtractIcon") == 1
+    stats = manager.get_icon_cache_stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == len(hwnds) - 1
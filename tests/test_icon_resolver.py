@@ -0,0 +1,48 @@
+from window_backend import SimulatedBackend
+from window_manager import WindowManager, IconResolver, IconCache
+
+
+def make_resolver(latency=0.0):
+    backend = SimulatedBackend(latency=latency)
+    window_manager = WindowManager(backend=backend)
+    return backend, window_manager, IconResolver(window_manager, max_workers=4)
+
+
+def test_same_exe_extracted_once_while_in_flight(qapp, wait_until):
+    backend, window_manager, resolver = make_resolver(latency=0.02)
+    exe = "C:\\Program Files\\Editor\\editor.exe"
+    pids = [backend.add_process("editor.exe", exe=exe) for _ in range(4)]
+    for i, pid in enumerate(pids):
+        backend.add_window(f"Editor {i}", pid=pid)
+    windows = window_manager.get_window_snapshot(since=0).windows
+    backend.reset_call_counts()
+
+    ready = []
+    resolver.icon_ready.connect(lambda hwnd, icon: ready.append((hwnd, icon)))
+    resolver.request(windows)
+    try:
+        assert wait_until(lambda: len(ready) == len(windows))
+    finally:
+        resolver.shutdown()
+
+    assert backend.call_counts.get("ExtractIcon") == 1
+    assert all(not icon.isNull() for _, icon in ready)
+    assert all(window["icon"] is not None for window in windows)
+    assert window_manager.icon_cache.contains(IconCache.exe_key(exe))
+
+
+def test_different_exes_extracted_separately(qapp, wait_until):
+    backend, window_manager, resolver = make_resolver()
+    for name in ("a.exe", "b.exe", "c.exe"):
+        backend.add_window(name, process_name=name)
+    windows = window_manager.get_window_snapshot(since=0).windows
+    backend.reset_call_counts()
+
+    ready = []
+    resolver.icon_ready.connect(lambda hwnd, icon: ready.append(hwnd))
+    resolver.request(windows)
+    try:
+        assert wait_until(lambda: len(ready) == 3)
+    finally:
+        resolver.shutdown()
+    assert backend.call_counts.get("ExtractIcon") == 3
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+from PyQt5.QtGui import QColor, QIcon, QPixmap
+
+import icon_store
+from conftest import make_config, write_configs
+from icon_store import IconStore
+
+
+def make_icon(color):
+    pixmap = QPixmap(32, 32)
+    pixmap.fill(QColor(color))
+    return QIcon(pixmap)
+
+
+def png_files(folder):
+    return sorted(name for name in os.listdir(folder) if name.endswith(".png"))
+
+
+def test_icons_are_deduplicated_by_content(qapp, tmp_path):
+    store = IconStore(str(tmp_path))
+    first = store.save(make_icon("red"))
+    assert first is not None
+    assert store.save(make_icon("red")) == first
+    other = store.save(make_icon("blue"))
+    assert other != first
+    assert png_files(str(tmp_path)) == sorted([first, other])
+
+    # 新建的仓库读取已有文件后同样复用
+    assert IconStore(str(tmp_path)).save(make_icon("red")) == first
+    assert len(png_files(str(tmp_path))) == 2
+
+
+def test_folder_is_indexed_once_until_refresh(qapp, tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    store = IconStore(folder)
+    saved = store.save(make_icon("red"))
+
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(icon_store.os, "scandir", lambda path: scans.append(path) or real_scandir(path))
+    store = IconStore(folder)
+    assert store.resolve(["app_Main.png", saved]) == saved
+    assert store.resolve(["missing.png"]) is None
+    assert store.resolve(["app.png"]) is None
+    assert len(scans) == 1
+
+    # 其他程序放入的文件在 refresh() 之前不可见
+    shutil.copy(os.path.join(folder, saved), os.path.join(folder, "app.png"))
+    assert store.resolve(["app.png"]) is None
+    store.refresh()
+    assert store.resolve(["app.png"]) == "app.png"
+    assert len(scans) == 2
+
+    icon = store.get_icon("app.png")
+    assert icon is not None and not icon.isNull()
+    assert store.get_icon("app.png") is icon
+
+
+def test_import_sees_icons_copied_with_the_configs(manager_factory, tmp_path):
+    manager = manager_factory()
+    assert manager.load_icon(icon_filename="shared.png") is None  # 建立了图标文件夹索引
+
+    # 配置文件和它引用的图标一起从另一台机器复制过来
+    other_folder = tmp_path / "other"
+    other_folder.mkdir()
+    saved = IconStore(str(other_folder)).save(make_icon("green"))
+    shutil.copy(str(other_folder / saved), os.path.join(manager.icons_folder, "shared.png"))
+    import_file = str(tmp_path / "import.json")
+    write_configs(import_file, [make_config("A", icon_file="shared.png")])
+
+    assert manager.import_configs(import_file)[0]
+    icon = manager.load_icon(icon_filename="shared.png")
+    assert icon is not None and not icon.isNull()
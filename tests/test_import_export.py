@@ -0,0 +1,98 @@
+from config_storage import DebouncedSaver
+from config_watcher import ConfigFileWatcher
+from conftest import make_config, write_configs
+
+
+def test_index_matches_configs_while_import_reports_progress(manager_factory, tmp_path):
+    manager = manager_factory("journal", str(tmp_path / "configs"))
+    manager.add_config(make_config("Existing"))
+    import_file = str(tmp_path / "import.json")
+    write_configs(import_file, [make_config(f"Window {i:05d}") for i in range(3000)])
+
+    checks = []
+
+    def progress(done, total):
+        # 进度回调期间界面可能读取配置，此时索引与配置列表必须一致
+        ids = {config["id"] for config in manager.configs}
+        checks.append(ids == set(manager._id_index) and
+                      all(manager.get_config(config_id) is not None for config_id in ids))
+
+    success, message = manager.import_configs(import_file, progress)
+    assert success
+    assert len(checks) > 2 and all(checks)
+    assert len(manager.configs) == 3001
+
+
+def test_suspended_saver_waits_for_resume(qapp, wait_until):
+    saved = []
+
+    class Storage:
+        def save_all(self, configs):
+            saved.append(configs)
+
+    saver = DebouncedSaver(Storage(), lambda: [make_config("A")], delay=10)
+    saver.suspend()
+    saver.schedule()
+    wait_until(lambda: False, timeout=0.2)
+    assert saved == []
+
+    saver.resume()
+    assert wait_until(lambda: saved)
+    saver.close()
+
+
+def test_suspended_watcher_checks_on_resume(qapp, tmp_path, wait_until):
+    path = str(tmp_path / "window_configs.json")
+    write_configs(path, [make_config("A")])
+    watcher = ConfigFileWatcher(path, poll_interval=20, settle_delay=10)
+    changes = []
+    watcher.file_changed.connect(changes.append)
+
+    watcher.suspend()
+    write_configs(path, [make_config("A"), make_config("B")])
+    wait_until(lambda: False, timeout=0.2)
+    assert changes == []
+
+    watcher.resume()
+    assert changes == [path]
+    watcher.stop()
+
+
+def test_progress_operation_does_not_reenter_config_manager(main_window, tmp_path, wait_until):
+    manager = main_window.config_manager
+    manager.add_config(make_config("A"))
+    manager.flush()
+    main_window.config_watcher._poll_timer.setInterval(20)
+
+    def operation(progress):
+        # 操作进行中配置文件被外部修改，界面事件照常处理
+        write_configs(manager.config_file, [])
+        wait_until(lambda: False, timeout=0.3)
+        assert len(manager.configs) == 1
+        return True
+
+    assert main_window.run_with_progress("测试", "正在处理...", operation)
+    # 操作结束后补做的检查才会重新加载
+    assert wait_until(lambda: len(manager.configs) == 0)
+
+
+def test_merge_counts_each_outcome(manager_factory):
+    manager = manager_factory("json")
+    manager.add_config(make_config("Same"))
+    manager.add_config(make_config("Changed"))
+
+    # 与导出文件一样包含 enabled 等字段；ID和时间戳不参与比较
+    exported = dict(manager.configs[0], id="other", created_at=0, updated_at=0)
+    added, stats = manager.merge_configs([
+        exported,
+        make_config("Changed", x=10),
+        make_config("New"),
+        make_config("New"),  # 导入内容内部重复，内容相同
+        make_config("New", x=5),  # 导入内容内部重复，内容不同
+        {"title": "Bad", "process": "app.exe"},
+        "not a config",
+    ])
+    assert stats == {"added": 1, "skipped": 2, "conflicting": 2, "invalid": 2}
+    assert [config["title"] for config in added] == ["New"]
+    assert [config["title"] for config in manager.configs] == ["Same", "Changed", "New"]
+    assert manager.get_config_by_window_info("Changed", "app.exe")["x"] == 0
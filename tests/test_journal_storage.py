@@ -0,0 +1,107 @@
+import json
+import os
+
+from PyQt5.QtCore import QSettings
+
+from config_storage import JournalConfigStorage, JsonConfigStorage, apply_records, delete_record, put_record
+from conftest import make_config
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_replay_restores_changes_on_top_of_snapshot(tmp_path):
+    config_file = str(tmp_path / "window_configs.json")
+    storage = JournalConfigStorage(config_file)
+    configs = [make_config("A"), make_config("B"), make_config("C")]
+    storage.save_all(configs)
+
+    renamed = dict(configs[0], title="A2")
+    configs[0] = renamed
+    storage.append([put_record(renamed, make_config("A"))], configs)
+    configs[1] = make_config("B", x=5)
+    storage.append([put_record(configs[1])], configs)
+    storage.append([delete_record(configs[2])], configs)
+    del configs[2]
+    configs.append(make_config("D"))
+    storage.append([put_record(configs[-1])], configs)
+    storage.close()
+
+    # 快照没有改变，变更只在日志中
+    assert [config["title"] for config in read_json(config_file)] == ["A", "B", "C"]
+    assert JournalConfigStorage(config_file).load() == configs
+
+
+def test_truncated_last_record_is_ignored(tmp_path):
+    config_file = str(tmp_path / "window_configs.json")
+    storage = JournalConfigStorage(config_file)
+    storage.save_all([make_config("A")])
+    storage.append([put_record(make_config("B"))], [])
+    storage.close()
+    with open(storage.journal_file, "ab") as f:
+        f.write(b'{"op": "put", "key": ["C", "app.exe"], "con')
+
+    assert [config["title"] for config in JournalConfigStorage(config_file).load()] == ["A", "B"]
+
+
+def test_replaying_records_twice_gives_same_result():
+    records = [
+        put_record(make_config("B")),
+        put_record(make_config("A2"), make_config("A")),
+        delete_record(make_config("C")),
+    ]
+    once = apply_records([make_config("A"), make_config("C")], records)
+    twice = apply_records([dict(config) for config in once], records)
+    assert once == twice == [make_config("A2"), make_config("B")]
+
+
+def test_compaction_writes_snapshot_and_keeps_later_records(tmp_path):
+    config_file = str(tmp_path / "window_configs.json")
+    storage = JournalConfigStorage(config_file, compact_threshold=1)
+    configs = []
+    for i in range(20):
+        configs.append(make_config(f"W{i}"))
+        storage.append([put_record(configs[-1])], configs)
+    storage.wait_for_compaction()
+    storage.close()
+
+    snapshot = read_json(config_file)
+    assert snapshot == configs[:len(snapshot)]
+    assert len(snapshot) > 0
+    # 合并后日志只保留快照之后的记录
+    assert os.path.getsize(storage.journal_file) < sum(
+        len(json.dumps(put_record(config))) + 1 for config in configs)
+    assert JournalConfigStorage(config_file).load() == configs
+
+
+def test_save_all_clears_journal(tmp_path):
+    config_file = str(tmp_path / "window_configs.json")
+    storage = JournalConfigStorage(config_file)
+    storage.append([put_record(make_config("A"))], [make_config("A")])
+    assert os.path.exists(storage.journal_file)
+
+    storage.save_all([make_config("B")])
+    assert not os.path.exists(storage.journal_file)
+    assert storage.load() == [make_config("B")]
+    storage.close()
+
+
+def test_journal_mode_is_opt_in_and_reads_existing_json(manager_factory, tmp_path):
+    # 不指定存储模式时按设置项选择
+    manager = manager_factory(None)
+    assert type(manager.storage) is JsonConfigStorage
+    manager.add_config(make_config("A"))
+    manager.close()
+    assert not os.path.exists(os.path.join(str(tmp_path), "window_configs.journal"))
+
+    # 升级：在设置中改用日志模式后，已有的JSON配置作为快照继续使用
+    QSettings("WindowSizer", "Settings").setValue("config_storage", "journal")
+    upgraded = manager_factory(None)
+    assert isinstance(upgraded.storage, JournalConfigStorage)
+    assert [config["title"] for config in upgraded.configs] == ["A"]
+    upgraded.add_config(make_config("B"))
+    upgraded.close()
+    assert [config["title"] for config in read_json(upgraded.config_file)] == ["A"]
+    assert [config["title"] for config in JournalConfigStorage(upgraded.config_file).load()] == ["A", "B"]
@@ -0,0 +1,77 @@
+import io
+import json
+
+import pytest
+
+from config_storage import NotJsonArrayError, dump_json_array, iter_json_array, iter_json_stream
+
+
+DOCUMENT = [
+    {"title": "记事本 — 中文标题", "process": "notepad.exe", "x": -120, "y": 0, "width": 800, "height": 600},
+    {"title": "emoji 🪟", "process": "a.exe", "ratio": 1.25e-3, "big": 12345678901234567890,
+     "zero": -0.0, "flags": [True, False, None], "nested": {"list": [1, [2, [3]]]}},
+    123456789,
+    -1.5e10,
+    "quote \" and \\ backslash, ]",
+    [],
+    {},
+]
+
+
+def parse(text, chunk_size, progress=None):
+    data = text.encode("utf-8")
+    return list(iter_json_stream(io.BytesIO(data), len(data), progress, chunk_size))
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_every_chunk_boundary_gives_same_result(indent):
+    text = json.dumps(DOCUMENT, ensure_ascii=False, indent=indent)
+    for chunk_size in range(1, 40):
+        assert parse(text, chunk_size) == DOCUMENT, chunk_size
+
+
+def test_numbers_split_across_chunks():
+    # "1." 和 "1e" 等在块末尾截断的数字必须读入下一块后再解析
+    text = "[1.5, 2e3, -7, 10, 0.25]"
+    for chunk_size in range(1, len(text) + 1):
+        assert parse(text, chunk_size) == [1.5, 2000.0, -7, 10, 0.25], chunk_size
+
+
+def test_empty_arrays():
+    assert parse("[]", 1) == []
+    assert parse(" \n[ \n ]\n", 1) == []
+
+
+@pytest.mark.parametrize("text", ['{"title": "A"}', '"text"', "", "   "])
+def test_non_array_is_rejected(text):
+    with pytest.raises(NotJsonArrayError):
+        parse(text, 4)
+
+
+def test_truncated_or_malformed_input_raises():
+    text = json.dumps(DOCUMENT, ensure_ascii=False)
+    for cut in range(1, len(text) - 1, 7):
+        for chunk_size in (1, 5, 64):
+            with pytest.raises(ValueError):
+                parse(text[:cut], chunk_size)
+    with pytest.raises(ValueError):
+        parse("[1 2]", 2)
+
+
+def test_progress_reaches_file_size(tmp_path):
+    path = tmp_path / "configs.json"
+    path.write_text(json.dumps(DOCUMENT, ensure_ascii=False), encoding="utf-8")
+    reports = []
+    items = list(iter_json_array(str(path), lambda done, total: reports.append((done, total)), chunk_size=16))
+    assert items == DOCUMENT
+    size = path.stat().st_size
+    assert reports[-1] == (size, size)
+    assert [done for done, _ in reports] == sorted(done for done, _ in reports)
+
+
+def test_dump_matches_json_dump():
+    for items in ([], DOCUMENT):
+        out = io.StringIO()
+        dump_json_array(out, items, 2)
+        assert out.getvalue() == json.dumps(items, ensure_ascii=False, indent=2)
+
@@ -0,0 +1,108 @@
+from conftest import make_config
+
+
+def select_window(main_window, hwnd):
+    """在窗口列表中选中指定窗口"""
+    main_window.refresh_window_list()
+    item = main_window._window_list_items[hwnd]
+    main_window.on_window_selected(item)
+
+
+def test_saved_config_can_be_found_by_class(main_window):
+    backend = main_window.window_manager.backend
+    hwnd = backend.add_window("Report.docx", process_name="editor.exe", class_name="EditorFrame")
+    select_window(main_window, hwnd)
+    main_window.save_config()
+
+    manager = main_window.config_manager
+    assert [config["title"] for config in manager.get_configs_by_class("EditorFrame")] == ["Report.docx"]
+    assert [config["title"] for config in manager.filter_configs("editorframe")] == ["Report.docx"]
+
+    # 更新已有配置时保留类名
+    main_window.ui_manager.x_spin.setValue(50)
+    main_window.save_config()
+    assert manager.get_configs_by_class("EditorFrame")[0]["x"] == 50
+
+
+def test_selection_and_scroll_survive_incremental_changes(main_window, qapp):
+    manager = main_window.config_manager
+    for i in range(60):
+        manager.add_config(make_config(f"Window {i}"))
+    main_window.show()
+    qapp.processEvents()
+
+    config_list = main_window.ui_manager.config_list
+    model = main_window.ui_manager.config_model
+    config_list.setCurrentIndex(model.index(30))
+    config_list.verticalScrollBar().setValue(20)
+    selected_id = model.config(30)["id"]
+
+    def assert_kept(row):
+        qapp.processEvents()
+        assert config_list.currentIndex().row() == row
+        assert model.config(row)["id"] == selected_id
+        assert config_list.verticalScrollBar().value() == 20
+
+    manager.add_config(make_config("New window"))
+    assert_kept(30)
+    manager.delete_config(model.config(50)["id"])
+    assert_kept(30)
+    # 删除选中项之前的配置，选中项随之上移一行
+    manager.delete_config(model.config(2)["id"])
+    assert_kept(29)
+    manager.update_config(selected_id, dict(manager.get_config(selected_id), x=50))
+    assert_kept(29)
+
+
+def test_rollback_picks_the_chosen_version_when_labels_look_alike(main_window, monkeypatch):
+    from PyQt5.QtWidgets import QInputDialog
+
+    manager = main_window.config_manager
+    manager.add_config(make_config("Editor"))
+    config_id = manager.get_all_configs()[0]["id"]
+    # 只改名称的两个版本位置、尺寸相同，时间也可能在同一秒内
+    manager.update_config(config_id, dict(manager.get_config(config_id), custom_name="First"))
+    manager.update_config(config_id, dict(manager.get_config(config_id), custom_name="Second"))
+
+    monkeypatch.setattr(QInputDialog, "getItem",
+                        staticmethod(lambda parent, title, label, items, current, editable: (items[1], True)))
+    main_window.rollback_config(config_id)
+
+    assert "custom_name" not in manager.get_config(config_id)
+
+
+def test_config_icons_resolve_from_last_snapshot_without_enumerating(main_window, qapp, wait_until, monkeypatch):
+    from window_manager import WindowMatchIndex
+
+    backend = main_window.window_manager.backend
+    manager = main_window.config_manager
+    backend.add_window("Editor", process_name="editor.exe")
+    main_window.refresh_window_list()
+    manager.add_config(make_config("Editor", process="editor.exe"))
+    manager.add_config(make_config("Viewer", process="viewer.exe"))
+    editor_id, viewer_id = [config["id"] for config in manager.get_all_configs()]
+    backend.reset_call_counts()
+
+    main_window.show()
+    assert wait_until(lambda: "icon_file" in manager.get_config(editor_id))
+    assert viewer_id in main_window._unresolved_config_icons
+
+    # 搜索和重新加载会重建列表，但不再枚举窗口，也不再为没有窗口的配置重试
+    lookups = []
+    find_first = WindowMatchIndex.find_first
+    monkeypatch.setattr(WindowMatchIndex, "find_first",
+                        lambda self, title, process: lookups.append(title) or find_first(self, title, process))
+    for text in ("v", "vi", ""):
+        main_window.on_config_search_changed(text)
+        qapp.processEvents()
+    main_window.load_config_list()
+    qapp.processEvents()
+    qapp.processEvents()
+    assert lookups == []
+    assert backend.call_counts.get("EnumWindows", 0) == 0
+
+    # 窗口出现后重试
+    backend.add_window("Viewer", process_name="viewer.exe")
+    main_window.refresh_window_list()
+    assert wait_until(lambda: "icon_file" in manager.get_config(viewer_id))
+    assert backend.call_counts.get("EnumWindows") == 1
@@ -0,0 +1,74 @@
+import pytest
+
+from config_storage import JournalConfigStorage, SqliteConfigStorage, delete_record, put_record
+from conftest import make_config, write_configs
+
+
+def test_first_load_migrates_snapshot_and_journal(tmp_path):
+    config_file = str(tmp_path / "window_configs.json")
+    journal = JournalConfigStorage(config_file)
+    journal.save_all([make_config("A"), make_config("B")])
+    journal.append([put_record(make_config("C"))], [])
+    journal.close()
+    with open(config_file, "r", encoding="utf-8") as f:
+        original = f.read()
+
+    storage = SqliteConfigStorage(config_file)
+    assert [config["title"] for config in storage.load()] == ["A", "B", "C"]
+    storage.close()
+
+    # 只迁移一次，之后JSON文件的变化不影响数据库，原文件保持不变
+    with open(config_file, "r", encoding="utf-8") as f:
+        assert f.read() == original
+    write_configs(config_file, [make_config("Other")])
+    storage = SqliteConfigStorage(config_file)
+    assert [config["title"] for config in storage.load()] == ["A", "B", "C"]
+    storage.close()
+
+
+def test_rows_are_updated_in_place(tmp_path):
+    storage = SqliteConfigStorage(str(tmp_path / "window_configs.json"))
+    storage.save_all([make_config("A"), make_config("B"), make_config("C")])
+    storage.append([
+        put_record(make_config("A2"), make_config("A")),
+        put_record(make_config("B", x=7)),
+        delete_record(make_config("C")),
+        put_record(make_config("D")),
+    ], None)
+    assert storage.load() == [make_config("A2"), make_config("B", x=7), make_config("D")]
+    storage.close()
+
+
+def test_find_keys_uses_indexed_columns(tmp_path):
+    storage = SqliteConfigStorage(str(tmp_path / "window_configs.json"))
+    storage.save_all([
+        make_config("100% Editor", "editor.exe", class_name="Main"),
+        make_config("1000 Editor", "editor.exe", class_name="Tool"),
+        make_config("my_file", "notes.exe", class_name="Main"),
+        make_config("myXfile", "notes.exe"),
+    ])
+    assert storage.find_keys(process="editor.exe") == [("100% Editor", "editor.exe"), ("1000 Editor", "editor.exe")]
+    assert storage.find_keys(class_name="Main") == [("100% Editor", "editor.exe"), ("my_file", "notes.exe")]
+    assert storage.find_keys(process="notes.exe", class_name="Main") == [("my_file", "notes.exe")]
+    assert storage.find_keys(process="missing.exe") == []
+    storage.close()
+
+
+@pytest.mark.parametrize("mode", ["json", "journal", "sqlite"])
+def test_changes_survive_restart_in_every_mode(manager_factory, mode):
+    manager = manager_factory(mode)
+    manager.add_config(make_config("A", "editor.exe", class_name="Main"))
+    manager.add_config(make_config("B", "editor.exe"))
+    manager.add_config(make_config("C", "notes.exe", class_name="Main"))
+    a_id, b_id, c_id = (config["id"] for config in manager.configs)
+    manager.update_config(a_id, dict(manager.get_config(a_id), title="A2", x=3))
+    manager.delete_config(b_id)
+
+    assert [config["title"] for config in manager.get_configs_by_process("editor.exe")] == ["A2"]
+    assert [config["title"] for config in manager.get_configs_by_class("Main")] == ["A2", "C"]
+    manager.close()
+
+    restarted = manager_factory(mode)
+    assert [(config["id"], config["title"], config["x"]) for config in restarted.configs] == [
+        (a_id, "A2", 3), (c_id, "C", 0)]
+    assert [config["title"] for config in restarted.get_configs_by_class("Main")] == ["A2", "C"]
@@ -0,0 +1,188 @@
+from conftest import make_config
+from window_backend import SimulatedBackend
+from window_manager import WindowManager, SNAPSHOT_HISTORY_LIMIT
+
+
+def hwnds_of(windows):
+    return sorted(window["hwnd"] for window in windows)
+
+
+def make_manager(count=10):
+    backend = SimulatedBackend()
+    hwnds = backend.populate(count)
+    return backend, WindowManager(backend=backend), hwnds
+
+
+def test_first_snapshot_is_full():
+    backend, manager, hwnds = make_manager()
+    snapshot = manager.get_window_snapshot(since=0)
+    assert snapshot.full
+    assert hwnds_of(snapshot.windows) == sorted(hwnds)
+    assert snapshot.has_changes()
+
+
+def test_snapshot_diff_added_removed_changed():
+    backend, manager, hwnds = make_manager()
+    base = manager.get_window_snapshot(since=0).generation
+
+    added = backend.add_window("New Window")
+    backend.remove_window(hwnds[0])
+    backend.set_window_title(hwnds[1], "Renamed")
+    backend.move_window(hwnds[2], (0, 0, 640, 480))
+
+    snapshot = manager.get_window_snapshot(since=base)
+    assert not snapshot.full
+    assert hwnds_of(snapshot.added) == [added]
+    assert hwnds_of(snapshot.removed) == [hwnds[0]]
+    assert hwnds_of(snapshot.changed) == sorted([hwnds[1], hwnds[2]])
+    assert snapshot.get(hwnds[1])["title"] == "Renamed"
+    assert snapshot.get(hwnds[0]) is None
+
+
+def test_unchanged_windows_are_not_requeried():
+    backend, manager, hwnds = make_manager()
+    base = manager.get_window_snapshot(since=0).generation
+    backend.reset_call_counts()
+
+    snapshot = manager.get_window_snapshot(since=base)
+    assert not snapshot.has_changes()
+    assert backend.call_counts.get("GetClassName", 0) == 0
+    assert backend.call_counts.get("GetWindowThreadProcessId", 0) == 0
+
+
+def test_each_caller_sees_its_own_increment():
+    backend, manager, hwnds = make_manager()
+    first = manager.get_window_snapshot(since=0).generation
+    added = backend.add_window("Early")
+    second = manager.get_window_snapshot(since=first).generation
+    later = backend.add_window("Late")
+
+    # 落后两代的调用方能看到两次新增，刚同步过的只看到最近一次
+    assert hwnds_of(manager.get_window_snapshot(since=first).added) == sorted([added, later])
+    assert hwnds_of(manager.get_window_snapshot(since=second).added) == [later]
+
+
+def test_stale_generation_returns_full_view():
+    backend, manager, hwnds = make_manager()
+    base = manager.get_window_snapshot(since=0).generation
+    for _ in range(SNAPSHOT_HISTORY_LIMIT + 1):
+        manager.get_window_snapshot()
+    assert manager.get_window_snapshot(since=base).full
+
+
+def test_event_probe_updates_only_given_windows():
+    backend, manager, hwnds = make_manager()
+    base = manager.get_window_snapshot(since=0).generation
+    backend.move_window(hwnds[3], (0, 0, 640, 480))
+    backend.move_window(hwnds[4], (0, 0, 640, 480))
+    backend.reset_call_counts()
+
+    snapshot = manager.get_window_snapshot(since=base, hwnds=[hwnds[3]])
+    assert backend.call_counts.get("EnumWindows", 0) == 0
+    assert hwnds_of(snapshot.changed) == [hwnds[3]]
+    assert len(snapshot.windows) == len(hwnds)
+
+
+def test_small_and_hidden_windows_are_filtered():
+    backend = SimulatedBackend()
+    backend.add_window("Tiny", rect=(0, 0, 50, 50))
+    hidden = backend.add_window("Hidden", visible=False)
+    shown = backend.add_window("Shown")
+    manager = WindowManager(backend=backend)
+    assert hwnds_of(manager.get_window_snapshot(since=0).windows) == [shown]
+
+    backend.set_window_visible(hidden, True)
+    snapshot = manager.get_window_snapshot()
+    assert hwnds_of(snapshot.added) == [hidden]
+
+
+def test_process_metadata_is_cached():
+    backend, manager, hwnds = make_manager(40)
+    manager.get_window_snapshot(since=0)
+    backend.reset_call_counts()
+
+    # 稳定状态下完整枚举只批量列出一次进程，不再逐个查询
+    for hwnd in hwnds:
+        backend.move_window(hwnd, (0, 0, 640, 480))
+    manager.get_window_snapshot()
+    assert backend.call_counts.get("EnumProcesses") == 1
+    assert backend.call_counts.get("OpenProcess", 0) == 0
+
+
+def test_reused_pid_is_detected():
+    backend = SimulatedBackend()
+    pid = backend.add_process("old.exe")
+    manager = WindowManager(backend=backend)
+    assert manager.process_cache.get_name(pid) == "old.exe"
+
+    backend.remove_process(pid)
+    backend.add_process("new.exe", pid=pid)
+    assert manager.process_cache.get_name(pid) == "old.exe"  # 不校验时直接使用缓存
+    assert manager.process_cache.get_name(pid, verify=True) == "new.exe"
+
+
+def test_refresh_evicts_exited_processes():
+    backend = SimulatedBackend()
+    pids = [backend.add_process(f"app{i}.exe") for i in range(3)]
+    manager = WindowManager(backend=backend)
+    for pid in pids:
+        manager.process_cache.get(pid)
+
+    backend.remove_process(pids[0])
+    manager.process_cache.refresh()
+    stats = manager.process_cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_batch_placement_commits_in_one_transaction():
+    backend, manager, hwnds = make_manager(5)
+    placements = [(hwnd, 10 * i, 10 * i, 500, 400) for i, hwnd in enumerate(hwnds)]
+    backend.reset_call_counts()
+
+    results = manager.resize_windows(placements)
+    assert results == [(hwnd, True, None) for hwnd in hwnds]
+    assert backend.call_counts.get("EndDeferWindowPos") == 1
+    assert backend.call_counts.get("SetWindowPos", 0) == 0
+    for i, hwnd in enumerate(hwnds):
+        assert backend.windows[hwnd].rect == (10 * i, 10 * i, 10 * i + 500, 10 * i + 400)
+
+
+def test_batch_placement_falls_back_only_for_failures():
+    backend = SimulatedBackend()
+    normal = [backend.add_window(f"Normal {i}") for i in range(3)]
+    elevated = backend.add_window("Elevated", elevated=True)
+    hung = backend.add_window("Hung", hung=True)
+    manager = WindowManager(backend=backend)
+    hwnds = [normal[0], elevated, normal[1], hung, normal[2]]
+    backend.reset_call_counts()
+
+    results = dict((hwnd, success) for hwnd, success, _ in
+                   manager.resize_windows([(hwnd, 0, 0, 500, 400) for hwnd in hwnds]))
+    assert all(results[hwnd] for hwnd in normal)
+    assert not results[elevated] and not results[hung]
+    assert all(backend.windows[hwnd].rect == (0, 0, 500, 400) for hwnd in normal)
+    # 无响应的窗口直接跳过，拒绝访问的窗口只单独回退一次
+    assert backend.call_counts.get("SetWindowPos") == 1
+    assert hung in manager.get_hung_windows()
+
+
+def test_match_configs_pairs_each_config_with_its_windows():
+    backend = SimulatedBackend()
+    first = backend.add_window("Document", process_name="editor.exe")
+    second = backend.add_window("Document", process_name="editor.exe")
+    backend.add_window("Document", process_name="viewer.exe")
+    backend.add_window("Other", process_name="editor.exe")
+    manager = WindowManager(backend=backend)
+    index = manager.get_window_snapshot().match_index
+
+    configs = [make_config("Document", "editor.exe"), make_config("Missing", "editor.exe"),
+               make_config("Other", "viewer.exe")]
+    matches = index.match_configs(configs)
+    assert [config for config, _ in matches] == configs
+    # 标题和进程名相同的窗口按枚举顺序全部返回
+    assert [[window["hwnd"] for window in windows] for _, windows in matches] == [[first, second], [], []]
+    assert index.find_first("Document", "editor.exe")["hwnd"] == first
+    # 只有进程名或只有标题相同不算匹配
+    assert index.find("Other", "viewer.exe") == []
+    assert index.find_first("Missing", "editor.exe") is None
@@ -0,0 +1,139 @@
+from conftest import make_config
+from window_backend import SimulatedBackend
+from window_manager import WindowManager
+
+
+# 配置的目标位置，对应窗口矩形 (10, 20, 410, 320)
+TARGET = {"x": 10, "y": 20, "width": 400, "height": 300}
+
+
+def test_hung_window_is_retried_after_cooldown(monitor_factory, wait_until):
+    backend = SimulatedBackend()
+    hwnd = backend.add_window("Editor", hung=True)
+    window_manager = WindowManager(backend=backend, hung_cooldown=0.2)
+    monitor = monitor_factory(backend, window_manager)
+    results = []
+    monitor.apply_finished.connect(results.extend)
+    monitor.set_configs([make_config("Editor", **TARGET)])
+    monitor.set_auto_apply(True)
+    monitor.start()
+
+    assert wait_until(lambda: results)
+    assert results[0][0] == hwnd and not results[0][1]
+    assert backend.windows[hwnd].rect == (100, 100, 900, 700)
+
+    # 窗口恢复响应，但没有任何窗口事件，也没有到兜底枚举时间
+    backend.set_window_hung(hwnd, False)
+    assert wait_until(lambda: backend.windows[hwnd].rect == (10, 20, 410, 320), timeout=3)
+    assert any(success for result_hwnd, success, _ in results if result_hwnd == hwnd)
+
+
+def test_failed_placement_is_retried_without_polling(monitor_factory, wait_until):
+    backend = SimulatedBackend()
+    hwnd = backend.add_window("Admin Tool", elevated=True)
+    window_manager = WindowManager(backend=backend)
+    monitor = monitor_factory(backend, window_manager, interval=200)
+    results = []
+    monitor.apply_finished.connect(results.extend)
+    monitor.set_configs([make_config("Admin Tool", **TARGET)])
+    monitor.set_auto_apply(True)
+    monitor.start()
+
+    assert wait_until(lambda: results)
+    assert not results[0][1]
+
+    backend.windows[hwnd].elevated = False
+    assert wait_until(lambda: backend.windows[hwnd].rect == (10, 20, 410, 320), timeout=3)
+
+
+def test_new_window_is_applied_from_events_without_enumeration(monitor_factory, wait_until):
+    backend = SimulatedBackend()
+    backend.populate(20)
+    window_manager = WindowManager(backend=backend)
+    monitor = monitor_factory(backend, window_manager)
+    snapshots = []
+    monitor.snapshot_ready.connect(snapshots.append)
+    monitor.set_configs([make_config("Editor", **TARGET)])
+    monitor.set_auto_apply(True)
+    monitor.start()
+    assert wait_until(lambda: snapshots)
+
+    backend.reset_call_counts()
+    hwnd = backend.add_window("Editor")
+    assert wait_until(lambda: backend.windows[hwnd].rect == (10, 20, 410, 320))
+    # 只重新探测事件涉及的窗口，不做完整枚举
+    assert backend.call_counts.get("EnumWindows", 0) == 0
+
+
+def test_burst_of_move_events_is_merged(monitor_factory, wait_until):
+    backend = SimulatedBackend()
+    hwnd = backend.add_window("Editor")
+    window_manager = WindowManager(backend=backend)
+    monitor = monitor_factory(backend, window_manager, event_debounce=200)
+    batches = []
+    monitor.apply_finished.connect(batches.append)
+    monitor.set_configs([make_config("Editor", **TARGET)])
+    monitor.set_auto_apply(True)
+    monitor.start()
+    assert wait_until(lambda: len(batches) == 1)
+
+    # 拖动窗口：连续的位置变化事件合并为一次处理
+    for offset in range(30):
+        backend.move_window(hwnd, (offset, offset, offset + 500, offset + 400))
+    assert wait_until(lambda: len(batches) == 2)
+    assert backend.windows[hwnd].rect == (10, 20, 410, 320)
+    wait_until(lambda: False, timeout=0.4)
+    assert len(batches) == 2
+
+
+def test_config_update_wakes_monitor(monitor_factory, wait_until):
+    backend = SimulatedBackend()
+    hwnd = backend.add_window("Editor")
+    window_manager = WindowManager(backend=backend)
+    monitor = monitor_factory(backend, window_manager)
+    snapshots = []
+    monitor.snapshot_ready.connect(snapshots.append)
+    monitor.set_auto_apply(True)
+    monitor.start()
+    assert wait_until(lambda: snapshots)
+
+    monitor.update_configs([make_config("Editor", **TARGET)])
+    assert wait_until(lambda: backend.windows[hwnd].rect == (10, 20, 410, 320))
+
+    monitor.update_configs([], removed_keys=[("Editor", "app.exe")])
+    backend.move_window(hwnd, (0, 0, 300, 300))
+    wait_until(lambda: False, timeout=0.3)
+    assert backend.windows[hwnd].rect == (0, 0, 300, 300)
+
+
+def test_polls_without_event_source(monitor_factory, wait_until):
+    backend = SimulatedBackend()
+    window_manager = WindowManager(backend=backend)
+    monitor = monitor_factory(backend, window_manager, event_source=None, interval=100)
+    monitor.set_configs([make_config("Editor", **TARGET)])
+    monitor.set_auto_apply(True)
+    monitor.start()
+
+    hwnd = backend.add_window("Editor")
+    assert wait_until(lambda: backend.windows[hwnd].rect == (10, 20, 410, 320))
+
+
+def test_paused_monitor_does_not_apply(monitor_factory, wait_until):
+    backend = SimulatedBackend()
+    window_manager = WindowManager(backend=backend)
+    monitor = monitor_factory(backend, window_manager)
+    snapshots = []
+    monitor.snapshot_ready.connect(snapshots.append)
+    monitor.set_configs([make_config("Editor", **TARGET)])
+    monitor.set_auto_apply(True)
+    monitor.start()
+    assert wait_until(lambda: snapshots)
+
+    monitor.pause()
+    wait_until(lambda: False, timeout=0.1)
+    hwnd = backend.add_window("Editor")
+    wait_until(lambda: False, timeout=0.3)
+    assert backend.windows[hwnd].rect == (100, 100, 900, 700)
+
+    monitor.resume()
+    assert wait_until(lambda: backend.windows[hwnd].rect == (10, 20, 410, 320))
@@ -1,7 +1,7 @@
 import os
 import sys
 import json
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, 
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListView, 
                             QLabel, QLineEdit, QPushButton, QCheckBox, QSpinBox, 
                             QGroupBox, QGridLayout, QMenu, QAction, QSystemTrayIcon, 
                             QTabWidget, QFileDialog, QFrame, QStyle, 
@@ -9,6 +9,8 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget,
 from PyQt5.QtGui import QIcon, QFont, QPalette, QColor, QCursor, QKeySequence
 from PyQt5.QtCore import Qt, QTimer, QSettings, QPoint, QSize, QRect, QPropertyAnimation, QEasingCurve
 
+from config_list_model import ConfigListModel, ConfigItemDelegate
+
 # 工具函数：计算颜色亮度（0-100%）
 def calculate_luminance(color_hex):
     """计算颜色的相对亮度（0-100%），用于确定合适的文字颜色"""
@@ -34,7 +36,12 @@ def get_contrast_text_color(background_color):
 class UIManager:
     """UI管理类，负责所有界面相关的操作"""
     
-    def __init__(self, main_window):
+    def __init__(self, main_window, themes_folder=None):
+        """
+        Args:
+            main_window: 主窗口
+            themes_folder: 主题文件夹（可选，默认为程序目录下的 themes）
+        """
         self.main_window = main_window
         
         # 获取程序所在目录（支持打包后的exe环境）
@@ -55,7 +62,7 @@ class UIManager:
         self.current_theme = "light"  # 默认主题
         
         # 确保主题文件夹存在（使用绝对路径）
-        self.themes_folder = os.path.join(self.base_dir, "themes")
+        self.themes_folder = themes_folder or os.path.join(self.base_dir, "themes")
         if not os.path.exists(self.themes_folder):
             os.makedirs(self.themes_folder)
         
@@ -215,13 +222,13 @@ class UIManager:
                 background-color: #ffffff;
                 color: #000000;
             }}
-            QListWidget {{
+            QListView {{
                 border: 1px solid {border};
                 border-radius: 4px;
                 background-color: {window};
                 color: {window_text_color};
             }}
-            QListWidget::item {{
+            QListView::item {{
                 height: 25px;
                 color: {window_text_color};
             }}
@@ -605,9 +612,28 @@ class UIManager:
         
         left_layout.addLayout(button_layout)
         
+        # 配置搜索框：边输入边搜索，结果按匹配程度排序
+        self.config_search = QLineEdit()
+        self.config_search.setPlaceholderText("搜索配置（名称、标题、进程名、类名）")
+        self.config_search.setClearButtonEnabled(True)
+        self.config_search.textChanged.connect(self.main_window.on_config_search_changed)
+        left_layout.addWidget(self.config_search)
+        
         # 配置列表，添加垂直滚动条
-        self.config_list = QListWidget()
-        self.config_list.itemClicked.connect(self.main_window.on_config_selected)
+        # 模型/委托实现，只有可见行才会绘制，不再为每个配置创建控件
+        self.config_list = QListView()
+        self.config_model = ConfigListModel(icon_provider=self.main_window.get_config_icon, parent=self.config_list)
+        self.config_list.setModel(self.config_model)
+        self.config_delegate = ConfigItemDelegate(self.config_list)
+        self.config_list.setItemDelegate(self.config_delegate)
+        self.config_list.setUniformItemSizes(True)
+        self.config_list.setIconSize(QSize(24, 24))
+        self.config_list.setMouseTracking(True)
+        self.config_list.clicked.connect(self.main_window.on_config_selected)
+        self.config_model.enabled_toggled.connect(self.main_window.on_config_enabled_changed)
+        self.config_delegate.rename_requested.connect(self.main_window.rename_config)
+        self.config_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.config_list.customContextMenuRequested.connect(self.main_window.show_config_list_menu)
         self.config_list.setMinimumHeight(150)
         self.config_list.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
         left_layout.addWidget(self.config_list)
@@ -803,6 +829,22 @@ class UIManager:
         
         settings_layout.addLayout(fifth_row_layout)
         
+        # 第六行：备份配置、恢复备份
+        sixth_row_layout = QHBoxLayout()
+        sixth_row_layout.setSpacing(8)
+        
+        backup_btn = QPushButton("备份配置")
+        backup_btn.setMinimumHeight(26)
+        backup_btn.clicked.connect(self.main_window.backup_configs)
+        sixth_row_layout.addWidget(backup_btn, 1)
+        
+        restore_btn = QPushButton("恢复备份")
+        restore_btn.setMinimumHeight(26)
+        restore_btn.clicked.connect(self.main_window.restore_backup)
+        sixth_row_layout.addWidget(restore_btn, 1)
+        
+        settings_layout.addLayout(sixth_row_layout)
+        
         # 最后：关于
         about_group = QGroupBox("关于")
         about_layout = QVBoxLayout(about_group)
@@ -1346,9 +1388,8 @@ class UIManager:
         path = QFileDialog.getExistingDirectory(self.main_window, "选择配置文件保存路径")
         if path:
             if self.main_window.config_manager.set_config_path(path):
+                # 配置管理器重新加载后会通知主窗口重建配置列表
                 self.config_path_label.setText(f"当前路径： {path}")
-                # 重新加载配置列表
-                self.main_window.load_config_list()
     
     def delete_custom_theme(self):
         """删除自定义主题"""
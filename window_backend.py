@@ -0,0 +1,576 @@
+import os
+import time
+import random
+import threading
+from collections import OrderedDict
+from PyQt5.QtGui import QImage, QColor
+
+# 尝试导入QtWinExtras
+try:
+    from PyQt5.QtWinExtras import QtWin
+    QTWIN_AVAILABLE = True
+except ImportError:
+    QTWIN_AVAILABLE = False
+
+from window_events import (SimulatedEventSource, WinEventHookSource,
+                           EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY, EVENT_OBJECT_SHOW,
+                           EVENT_OBJECT_HIDE, EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_NAMECHANGE)
+
+
+WM_GETICON = 0x007F
+ICON_SMALL = 0
+ICON_BIG = 1
+
+
+class MessageTimeoutError(Exception):
+    """跨进程消息超时或目标窗口无响应"""
+
+
+class WindowBackend:
+    """窗口系统后端接口
+
+    WindowManager 的所有窗口系统调用都经由后端完成，便于在没有Win32桌面的
+    环境中用模拟后端进行测试和性能测量。失败的调用直接抛出异常，由调用方处理。
+    """
+
+    def enum_windows(self):
+        """按Z序返回所有顶层窗口句柄"""
+        raise NotImplementedError
+
+    def is_window(self, hwnd):
+        """句柄是否仍然有效"""
+        raise NotImplementedError
+
+    def is_window_visible(self, hwnd):
+        """窗口是否可见"""
+        raise NotImplementedError
+
+    def get_window_text(self, hwnd):
+        """获取窗口标题"""
+        raise NotImplementedError
+
+    def get_window_rect(self, hwnd):
+        """获取窗口矩形 (left, top, right, bottom)"""
+        raise NotImplementedError
+
+    def get_class_name(self, hwnd):
+        """获取窗口类名"""
+        raise NotImplementedError
+
+    def get_window_pid(self, hwnd):
+        """获取窗口所属进程ID"""
+        raise NotImplementedError
+
+    def set_window_pos(self, hwnd, x, y, width, height):
+        """调整单个窗口的位置和大小（不改变Z序、不激活窗口）"""
+        raise NotImplementedError
+
+    def begin_defer_window_pos(self, count):
+        """开始批量调整事务，返回事务句柄"""
+        raise NotImplementedError
+
+    def defer_window_pos(self, handle, hwnd, x, y, width, height):
+        """把一个窗口加入事务，返回新的事务句柄；失败时整个事务作废"""
+        raise NotImplementedError
+
+    def end_defer_window_pos(self, handle):
+        """提交事务"""
+        raise NotImplementedError
+
+    def send_message_timeout(self, hwnd, msg, wparam, lparam, timeout_ms):
+        """带超时发送消息，超时或无响应时抛出 MessageTimeoutError"""
+        raise NotImplementedError
+
+    def is_hung_app_window(self, hwnd):
+        """窗口所在线程是否无响应"""
+        return False
+
+    def get_window_icon_image(self, hwnd, exe_path, send_message):
+        """获取窗口图标的QImage（可在后台线程调用）
+
+        Args:
+            hwnd: 窗口句柄
+            exe_path: 进程可执行文件路径，可能为None
+            send_message: 跨进程消息函数 send_message(hwnd, msg, wparam, lparam)，
+                          由调用方负责超时和无响应处理，失败返回None
+
+        Returns:
+            QImage对象，获取失败返回None
+        """
+        return None
+
+    def list_pids(self):
+        """一次性返回所有存活进程的pid"""
+        raise NotImplementedError
+
+    def get_process_info(self, pid):
+        """查询进程信息 {"pid", "name", "exe", "create_time"}，进程不存在返回None"""
+        raise NotImplementedError
+
+    def get_process_create_time(self, pid):
+        """查询进程创建时间（用于检测pid复用），进程不存在返回None"""
+        info = self.get_process_info(pid)
+        return info["create_time"] if info else None
+
+    def create_event_source(self):
+        """创建该后端对应的窗口事件源，不支持时返回None"""
+        return None
+
+
+class Win32Backend(WindowBackend):
+    """基于 pywin32 的真实窗口系统后端"""
+
+    def __init__(self):
+        import win32gui
+        import win32process
+        import win32con
+        import psutil
+        self.win32gui = win32gui
+        self.win32process = win32process
+        self.psutil = psutil
+        # 使用 SWP_NOZORDER | SWP_NOACTIVATE 避免干扰窗口层级和激活状态
+        self.swp_flags = win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE
+
+    def enum_windows(self):
+        hwnds = []
+        self.win32gui.EnumWindows(lambda hwnd, hwnds: hwnds.append(hwnd) or True, hwnds)
+        return hwnds
+
+    def is_window(self, hwnd):
+        return bool(self.win32gui.IsWindow(hwnd))
+
+    def is_window_visible(self, hwnd):
+        return bool(self.win32gui.IsWindowVisible(hwnd))
+
+    def get_window_text(self, hwnd):
+        return self.win32gui.GetWindowText(hwnd)
+
+    def get_window_rect(self, hwnd):
+        return self.win32gui.GetWindowRect(hwnd)
+
+    def get_class_name(self, hwnd):
+        return self.win32gui.GetClassName(hwnd)
+
+    def get_window_pid(self, hwnd):
+        _, pid = self.win32process.GetWindowThreadProcessId(hwnd)
+        return pid
+
+    def set_window_pos(self, hwnd, x, y, width, height):
+        self.win32gui.SetWindowPos(hwnd, None, x, y, width, height, self.swp_flags)
+
+    def begin_defer_window_pos(self, count):
+        return self.win32gui.BeginDeferWindowPos(count)
+
+    def defer_window_pos(self, handle, hwnd, x, y, width, height):
+        return self.win32gui.DeferWindowPos(handle, hwnd, None, x, y, width, height, self.swp_flags)
+
+    def end_defer_window_pos(self, handle):
+        self.win32gui.EndDeferWindowPos(handle)
+
+    def send_message_timeout(self, hwnd, msg, wparam, lparam, timeout_ms):
+        SMTO_BLOCK = 0x0001
+        SMTO_ABORTIFHUNG = 0x0002
+        try:
+            _, result = self.win32gui.SendMessageTimeout(
+                hwnd, msg, wparam, lparam, SMTO_BLOCK | SMTO_ABORTIFHUNG, timeout_ms)
+        except Exception as e:
+            raise MessageTimeoutError(str(e))
+        return result
+
+    def is_hung_app_window(self, hwnd):
+        try:
+            import ctypes
+            return bool(ctypes.windll.user32.IsHungAppWindow(hwnd))
+        except Exception:
+            return False
+
+    def get_window_icon_image(self, hwnd, exe_path, send_message):
+        hicon = 0
+
+        # 尝试从窗口获取图标
+        try:
+            # 方法1: 获取大图标（无响应的窗口由 send_message 直接跳过）
+            hicon = send_message(hwnd, WM_GETICON, ICON_BIG, 0)
+
+            if not hicon:
+                # 方法2: 获取小图标
+                hicon = send_message(hwnd, WM_GETICON, ICON_SMALL, 0)
+
+            if not hicon:
+                # 方法3: 从类获取图标
+                try:
+                    hicon = self.win32gui.GetClassLong(hwnd, -14)  # GCL_HICON
+                except:
+                    pass
+
+            if not hicon:
+                # 方法4: 尝试获取小类图标
+                try:
+                    hicon = self.win32gui.GetClassLong(hwnd, -34)  # GCL_HICONSM
+                except:
+                    pass
+
+            # 如果获取到了图标句柄，转换为QImage
+            if hicon:
+                image = self._hicon_to_image(hicon)
+                if image is not None:
+                    return image
+        except Exception:
+            pass  # 静默忽略错误
+
+        # 方法5: 尝试从进程可执行文件获取图标
+        try:
+            if exe_path and os.path.exists(exe_path):
+                # 使用shell32.dll提取图标
+                import ctypes
+                from ctypes import wintypes
+
+                shell32 = ctypes.windll.shell32
+                # ExtractIconEx原型: UINT ExtractIconEx(LPCTSTR lpszFile, int nIconIndex, HICON *phiconLarge, HICON *phiconSmall, UINT nIcons)
+                large_icons = (wintypes.HICON * 1)()
+                small_icons = (wintypes.HICON * 1)()
+
+                num_icons = shell32.ExtractIconExW(exe_path, 0, large_icons, small_icons, 1)
+
+                if num_icons > 0 and large_icons[0]:
+                    image = self._hicon_to_image(large_icons[0])
+                    # 销毁图标句柄
+                    self.win32gui.DestroyIcon(large_icons[0])
+                    if small_icons[0]:
+                        self.win32gui.DestroyIcon(small_icons[0])
+
+                    if image is not None:
+                        return image
+        except Exception:
+            pass  # 静默忽略错误
+
+        return None
+
+    def _hicon_to_image(self, hicon):
+        """将Windows图标句柄转换为QImage"""
+        # 优先使用QtWin（如果可用）
+        if QTWIN_AVAILABLE:
+            try:
+                image = QtWin.imageFromHICON(hicon)
+                if not image.isNull():
+                    return image
+            except Exception:
+                pass  # 静默忽略错误
+
+        # 备用方法: 使用win32ui
+        try:
+            import win32ui
+            win32gui = self.win32gui
+
+            # 创建设备上下文
+            desktop_dc = win32gui.GetDC(0)
+            hdc = win32ui.CreateDCFromHandle(desktop_dc)
+            hbmp = win32ui.CreateBitmap()
+            hbmp.CreateCompatibleBitmap(hdc, 32, 32)
+
+            # 创建兼容DC
+            hdc_compatible = hdc.CreateCompatibleDC()
+            hdc_compatible.SelectObject(hbmp)
+
+            # 绘制图标
+            hdc_compatible.DrawIcon((0, 0), hicon)
+
+            # 获取位图数据
+            bmpinfo = hbmp.GetInfo()
+            bmpstr = hbmp.GetBitmapBits(True)
+
+            # 创建QImage（复制一份，避免引用已释放的缓冲区）
+            img = QImage(bmpstr, bmpinfo['bmWidth'], bmpinfo['bmHeight'], QImage.Format_RGB32).copy()
+
+            # 清理资源
+            win32gui.DeleteObject(hbmp.GetHandle())
+            hdc_compatible.DeleteDC()
+            win32gui.ReleaseDC(0, desktop_dc)
+
+            if not img.isNull():
+                return img
+        except Exception:
+            pass  # 静默忽略错误
+
+        # 所有方法都失败
+        return None
+
+    def list_pids(self):
+        return self.psutil.pids()
+
+    def get_process_info(self, pid):
+        psutil = self.psutil
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                name = process.name()
+                create_time = process.create_time()
+                try:
+                    exe = process.exe()
+                except (psutil.AccessDenied, psutil.ZombieProcess, OSError):
+                    exe = ""  # 高权限进程可能无法读取路径
+        except Exception:
+            return None
+        return {"pid": pid, "name": name, "exe": exe, "create_time": create_time}
+
+    def get_process_create_time(self, pid):
+        try:
+            return self.psutil.Process(pid).create_time()
+        except Exception:
+            return None
+
+    def create_event_source(self):
+        if WinEventHookSource.is_available():
+            return WinEventHookSource()
+        return None
+
+
+class SimulatedWindow:
+    """模拟后端中的一个窗口"""
+
+    def __init__(self, hwnd, title, class_name, pid, rect, visible=True, hung=False, elevated=False):
+        self.hwnd = hwnd
+        self.title = title
+        self.class_name = class_name
+        self.pid = pid
+        self.rect = rect
+        self.visible = visible
+        self.hung = hung  # 无响应：消息超时，调整位置失败
+        self.elevated = elevated  # 以管理员权限运行：调整位置时拒绝访问
+
+
+class SimulatedBackend(WindowBackend):
+    """确定性的内存模拟后端
+
+    可以模拟成千上万个窗口、每次系统调用的延迟以及无响应窗口，并统计每种
+    调用的次数（相当于系统调用次数），用于在任意平台上测试和测量性能。
+    对窗口的增删改会同时通过 event_source 发出对应的窗口事件。
+    """
+
+    def __init__(self, latency=0.0, hung_delay=0.0, seed=0):
+        """
+        Args:
+            latency: 每次窗口系统调用的模拟延迟（秒）
+            hung_delay: 向无响应窗口发送消息时的额外等待（秒），为0时立即超时
+            seed: 随机种子，保证生成的窗口集合可复现
+        """
+        self.latency = latency
+        self.hung_delay = hung_delay
+        self.random = random.Random(seed)
+        self.windows = OrderedDict()  # hwnd -> SimulatedWindow，顺序即Z序
+        self.processes = {}  # pid -> {"pid", "name", "exe", "create_time"}
+        self.call_counts = {}
+        self.event_source = SimulatedEventSource()
+        self._lock = threading.RLock()
+        self._next_hwnd = 0x10000
+        self._next_pid = 1000
+        self._clock = 1_700_000_000.0  # 模拟的进程创建时间
+
+    # ---- 模拟数据的构造与修改 ----
+
+    def add_process(self, name, exe=None, pid=None):
+        """添加一个模拟进程，返回pid"""
+        with self._lock:
+            if pid is None:
+                pid = self._next_pid
+                self._next_pid += 4
+            self._clock += 1
+            self.processes[pid] = {
+                "pid": pid,
+                "name": name,
+                "exe": exe if exe is not None else f"C:\\Program Files\\{name[:-4]}\\{name}",
+                "create_time": self._clock,
+            }
+            return pid
+
+    def remove_process(self, pid):
+        """结束模拟进程（其窗口一并销毁）"""
+        with self._lock:
+            self.processes.pop(pid, None)
+            hwnds = [hwnd for hwnd, window in self.windows.items() if window.pid == pid]
+        for hwnd in hwnds:
+            self.remove_window(hwnd)
+
+    def add_window(self, title, process_name="app.exe", class_name="SimWindow",
+                   rect=(100, 100, 900, 700), pid=None, visible=True, hung=False, elevated=False):
+        """添加一个模拟窗口，返回句柄"""
+        with self._lock:
+            if pid is None:
+                pid = self.add_process(process_name)
+            hwnd = self._next_hwnd
+            self._next_hwnd += 2
+            self.windows[hwnd] = SimulatedWindow(hwnd, title, class_name, pid, tuple(rect),
+                                                 visible, hung, elevated)
+        self.event_source.emit(EVENT_OBJECT_CREATE, hwnd)
+        if visible:
+            self.event_source.emit(EVENT_OBJECT_SHOW, hwnd)
+        return hwnd
+
+    def remove_window(self, hwnd):
+        """销毁模拟窗口"""
+        with self._lock:
+            removed = self.windows.pop(hwnd, None)
+        if removed is not None:
+            self.event_source.emit(EVENT_OBJECT_DESTROY, hwnd)
+
+    def set_window_title(self, hwnd, title):
+        """修改窗口标题"""
+        with self._lock:
+            self.windows[hwnd].title = title
+        self.event_source.emit(EVENT_OBJECT_NAMECHANGE, hwnd)
+
+    def move_window(self, hwnd, rect):
+        """由"用户"移动窗口（不计入调用次数）"""
+        with self._lock:
+            self.windows[hwnd].rect = tuple(rect)
+        self.event_source.emit(EVENT_OBJECT_LOCATIONCHANGE, hwnd)
+
+    def set_window_visible(self, hwnd, visible):
+        """显示或隐藏窗口"""
+        with self._lock:
+            self.windows[hwnd].visible = visible
+        self.event_source.emit(EVENT_OBJECT_SHOW if visible else EVENT_OBJECT_HIDE, hwnd)
+
+    def set_window_hung(self, hwnd, hung=True):
+        """设置窗口是否无响应"""
+        with self._lock:
+            self.windows[hwnd].hung = hung
+
+    def populate(self, count, process_count=None, hung_ratio=0.0):
+        """生成可复现的窗口集合
+
+        Args:
+            count: 窗口数量
+            process_count: 进程数量（默认约为窗口数的四分之一）
+            hung_ratio: 无响应窗口的比例
+
+        Returns:
+            新窗口的句柄列表
+        """
+        process_count = process_count or max(1, count // 4)
+        pids = [self.add_process(f"app{i:05d}.exe") for i in range(process_count)]
+        hwnds = []
+        for i in range(count):
+            pid = pids[self.random.randrange(process_count)]
+            x = self.random.randrange(0, 1600)
+            y = self.random.randrange(0, 900)
+            width = self.random.randrange(200, 1200)
+            height = self.random.randrange(150, 900)
+            hwnds.append(self.add_window(
+                f"Window {i:05d}",
+                class_name=f"SimClass{i % 16}",
+                rect=(x, y, x + width, y + height),
+                pid=pid,
+                hung=self.random.random() < hung_ratio,
+            ))
+        return hwnds
+
+    def reset_call_counts(self):
+        """清零调用统计"""
+        with self._lock:
+            self.call_counts = {}
+
+    def _call(self, name, hwnd=None):
+        """记录一次调用并模拟延迟；句柄无效时抛出异常"""
+        with self._lock:
+            self.call_counts[name] = self.call_counts.get(name, 0) + 1
+            window = self.windows.get(hwnd) if hwnd is not None else None
+        if self.latency:
+            time.sleep(self.latency)
+        if hwnd is not None and window is None:
+            raise OSError(1400, name, "无效的窗口句柄")
+        return window
+
+    # ---- WindowBackend 接口 ----
+
+    def enum_windows(self):
+        self._call("EnumWindows")
+        with self._lock:
+            return list(self.windows)
+
+    def is_window(self, hwnd):
+        self._call("IsWindow")
+        with self._lock:
+            return hwnd in self.windows
+
+    def is_window_visible(self, hwnd):
+        self._call("IsWindowVisible")
+        with self._lock:
+            window = self.windows.get(hwnd)
+            return bool(window and window.visible)
+
+    def get_window_text(self, hwnd):
+        return self._call("GetWindowText", hwnd).title
+
+    def get_window_rect(self, hwnd):
+        return self._call("GetWindowRect", hwnd).rect
+
+    def get_class_name(self, hwnd):
+        return self._call("GetClassName", hwnd).class_name
+
+    def get_window_pid(self, hwnd):
+        return self._call("GetWindowThreadProcessId", hwnd).pid
+
+    def set_window_pos(self, hwnd, x, y, width, height):
+        window = self._call("SetWindowPos", hwnd)
+        if window.elevated:
+            raise OSError(5, "SetWindowPos", "Access is denied")
+        if window.hung:
+            raise OSError(1460, "SetWindowPos", "超时")
+        window.rect = (x, y, x + width, y + height)
+
+    def begin_defer_window_pos(self, count):
+        self._call("BeginDeferWindowPos")
+        return []
+
+    def defer_window_pos(self, handle, hwnd, x, y, width, height):
+        window = self._call("DeferWindowPos", hwnd)
+        if window.elevated or window.hung:
+            raise OSError(5, "DeferWindowPos", "Access is denied")
+        handle.append((window, (x, y, x + width, y + height)))
+        return handle
+
+    def end_defer_window_pos(self, handle):
+        self._call("EndDeferWindowPos")
+        with self._lock:
+            for window, rect in handle:
+                window.rect = rect
+
+    def send_message_timeout(self, hwnd, msg, wparam, lparam, timeout_ms):
+        window = self._call("SendMessageTimeout", hwnd)
+        if window.hung:
+            if self.hung_delay:
+                time.sleep(min(self.hung_delay, timeout_ms / 1000))
+            raise MessageTimeoutError("窗口无响应")
+        return 0
+
+    def is_hung_app_window(self, hwnd):
+        self._call("IsHungAppWindow")
+        with self._lock:
+            window = self.windows.get(hwnd)
+            return bool(window and window.hung)
+
+    def get_window_icon_image(self, hwnd, exe_path, send_message):
+        self._call("ExtractIcon")
+        send_message(hwnd, WM_GETICON, ICON_BIG, 0)
+        with self._lock:
+            window = self.windows.get(hwnd)
+        if window is None:
+            return None
+        image = QImage(32, 32, QImage.Format_ARGB32)
+        image.fill(QColor.fromHsv(window.pid % 360, 160, 220))
+        return image
+
+    def list_pids(self):
+        self._call("EnumProcesses")
+        with self._lock:
+            return list(self.processes)
+
+    def get_process_info(self, pid):
+        self._call("OpenProcess")
+        with self._lock:
+            info = self.processes.get(pid)
+            return dict(info) if info else None
+
+    def create_event_source(self):
+        return self.event_source
@@ -0,0 +1,169 @@
+import sys
+import threading
+
+
+# WinEvent 事件常量
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+EVENT_OBJECT_NAMECHANGE = 0x800C
+
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+GA_PARENT = 1
+WM_QUIT = 0x0012
+
+
+class WindowEventSource:
+    """窗口事件源基类
+
+    事件源在窗口创建、显示、隐藏、销毁、改名或移动时调用回调
+    callback(event, hwnd)。回调可能在事件源自己的线程中被调用，
+    接收方需要自行保证线程安全。
+    """
+
+    def __init__(self):
+        self._callback = None
+
+    def start(self, callback):
+        """开始产生事件"""
+        self._callback = callback
+
+    def stop(self):
+        """停止产生事件"""
+        self._callback = None
+
+    def _dispatch(self, event, hwnd):
+        """把事件交给回调"""
+        callback = self._callback
+        if callback is not None:
+            try:
+                callback(event, hwnd)
+            except Exception:
+                pass  # 静默忽略回调错误，避免中断事件循环
+
+
+class SimulatedEventSource(WindowEventSource):
+    """模拟事件源，在没有Win32的环境中由调用方手动注入事件"""
+
+    def emit(self, event, hwnd):
+        """注入一个事件（同步调用回调）"""
+        self._dispatch(event, hwnd)
+
+    def emit_many(self, events):
+        """注入多个 (event, hwnd) 事件"""
+        for event, hwnd in events:
+            self._dispatch(event, hwnd)
+
+
+class WinEventHookSource(WindowEventSource):
+    """基于 SetWinEventHook 的事件源
+
+    在独立线程中安装进程外（WINEVENT_OUTOFCONTEXT）钩子并运行消息循环，
+    只转发顶层窗口自身（OBJID_WINDOW/CHILDID_SELF）的事件。
+    """
+
+    # (起始事件, 结束事件)：创建/销毁/显示/隐藏，以及位置变化/改名
+    EVENT_RANGES = (
+        (EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE),
+        (EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_NAMECHANGE),
+    )
+
+    def __init__(self):
+        super().__init__()
+        self._thread = None
+        self._thread_id = None
+        self._started = threading.Event()
+        self._hooks = []
+        self._proc = None  # 保持回调函数的引用，防止被回收
+
+    @staticmethod
+    def is_available():
+        """当前平台是否支持WinEvent钩子"""
+        return sys.platform == "win32"
+
+    def start(self, callback):
+        """在独立线程中安装钩子；安装失败时抛出 OSError"""
+        super().start(callback)
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run, name="WinEventHook", daemon=True)
+        self._thread.start()
+        self._started.wait(2)
+        if not self._hooks:
+            self.stop()
+            raise OSError("SetWinEventHook 安装失败")
+
+    def stop(self):
+        """结束消息循环并卸载钩子"""
+        super().stop()
+        if self._thread is not None and self._thread_id:
+            try:
+                import ctypes
+                ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            except Exception:
+                pass
+            self._thread.join(2)
+        self._thread = None
+        self._thread_id = None
+
+    def _run(self):
+        """钩子线程：安装钩子后运行消息循环，直到收到 WM_QUIT"""
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            user32 = ctypes.windll.user32
+            self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+
+            WinEventProc = ctypes.WINFUNCTYPE(
+                None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+            )
+            user32.SetWinEventHook.restype = wintypes.HANDLE
+            user32.SetWinEventHook.argtypes = [
+                wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc,
+                wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+            ]
+            user32.GetAncestor.restype = wintypes.HWND
+            user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+            user32.GetDesktopWindow.restype = wintypes.HWND
+            desktop = user32.GetDesktopWindow()
+
+            def handle_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+                if not hwnd or id_object != OBJID_WINDOW or id_child != CHILDID_SELF:
+                    return
+                # 只关心顶层窗口；已销毁的窗口无法查询父窗口，直接转发
+                if event != EVENT_OBJECT_DESTROY and user32.GetAncestor(hwnd, GA_PARENT) != desktop:
+                    return
+                self._dispatch(event, hwnd)
+
+            self._proc = WinEventProc(handle_event)
+            self._hooks = []
+            for event_min, event_max in self.EVENT_RANGES:
+                hook = user32.SetWinEventHook(
+                    event_min, event_max, 0, self._proc, 0, 0,
+                    WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+                )
+                if hook:
+                    self._hooks.append(hook)
+        except Exception:
+            self._hooks = []
+        finally:
+            self._started.set()
+
+        if not self._hooks:
+            return
+
+        try:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            for hook in self._hooks:
+                user32.UnhookWinEvent(hook)
+            self._hooks = []
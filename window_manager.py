@@ -1,194 +1,547 @@
 import os
-import win32gui
-import win32process
-import psutil
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtGui import QIcon, QPixmap, QImage
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
 
-# 尝试导入QtWinExtras
-try:
-    from PyQt5.QtWinExtras import QtWin
-    QTWIN_AVAILABLE = True
-except ImportError:
-    QTWIN_AVAILABLE = False
+
+# 已移除窗口的保留代数，超出后调用方需要整体重建
+SNAPSHOT_HISTORY_LIMIT = 256
+
+# 跨进程消息的默认超时（毫秒）以及无响应窗口的冷却时间（秒）
+DEFAULT_MESSAGE_TIMEOUT_MS = 200
+DEFAULT_HUNG_COOLDOWN = 30
+
+
+def icon_from_image(image):
+    """把图标的QImage转换为QIcon（QPixmap只能在GUI线程使用，必须在GUI线程调用）"""
+    if image is None or image.isNull():
+        return QIcon()
+    return QIcon(QPixmap.fromImage(image))
+
+
+class WindowSnapshot:
+    """窗口快照：一次枚举得到的完整视图，以及相对于基准代数的增量"""
+    
+    def __init__(self, generation, windows, added, removed, changed, full=False, hung=None):
+        self.generation = generation  # 本次枚举的代数
+        self.windows = list(windows.values())  # 当前所有窗口（按枚举顺序）
+        self.added = added  # 新出现的窗口
+        self.removed = removed  # 已消失的窗口
+        self.changed = changed  # 标题或位置发生变化的窗口
+        self.full = full  # 为True时基准已失效，调用方应整体重建
+        self.hung = hung or []  # 处于无响应冷却期的窗口句柄
+        self._by_hwnd = windows
+        self._match_index = None
+    
+    def get(self, hwnd):
+        """根据句柄获取窗口信息"""
+        return self._by_hwnd.get(hwnd)
+    
+    @property
+    def match_index(self):
+        """本快照所有窗口的匹配索引（首次访问时构建，之后复用）"""
+        if self._match_index is None:
+            self._match_index = WindowMatchIndex(self.windows)
+        return self._match_index
+    
+    def has_changes(self):
+        """是否存在任何增量"""
+        return bool(self.full or self.added or self.removed or self.changed)
+
+
+class WindowMatchIndex:
+    """窗口匹配索引：以 (标题, 进程名) 为键的哈希索引
+    
+    用于替代"每个配置遍历所有窗口"的嵌套循环，所有配置的匹配只需一次遍历。
+    """
+    
+    def __init__(self, windows):
+        self.by_key = {}  # (title, process_name) -> [window]
+        
+        for window in windows:
+            self.by_key.setdefault((window["title"], window["process_name"]), []).append(window)
+    
+    def find(self, title, process):
+        """查找标题和进程名都匹配的所有窗口"""
+        return self.by_key.get((title, process), [])
+    
+    def find_first(self, title, process):
+        """查找第一个匹配的窗口，没有则返回None"""
+        windows = self.by_key.get((title, process))
+        return windows[0] if windows else None
+    
+    def match_configs(self, configs):
+        """一次遍历完成所有配置的匹配
+        
+        Returns:
+            [(config, [window, ...]), ...]，未匹配到窗口的配置对应空列表
+        """
+        return [(config, self.find(config.get("title"), config.get("process")))
+                for config in configs]
+
+
+class IconCache:
+    """有界LRU图标缓存
+    
+    同时按条目数和估算字节数限制容量，超出时淘汰最久未使用的条目。
+    缓存的是QImage而不是QIcon/QPixmap：条目会在监测线程中失效或淘汰，
+    QImage可以在任意线程释放，转换为QIcon由GUI线程在使用时完成。
+    键通常为 "exe:<可执行文件路径>"（同一程序的窗口共用图标），无法获取路径时
+    退回 "hwnd:<句柄>"；句柄所属进程变化（句柄被系统复用）时对应条目会失效。
+    """
+    
+    def __init__(self, max_entries=256, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._hwnd_owners = {}  # hwnd -> pid
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def exe_key(exe_path):
+        """按可执行文件路径生成缓存键"""
+        return f"exe:{os.path.normcase(exe_path)}"
+    
+    @staticmethod
+    def hwnd_key(hwnd):
+        """按窗口句柄生成缓存键"""
+        return f"hwnd:{hwnd}"
+    
+    @staticmethod
+    def estimate_size(value):
+        """估算QImage占用的字节数"""
+        try:
+            if isinstance(value, QImage):
+                return value.bytesPerLine() * value.height()
+        except Exception:
+            pass
+        return 32 * 32 * 4
+    
+    def get(self, key):
+        """读取缓存，命中时移到最近使用的位置；未命中返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def contains(self, key):
+        """是否存在缓存（不影响LRU顺序和计数）"""
+        with self._lock:
+            return key in self._entries
+    
+    def put(self, key, value):
+        """写入缓存，并按容量限制淘汰旧条目"""
+        size = self.estimate_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     self.total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+    
+    def invalidate(self, key):
+        """删除指定条目"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+                self.invalidations += 1
+    
+    def check_owner(self, hwnd, pid):
+        """记录句柄所属进程；进程发生变化时使该句柄的缓存失效
+        
+        Returns:
+            句柄是否被复用（所属进程发生了变化）
+        """
+        with self._lock:
+            old_pid = self._hwnd_owners.get(hwnd)
+            self._hwnd_owners[hwnd] = pid
+        if old_pid is not None and old_pid != pid:
+            self.invalidate(self.hwnd_key(hwnd))
+            return True
+        return False
+    
+    def forget_hwnd(self, hwnd):
+        """窗口已关闭，清除句柄相关的记录"""
+        with self._lock:
+            self._hwnd_owners.pop(hwnd, None)
+        self.invalidate(self.hwnd_key(hwnd))
+    
+    def clear(self):
+        """清空缓存（计数保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._hwnd_owners.clear()
+            self.total_bytes = 0
+    
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class ProcessInfoCache:
+    """进程元数据缓存（进程名、可执行文件路径、创建时间）
+    
+    条目以 (pid, create_time) 作为身份：进程退出后由 refresh() 批量清除，
+    对新出现的窗口查询时可要求校验创建时间，以发现被系统复用的pid。
+    稳定状态下每次监测只需一次 list_pids() 调用。
+    """
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self._entries = {}  # pid -> {"pid", "name", "exe", "create_time"}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.queries = 0  # 实际查询进程信息的次数
+        self.evictions = 0
+    
+    def refresh(self):
+        """批量刷新：一次性获取所有存活的pid，清除已退出进程的条目"""
+        try:
+            live_pids = set(self.backend.list_pids())
+        except Exception:
+            return
+        with self._lock:
+            for pid in [pid for pid in self._entries if pid not in live_pids]:
+                del self._entries[pid]
+                self.evictions += 1
+    
+    def get(self, pid, verify=False):
+        """获取进程信息
+        
+        Args:
+            pid: 进程ID
+            verify: 是否校验创建时间（用于新窗口，检测pid是否已被复用）
+            
+        Returns:
+            信息字典，进程不存在时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(pid)
+        
+        if entry is not None and verify:
+            try:
+                create_time = self.backend.get_process_create_time(pid)
+            except Exception:
+                create_time = None
+            if create_time != entry["create_time"]:
+                entry = None
+        
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry
+        
+        entry = self._query(pid)
+        with self._lock:
+            self.queries += 1
+            if entry is None:
+                self._entries.pop(pid, None)
+            else:
+                self._entries[pid] = entry
+        return entry
+    
+    def get_name(self, pid, verify=False):
+        """获取进程名，失败返回 "Unknown" """
+        entry = self.get(pid, verify)
+        return entry["name"] if entry else "Unknown"
+    
+    def get_exe(self, pid):
+        """获取可执行文件路径，失败返回None"""
+        entry = self.get(pid)
+        return entry["exe"] if entry and entry["exe"] else None
+    
+    def _query(self, pid):
+        """通过后端查询单个进程"""
+        try:
+            return self.backend.get_process_info(pid)
+        except Exception:
+            return None
+    
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "queries": self.queries,
+                "evictions": self.evictions,
+            }
 
 
 class WindowManager:
-    """窗口管理类，负责所有窗口相关的操作"""
+    """窗口管理类，负责所有窗口相关的操作
+    
+    所有窗口系统调用都经由 backend（WindowBackend）完成，默认使用 pywin32 实现；
+    测试和性能测量时可以传入 SimulatedBackend。
+    """
     
-    def __init__(self):
-        self.window_icon_cache = {}  # 缓存窗口图标
+    def __init__(self, message_timeout_ms=DEFAULT_MESSAGE_TIMEOUT_MS, hung_cooldown=DEFAULT_HUNG_COOLDOWN,
+                 backend=None):
+        if backend is None:
+            from window_backend import Win32Backend
+            backend = Win32Backend()
+        self.backend = backend
+        self.icon_cache = IconCache()  # 有界LRU图标缓存
+        self.process_cache = ProcessInfoCache(backend)  # 进程元数据缓存
+        
+        # 跨进程消息超时，以及无响应窗口的跳过记录
+        self.message_timeout_ms = message_timeout_ms
+        self.hung_cooldown = hung_cooldown
+        self._hung_windows = {}  # hwnd -> 冷却结束时间（monotonic）
+        self._hung_lock = threading.Lock()
+        
+        # 增量快照状态，后台线程也会枚举窗口，需要加锁
+        self._snapshot_lock = threading.RLock()
+        self._generation = 0
+        self._windows = {}  # hwnd -> 窗口信息
+        self._window_generations = {}  # hwnd -> (出现代数, 最后变化代数)
+        self._removed_windows = []  # [(移除代数, 窗口信息)]
     
     def get_window_list(self):
         """获取所有窗口列表"""
-        def callback(hwnd, windows):
-            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
-                rect = win32gui.GetWindowRect(hwnd)
-                if rect[2] - rect[0] > 100 and rect[3] - rect[1] > 100:  # 过滤掉太小的窗口
-                    # 获取窗口类名
-                    class_name = win32gui.GetClassName(hwnd)
-                    
-                    # 获取进程信息
-                    _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                    try:
-                        process = psutil.Process(pid)
-                        process_name = process.name()
-                    except:
-                        process_name = "Unknown"
-                    
-                    # 获取窗口图标
-                    icon = self.get_window_icon(hwnd, class_name, process_name)
-                    
-                    windows.append({
-                        "hwnd": hwnd,
-                        "title": win32gui.GetWindowText(hwnd),
-                        "class_name": class_name,
-                        "process_name": process_name,
-                        "pid": pid,
-                        "rect": rect,
-                        "icon": icon
-                    })
-            return True
-        
-        windows = []
-        win32gui.EnumWindows(callback, windows)
-        return windows
+        return self.get_window_snapshot().windows
     
-    def get_window_icon(self, hwnd, class_name, process_name):
-        """获取窗口的系统原生图标"""
-        # 先尝试从缓存获取
-        cache_key = f"{hwnd}_{process_name}"
-        if cache_key in self.window_icon_cache:
-            return self.window_icon_cache[cache_key]
+    def get_window_snapshot(self, since=None, hwnds=None):
+        """枚举窗口并返回增量快照
         
-        icon = None
-        hicon = 0
+        只有新出现、或标题/位置发生变化的窗口才会重新查询类名、进程和图标，
+        其余窗口直接复用上一次枚举的结果。
         
-        # 尝试从窗口获取图标
-        try:
-            # 方法1: 获取大图标
-            hicon = win32gui.SendMessage(hwnd, 0x007F, 1, 0)  # WM_GETICON, ICON_BIG
+        Args:
+            since: 调用方上次看到的快照代数；为None时相对于上一次枚举，
+                   为0或过旧时返回完整视图（full=True）
+            hwnds: 只重新探测这些窗口句柄（来自窗口事件的增量更新）；
+                   为None时完整枚举所有顶层窗口
             
-            if not hicon:
-                # 方法2: 获取小图标
-                hicon = win32gui.SendMessage(hwnd, 0x007F, 0, 0)  # WM_GETICON, ICON_SMALL
+        Returns:
+            WindowSnapshot对象
+        """
+        with self._snapshot_lock:
+            previous_generation = self._generation
+            generation = previous_generation + 1
             
-            if not hicon:
-                # 方法3: 从类获取图标
-                try:
-                    hicon = win32gui.GetClassLong(hwnd, -14)  # GCL_HICON
-                except:
-                    pass
+            if hwnds is None:
+                # 每次完整枚举只批量刷新一次进程列表
+                self.process_cache.refresh()
+                current = {}
+                for hwnd in self.backend.enum_windows():
+                    window = self._probe_window(hwnd, generation)
+                    if window is not None:
+                        current[hwnd] = window
+            else:
+                # 增量更新：其余窗口保持不变，只探测事件涉及的窗口
+                current = dict(self._windows)
+                for hwnd in hwnds:
+                    window = self._probe_window(hwnd, generation)
+                    if window is not None:
+                        current[hwnd] = window
+                    else:
+                        current.pop(hwnd, None)
             
-            if not hicon:
-                # 方法4: 尝试获取小类图标
-                try:
-                    hicon = win32gui.GetClassLong(hwnd, -34)  # GCL_HICONSM
-                except:
-                    pass
+            # 记录已消失的窗口
+            for hwnd, window in self._windows.items():
+                if hwnd not in current:
+                    self._removed_windows.append((generation, window))
+                    self._window_generations.pop(hwnd, None)
+                    self.icon_cache.forget_hwnd(hwnd)
+                    with self._hung_lock:
+                        self._hung_windows.pop(hwnd, None)
+            oldest = generation - SNAPSHOT_HISTORY_LIMIT
+            self._removed_windows = [entry for entry in self._removed_windows if entry[0] > oldest]
+            
+            self._windows = current
+            self._generation = generation
             
-            # 如果获取到了图标句柄，转换为QIcon
-            if hicon:
-                icon = self._hicon_to_qicon(hicon)
-                if icon and not icon.isNull():
-                    self.window_icon_cache[cache_key] = icon
-                    return icon
+            if since is None:
+                since = previous_generation
+            return self._build_snapshot(since)
+    
+    def _probe_window(self, hwnd, generation):
+        """探测单个窗口：不可见、无标题或太小返回None，未变化时复用旧记录"""
+        try:
+            if not self.backend.is_window_visible(hwnd):
+                return None
+            title = self.backend.get_window_text(hwnd)
+            if not title:
+                return None
+            rect = self.backend.get_window_rect(hwnd)
         except Exception:
-            pass  # 静默忽略错误
+            return None  # 窗口已被销毁
+        if rect[2] - rect[0] <= 100 or rect[3] - rect[1] <= 100:  # 过滤掉太小的窗口
+            return None
+        
+        old = self._windows.get(hwnd)
+        if old is not None and old["title"] == title and old["rect"] == rect:
+            return old
         
-        # 方法5: 尝试从进程可执行文件获取图标
         try:
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = psutil.Process(pid)
-            exe_path = process.exe()
+            window = self._query_window(hwnd, title, rect, old)
+        except Exception:
+            return None  # 窗口在查询过程中被销毁
+        if old is None:
+            self._window_generations[hwnd] = (generation, generation)
+        else:
+            self._window_generations[hwnd] = (self._window_generations[hwnd][0], generation)
+        return window
+    
+    def get_known_window(self, hwnd):
+        """获取最近一次枚举中该句柄对应的窗口记录（不重新枚举）"""
+        with self._snapshot_lock:
+            return self._windows.get(hwnd)
+    
+    def _build_snapshot(self, since):
+        """根据基准代数计算增量"""
+        generation = self._generation
+        hung = [hwnd for hwnd in self.get_hung_windows() if hwnd in self._windows]
+        if since <= 0 or since > generation or since < generation - SNAPSHOT_HISTORY_LIMIT:
+            return WindowSnapshot(generation, self._windows, list(self._windows.values()), [], [],
+                                  full=True, hung=hung)
+        
+        added = []
+        changed = []
+        for hwnd, window in self._windows.items():
+            added_generation, changed_generation = self._window_generations[hwnd]
+            if added_generation > since:
+                added.append(window)
+            elif changed_generation > since:
+                changed.append(window)
+        removed = [window for removed_generation, window in self._removed_windows
+                   if removed_generation > since]
+        return WindowSnapshot(generation, self._windows, added, removed, changed, hung=hung)
+    
+    def _query_window(self, hwnd, title, rect, old=None):
+        """查询窗口的完整信息，同一进程的旧记录可复用进程名和图标"""
+        # 获取窗口类名
+        class_name = self.backend.get_class_name(hwnd)
+        
+        # 获取进程信息
+        pid = self.backend.get_window_pid(hwnd)
+        self.icon_cache.check_owner(hwnd, pid)
+        if old is not None and old["pid"] == pid and old["class_name"] == class_name:
+            process_name = old["process_name"]
+            icon = old["icon"]
+        else:
+            # 新窗口需要校验pid是否被复用
+            process_name = self.process_cache.get_name(pid, verify=old is None or old["pid"] != pid)
             
-            if exe_path and os.path.exists(exe_path):
-                # 使用shell32.dll提取图标
-                import ctypes
-                from ctypes import wintypes
-                
-                shell32 = ctypes.windll.shell32
-                # ExtractIconEx原型: UINT ExtractIconEx(LPCTSTR lpszFile, int nIconIndex, HICON *phiconLarge, HICON *phiconSmall, UINT nIcons)
-                large_icons = (wintypes.HICON * 1)()
-                small_icons = (wintypes.HICON * 1)()
-                
-                num_icons = shell32.ExtractIconExW(exe_path, 0, large_icons, small_icons, 1)
-                
-                if num_icons > 0 and large_icons[0]:
-                    hicon = large_icons[0]
-                    icon = self._hicon_to_qicon(hicon)
-                    # 销毁图标句柄
-                    win32gui.DestroyIcon(large_icons[0])
-                    if small_icons[0]:
-                        win32gui.DestroyIcon(small_icons[0])
-                    
-                    if icon and not icon.isNull():
-                        self.window_icon_cache[cache_key] = icon
-                        return icon
+            # 图标不在枚举路径上获取，由IconResolver在后台补全为QImage（None表示尚未解析）
+            icon = None
+        
+        return {
+            "hwnd": hwnd,
+            "title": title,
+            "class_name": class_name,
+            "process_name": process_name,
+            "pid": pid,
+            "rect": rect,
+            "icon": icon
+        }
+    
+    def get_window_icon(self, hwnd, class_name, process_name):
+        """获取窗口的系统原生图标（同步，必须在GUI线程调用）"""
+        return icon_from_image(self._get_cached_icon_image(hwnd))
+    
+    def _get_cached_icon_image(self, hwnd):
+        """获取窗口图标的QImage（优先读取缓存），获取失败时返回空QImage"""
+        try:
+            pid = self.backend.get_window_pid(hwnd)
         except Exception:
-            pass  # 静默忽略错误
+            pid = None
+        
+        # 句柄被复用时旧图标失效；优先按可执行文件路径共用缓存
+        exe_path = None
+        if pid is not None:
+            self.icon_cache.check_owner(hwnd, pid)
+            exe_path = self.process_cache.get_exe(pid)
+        cache_key = IconCache.exe_key(exe_path) if exe_path else IconCache.hwnd_key(hwnd)
+        
+        # 先尝试从缓存获取
+        image = self.icon_cache.get(cache_key)
+        if image is not None:
+            return image
+        
+        image = self.get_window_icon_image(hwnd, exe_path)
+        if image is not None and not image.isNull():
+            self.icon_cache.put(cache_key, image)
+            return image
         
         # 如果所有方法都失败，返回空图标
-        return QIcon()
+        return QImage()
+    
+    def get_icon_cache_stats(self):
+        """获取图标缓存的命中/未命中/淘汰统计"""
+        return self.icon_cache.stats()
+    
+    def get_process_cache_stats(self):
+        """获取进程缓存的命中/查询/清除统计"""
+        return self.process_cache.stats()
+    
+    def resolve_icon(self, window):
+        """同步补全窗口记录中尚未解析的图标（用于必须立即拿到图标的场景，必须在GUI线程调用）
+        
+        窗口记录中保存的是QImage，返回转换后的QIcon。
+        """
+        if window.get("icon") is None:
+            window["icon"] = self._get_cached_icon_image(window["hwnd"])
+        return icon_from_image(window["icon"])
     
-    def _hicon_to_qicon(self, hicon):
-        """将Windows图标句柄转换为QIcon"""
-        # 优先使用QtWin（如果可用）
-        if QTWIN_AVAILABLE:
+    def get_window_icon_image(self, hwnd, exe_path=None):
+        """获取窗口图标的QImage，不涉及QPixmap，可在后台线程调用
+        
+        Args:
+            hwnd: 窗口句柄
+            exe_path: 进程可执行文件路径（可选，为None时根据窗口查询）
+            
+        Returns:
+            QImage对象，获取失败返回None
+        """
+        if exe_path is None:
             try:
-                pixmap = QtWin.fromHICON(hicon)
-                if not pixmap.isNull():
-                    return QIcon(pixmap)
+                exe_path = self.process_cache.get_exe(self.backend.get_window_pid(hwnd))
             except Exception:
-                pass  # 静默忽略错误
+                exe_path = None
         
-        # 备用方法: 使用win32ui
+        # 窗口消息经由 send_message 发送，无响应的窗口直接跳过
         try:
-            import win32ui
-            import win32con
-            
-            # 创建设备上下文
-            desktop_dc = win32gui.GetDC(0)
-            hdc = win32ui.CreateDCFromHandle(desktop_dc)
-            hbmp = win32ui.CreateBitmap()
-            hbmp.CreateCompatibleBitmap(hdc, 32, 32)
-            
-            # 创建兼容DC
-            hdc_compatible = hdc.CreateCompatibleDC()
-            hdc_compatible.SelectObject(hbmp)
-            
-            # 绘制图标
-            hdc_compatible.DrawIcon((0, 0), hicon)
-            
-            # 获取位图数据
-            bmpinfo = hbmp.GetInfo()
-            bmpstr = hbmp.GetBitmapBits(True)
-            
-            # 创建QImage
-            img = QImage(bmpstr, bmpinfo['bmWidth'], bmpinfo['bmHeight'], QImage.Format_RGB32)
-            
-            # 清理资源
-            win32gui.DeleteObject(hbmp.GetHandle())
-            hdc_compatible.DeleteDC()
-            win32gui.ReleaseDC(0, desktop_dc)
-            
-            if not img.isNull():
-                return QIcon(QPixmap.fromImage(img))
+            return self.backend.get_window_icon_image(hwnd, exe_path, self.send_message)
         except Exception:
-            pass  # 静默忽略错误
-        
-        # 所有方法都失败
-        return QIcon()
-    
-
+            return None  # 静默忽略错误
     
     def resize_window(self, hwnd, x, y, width, height):
         """调整窗口大小和位置。返回 (success, error_message)"""
+        if self.is_window_hung(hwnd):
+            return False, "窗口无响应，已跳过"
         try:
-            import win32con
-            # 使用 SWP_NOZORDER | SWP_NOACTIVATE 避免干扰窗口层级和激活状态
-            flags = win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE
-            win32gui.SetWindowPos(hwnd, None, x, y, width, height, flags)
+            # 后端使用 SWP_NOZORDER | SWP_NOACTIVATE，避免干扰窗口层级和激活状态
+            self.backend.set_window_pos(hwnd, x, y, width, height)
             return True, None
         except Exception as e:
             # 检查是否为权限错误
@@ -198,17 +551,125 @@ class WindowManager:
             else:
                 return False, f"调整窗口失败：{error_msg}"
     
+    def resize_windows(self, placements):
+        """批量调整多个窗口的大小和位置
+        
+        所有目标位置在一次 BeginDeferWindowPos/DeferWindowPos/EndDeferWindowPos
+        事务中提交，窗口一次性重绘。某个窗口无法加入事务时（会导致整个事务
+        被系统丢弃），将其剔除后重新组织事务，该窗口改为单独调用 resize_window。
+        
+        Args:
+            placements: [(hwnd, x, y, width, height), ...]
+            
+        Returns:
+            [(hwnd, success, error_message), ...]，顺序与 placements 一致
+        """
+        results = {}
+        pending = []
+        fallback = []
+        
+        # 无响应的窗口会阻塞整个事务，直接跳过
+        for placement in placements:
+            if self.is_window_hung(placement[0]):
+                results[placement[0]] = (False, "窗口无响应，已跳过")
+            else:
+                pending.append(placement)
+        
+        if len(pending) > 1:
+            retries = 0
+            while len(pending) > 1:
+                failed_index = None
+                try:
+                    hdwp = self.backend.begin_defer_window_pos(len(pending))
+                except Exception:
+                    break
+                for i, (hwnd, x, y, width, height) in enumerate(pending):
+                    try:
+                        hdwp = self.backend.defer_window_pos(hdwp, hwnd, x, y, width, height)
+                    except Exception:
+                        failed_index = i
+                        break
+                
+                if failed_index is None:
+                    try:
+                        self.backend.end_defer_window_pos(hdwp)
+                        for hwnd, *_ in pending:
+                            results[hwnd] = (True, None)
+                        pending = []
+                    except Exception:
+                        pass  # 提交失败，全部逐个回退
+                    break
+                
+                # 失败的窗口改为单独处理，其余窗口重新组织事务
+                fallback.append(pending.pop(failed_index))
+                retries += 1
+                if retries >= 3:
+                    break
+        
+        # 逐个回退：批量失败的窗口以及未能进入事务的窗口
+        for hwnd, x, y, width, height in fallback + pending:
+            results[hwnd] = self.resize_window(hwnd, x, y, width, height)
+        
+        return [(hwnd, *results[hwnd]) for hwnd, *_ in placements]
+    
+    def send_message(self, hwnd, msg, wparam, lparam):
+        """带超时的跨进程消息发送
+        
+        先检查窗口是否无响应，再通过 SendMessageTimeout 发送消息；
+        超时或窗口无响应时记入冷却表，冷却期内的后续调用直接跳过。
+        
+        Returns:
+            消息返回值，窗口无响应或超时返回None
+        """
+        if self.is_window_hung(hwnd):
+            return None
+        try:
+            return self.backend.send_message_timeout(hwnd, msg, wparam, lparam, self.message_timeout_ms)
+        except Exception:
+            # 超时或窗口已失效，记为无响应
+            self.mark_window_hung(hwnd)
+            return None
+    
+    def is_window_hung(self, hwnd):
+        """窗口是否无响应（冷却期内直接返回True，不再查询系统）"""
+        now = time.monotonic()
+        with self._hung_lock:
+            until = self._hung_windows.get(hwnd)
+            if until is not None:
+                if until > now:
+                    return True
+                del self._hung_windows[hwnd]
+        
+        try:
+            hung = self.backend.is_hung_app_window(hwnd)
+        except Exception:
+            hung = False
+        if hung:
+            self.mark_window_hung(hwnd)
+        return hung
+    
+    def mark_window_hung(self, hwnd):
+        """记录无响应的窗口，冷却期内跳过对它的消息调用"""
+        with self._hung_lock:
+            self._hung_windows[hwnd] = time.monotonic() + self.hung_cooldown
+    
+    def get_hung_windows(self):
+        """获取当前处于冷却期的无响应窗口句柄列表"""
+        now = time.monotonic()
+        with self._hung_lock:
+            return [hwnd for hwnd, until in self._hung_windows.items() if until > now]
+    
     def get_window_rect(self, hwnd):
         """获取窗口矩形区域"""
         try:
-            return win32gui.GetWindowRect(hwnd)
+            return self.backend.get_window_rect(hwnd)
         except:
             return None
     
     def is_window_valid(self, hwnd):
         """检查窗口是否仍然有效"""
         try:
-            return win32gui.IsWindow(hwnd) and win32gui.IsWindowVisible(hwnd)
+            return self.backend.is_window(hwnd) and self.backend.is_window_visible(hwnd)
         except:
             return False
     
@@ -218,16 +679,11 @@ class WindowManager:
             if not self.is_window_valid(hwnd):
                 return None
                 
-            title = win32gui.GetWindowText(hwnd)
-            class_name = win32gui.GetClassName(hwnd)
-            rect = win32gui.GetWindowRect(hwnd)
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            
-            try:
-                process = psutil.Process(pid)
-                process_name = process.name()
-            except:
-                process_name = "Unknown"
+            title = self.backend.get_window_text(hwnd)
+            class_name = self.backend.get_class_name(hwnd)
+            rect = self.backend.get_window_rect(hwnd)
+            pid = self.backend.get_window_pid(hwnd)
+            process_name = self.process_cache.get_name(pid)
             
             return {
                 "hwnd": hwnd,
@@ -238,4 +694,98 @@ class WindowManager:
                 "rect": rect
             }
         except Exception:
-            return None
\ No newline at end of file
+            return None
+
+
+class IconResolver(QObject):
+    """后台图标解析器
+    
+    窗口枚举只返回图标占位（None），由本类在线程池中提取图标，
+    同一可执行文件只提取一次，完成后通过 icon_ready 信号通知UI。
+    同一程序的多个进程同时请求时，后来的进程挂到正在进行的提取上，
+    不会重复提取。
+    """
+    
+    icon_ready = pyqtSignal(object, QIcon)  # (hwnd, QIcon)
+    _image_ready = pyqtSignal(object, object, object)  # ([pid, ...], 缓存键, QImage或None)，由工作线程发出
+    
+    def __init__(self, window_manager, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.window_manager = window_manager
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="IconResolver")
+        self._pending = {}  # pid -> [hwnd, ...]（仅在GUI线程访问）
+        self._inflight = {}  # 缓存键 -> [pid, ...]，正在提取的可执行文件及等待它的进程（工作线程间共享）
+        self._lock = threading.Lock()
+        # 工作线程发出的信号以排队方式回到本对象所在的GUI线程
+        self._image_ready.connect(self._on_image_ready)
+    
+    def request(self, windows):
+        """为尚未解析图标的窗口排队解析，同一进程的请求会合并"""
+        for window in windows:
+            if window.get("icon") is not None:
+                continue
+            pid = window["pid"]
+            waiting = self._pending.get(pid)
+            if waiting is not None:
+                if window["hwnd"] not in waiting:
+                    waiting.append(window["hwnd"])
+                continue
+            self._pending[pid] = [window["hwnd"]]
+            try:
+                self._executor.submit(self._resolve, pid, window["hwnd"])
+            except RuntimeError:
+                self._pending.pop(pid, None)  # 解析器已关闭
+    
+    def shutdown(self):
+        """停止解析器，丢弃尚未开始的任务"""
+        self._executor.shutdown(wait=False)
+        self._pending.clear()
+    
+    def _resolve(self, pid, hwnd):
+        """在工作线程中提取图标，同一可执行文件同时只提取一次"""
+        exe_path = self.window_manager.process_cache.get_exe(pid)
+        if not exe_path:
+            image = self.window_manager.get_window_icon_image(hwnd, exe_path)
+            self._image_ready.emit([pid], IconCache.hwnd_key(hwnd), image)
+            return
+        
+        icon_cache = self.window_manager.icon_cache
+        cache_key = IconCache.exe_key(exe_path)
+        with self._lock:
+            waiting = self._inflight.get(cache_key)
+            if waiting is not None:
+                # 同一程序的图标正在提取，完成后一并通知
+                waiting.append(pid)
+                return
+            cached = icon_cache.contains(cache_key)
+            if not cached:
+                self._inflight[cache_key] = [pid]
+        if cached:
+            # 同一程序的图标已解析过，直接复用缓存
+            self._image_ready.emit([pid], cache_key, None)
+            return
+        
+        image = self.window_manager.get_window_icon_image(hwnd, exe_path)
+        with self._lock:
+            # 先写入缓存再移出提取列表，之后的请求直接复用缓存
+            if image is not None and not image.isNull():
+                icon_cache.put(cache_key, image)
+            pids = self._inflight.pop(cache_key)
+        self._image_ready.emit(pids, cache_key, image)
+    
+    def _on_image_ready(self, pids, cache_key, image):
+        """在GUI线程中把QImage回填到窗口记录，并转换为QIcon通知UI"""
+        icon_cache = self.window_manager.icon_cache
+        if image is not None and not image.isNull():
+            icon_cache.put(cache_key, image)
+        else:
+            image = icon_cache.get(cache_key) or QImage()
+        icon = icon_from_image(image)
+        
+        for pid in pids:
+            for hwnd in self._pending.pop(pid, []):
+                window = self.window_manager.get_known_window(hwnd)
+                if window is None or window["pid"] != pid:
+                    continue  # 窗口已关闭或句柄已被复用
+                window["icon"] = image
+                self.icon_ready.emit(hwnd, icon)
@@ -0,0 +1,306 @@
+import time
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from window_manager import WindowMatchIndex
+
+
+# 默认监测间隔（毫秒），没有事件源时按此间隔轮询
+DEFAULT_MONITOR_INTERVAL = 5000
+# 有事件源时的兜底完整枚举间隔（毫秒）
+DEFAULT_RECONCILE_INTERVAL = 60000
+# 连续事件的合并等待时间（毫秒），拖动窗口时位置变化事件会连续触发
+DEFAULT_EVENT_DEBOUNCE = 300
+
+
+def _collect_placements(index, configs, placements):
+    """把启用的配置与索引中的窗口匹配，位置或尺寸不一致的窗口加入 placements（hwnd -> 参数）"""
+    # 跳过未激活的配置
+    enabled_configs = [config for config in configs if config.get("enabled", True)]
+    for config, matched_windows in index.match_configs(enabled_configs):
+        for window in matched_windows:
+            # 检查窗口是否已经应用了正确的配置（快照中的位置即为当前位置）
+            current_rect = window["rect"]
+            current_width = current_rect[2] - current_rect[0]
+            current_height = current_rect[3] - current_rect[1]
+
+            # 如果配置与当前窗口状态不同，则应用配置
+            if (current_rect[0] != config["x"] or
+                current_rect[1] != config["y"] or
+                current_width != config["width"] or
+                current_height != config["height"]):
+                placements[window["hwnd"]] = (
+                    window["hwnd"],
+                    config["x"], config["y"],
+                    config["width"], config["height"]
+                )
+
+
+def auto_apply_configs(window_manager, snapshot, configs, recheck_configs=None, retry_windows=None):
+    """根据快照增量自动应用配置到匹配的窗口
+
+    只检查快照中新出现或标题/位置发生变化的窗口（全量快照时检查所有窗口），
+    收集需要调整的窗口后通过 resize_windows 一次性提交。
+
+    Args:
+        window_manager: WindowManager对象
+        snapshot: WindowSnapshot对象
+        configs: 配置列表
+        recheck_configs: 刚发生变化的配置（可选），对快照中的所有窗口重新检查
+        retry_windows: 上次被跳过或调整失败、需要再次尝试的窗口（可选）
+
+    Returns:
+        [(hwnd, success, error_message), ...]，没有需要调整的窗口时返回空列表
+    """
+    placements = {}
+
+    # 只有新出现或标题/位置变化的窗口才可能需要重新应用
+    if snapshot.full:
+        windows = snapshot.windows
+    else:
+        windows = snapshot.added + snapshot.changed
+        if retry_windows:
+            seen = {window["hwnd"] for window in windows}
+            windows = windows + [window for window in retry_windows if window["hwnd"] not in seen]
+    if configs and windows:
+        # 候选窗口只在全量时复用快照索引，增量时只为变化的窗口建索引
+        if snapshot.full:
+            index = snapshot.match_index
+        else:
+            index = WindowMatchIndex(windows)
+        _collect_placements(index, configs, placements)
+
+    # 变化的配置需要与所有窗口重新匹配（全量快照时上面已经检查过）
+    if recheck_configs and not snapshot.full:
+        _collect_placements(snapshot.match_index, recheck_configs, placements)
+
+    if not placements:
+        return []
+    return window_manager.resize_windows(list(placements.values()))
+
+
+class WindowMonitor(QThread):
+    """后台窗口监测线程
+
+    在独立线程中枚举窗口并执行自动应用，GUI线程只通过排队信号接收
+    快照和应用结果，不再承担枚举、进程查询和窗口调整的开销。
+
+    提供事件源（WindowEventSource）时，由窗口事件驱动增量更新，只重新探测
+    事件涉及的窗口，完整枚举仅作为低频的兜底校对；否则按固定间隔轮询。
+
+    因无响应被跳过或调整失败的窗口不会产生新的增量，单独记录下来，
+    无响应冷却期（其他失败为一个轮询间隔）结束后重新尝试。
+    """
+
+    snapshot_ready = pyqtSignal(object)  # WindowSnapshot
+    apply_finished = pyqtSignal(object)  # [(hwnd, success, error_message), ...]
+
+    def __init__(self, window_manager, interval=DEFAULT_MONITOR_INTERVAL, event_source=None,
+                 reconcile_interval=DEFAULT_RECONCILE_INTERVAL, event_debounce=DEFAULT_EVENT_DEBOUNCE,
+                 parent=None):
+        super().__init__(parent)
+        self.window_manager = window_manager
+        self.interval = interval
+        self.event_source = event_source
+        self.reconcile_interval = reconcile_interval
+        self.event_debounce = event_debounce
+
+        # 以下状态由GUI线程（或事件源线程）写入、监测线程读取，统一由条件变量保护
+        self._condition = threading.Condition()
+        self._configs = {}  # (标题, 进程名) -> 配置副本，整体替换而不原地修改
+        self._recheck_configs = []  # 增量更新的配置，下一轮与所有窗口重新匹配
+        self._auto_apply = False
+        self._paused = False
+        self._stopping = False
+        self._wake_requested = False
+        self._generation = 0  # 监测线程看到的快照代数，为0时下次全量检查
+        self._pending_hwnds = set()  # 收到事件、等待探测的窗口
+        self._last_event_time = 0.0
+        self._retry_windows = {}  # hwnd -> 下次重试时间（monotonic），只在监测线程中访问
+
+    def set_configs(self, configs):
+        """更新配置列表（复制一份，避免与GUI线程共享可变对象），并立即重新检查所有窗口"""
+        configs = {(config.get("title"), config.get("process")): dict(config) for config in configs}
+        with self._condition:
+            self._configs = configs
+            self._recheck_configs = []
+            self._generation = 0
+            self._wake_requested = True
+            self._condition.notify_all()
+
+    def update_configs(self, upserted, removed_keys=()):
+        """增量更新配置：只复制变化的配置，下一轮只对变化的配置重新检查所有窗口
+
+        Args:
+            upserted: 新增或修改的配置
+            removed_keys: 被删除配置的 (标题, 进程名)
+        """
+        upserted = [dict(config) for config in upserted]
+        with self._condition:
+            # 复制字典而不是原地修改，监测线程可能正在遍历当前的字典
+            configs = dict(self._configs)
+            for key in removed_keys:
+                configs.pop(tuple(key), None)
+            for config in upserted:
+                configs[(config.get("title"), config.get("process"))] = config
+            self._configs = configs
+            self._recheck_configs.extend(upserted)
+            self._wake_requested = True
+            self._condition.notify_all()
+
+    def set_auto_apply(self, enabled):
+        """开启或关闭自动应用，开启时立即重新检查所有窗口"""
+        with self._condition:
+            if enabled and not self._auto_apply:
+                self._generation = 0
+                self._wake_requested = True
+                self._condition.notify_all()
+            self._auto_apply = enabled
+
+    def pause(self):
+        """暂停监测（当前这一轮会执行完）"""
+        with self._condition:
+            self._paused = True
+
+    def resume(self):
+        """恢复监测并立即执行一轮"""
+        with self._condition:
+            self._paused = False
+            self._wake_requested = True
+            self._condition.notify_all()
+
+    def wake(self):
+        """立即执行一轮监测"""
+        with self._condition:
+            self._wake_requested = True
+            self._condition.notify_all()
+
+    def stop(self, timeout=3000):
+        """停止监测线程并等待其退出"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self.wait(timeout)
+
+    def _on_window_event(self, event, hwnd):
+        """事件源回调（可能在事件源线程中调用），只记录窗口并唤醒监测线程"""
+        with self._condition:
+            self._pending_hwnds.add(hwnd)
+            self._last_event_time = time.monotonic()
+            self._condition.notify_all()
+
+    def run(self):
+        """监测循环"""
+        if self.event_source is not None:
+            try:
+                self.event_source.start(self._on_window_event)
+            except Exception:
+                self.event_source = None  # 钩子不可用，退回轮询
+
+        last_full = 0.0
+        try:
+            while True:
+                with self._condition:
+                    if self._stopping:
+                        return
+                    configs = self._configs
+                    recheck_configs = self._recheck_configs
+                    self._recheck_configs = []
+                    auto_apply = self._auto_apply
+                    since = self._generation
+                    pending = self._pending_hwnds
+                    self._pending_hwnds = set()
+
+                # 没有事件源、需要全量检查、兜底时间已到或被主动唤醒时完整枚举
+                now = time.monotonic()
+                full = (self.event_source is None or since == 0 or not pending or
+                        now - last_full >= self.reconcile_interval / 1000)
+                try:
+                    if full:
+                        snapshot = self.window_manager.get_window_snapshot(since=since)
+                        last_full = now
+                    else:
+                        snapshot = self.window_manager.get_window_snapshot(since=since, hwnds=pending)
+                except Exception:
+                    snapshot = None
+
+                if snapshot is not None:
+                    with self._condition:
+                        # 配置在本轮期间被更新时保留0，下一轮重新全量检查
+                        if self._generation == since:
+                            self._generation = snapshot.generation
+                    self.snapshot_ready.emit(snapshot)
+
+                    retry_windows = self._take_retry_windows(snapshot) if auto_apply else []
+                    if auto_apply and (snapshot.has_changes() or recheck_configs or retry_windows):
+                        try:
+                            results = auto_apply_configs(self.window_manager, snapshot,
+                                                         list(configs.values()), recheck_configs,
+                                                         retry_windows)
+                        except Exception:
+                            results = []
+                        if results:
+                            self._record_failures(results)
+                            self.apply_finished.emit(results)
+
+                with self._condition:
+                    self._wait_for_work(last_full)
+        finally:
+            if self.event_source is not None:
+                self.event_source.stop()
+
+    def _take_retry_windows(self, snapshot):
+        """取出已到重试时间、仍然存在的窗口"""
+        now = time.monotonic()
+        due = [hwnd for hwnd, retry_at in self._retry_windows.items() if retry_at <= now]
+        windows = []
+        for hwnd in due:
+            del self._retry_windows[hwnd]
+            window = snapshot.get(hwnd)
+            if window is not None:
+                windows.append(window)
+        return windows
+
+    def _record_failures(self, results):
+        """记录被跳过或调整失败的窗口，无响应的窗口在冷却期结束后重试"""
+        now = time.monotonic()
+        hung = set(self.window_manager.get_hung_windows())
+        for hwnd, success, _ in results:
+            if success:
+                self._retry_windows.pop(hwnd, None)
+            elif hwnd in hung:
+                self._retry_windows[hwnd] = now + self.window_manager.hung_cooldown
+            else:
+                self._retry_windows[hwnd] = now + self.interval / 1000
+
+    def _wait_for_work(self, last_full):
+        """等待下一轮：有待处理事件（合并后）、被唤醒或到达轮询/兜底时间（调用方已持有锁）"""
+        if self.event_source is None:
+            interval = self.interval / 1000
+        else:
+            interval = self.reconcile_interval / 1000
+        debounce = self.event_debounce / 1000
+
+        while not self._stopping:
+            if self._paused:
+                self._condition.wait()
+                continue
+            if self._wake_requested:
+                self._wake_requested = False
+                return
+
+            now = time.monotonic()
+            if self._pending_hwnds:
+                # 等事件安静一段时间后再处理，合并拖动过程中的连续事件
+                quiet = now - self._last_event_time
+                if quiet >= debounce:
+                    return
+                self._condition.wait(debounce - quiet)
+                continue
+
+            remaining = last_full + interval - now
+            if self._retry_windows and self._auto_apply:
+                remaining = min(remaining, min(self._retry_windows.values()) - now)
+            if remaining <= 0:
+                return
+            self._condition.wait(remaining)